@@ -0,0 +1,98 @@
+"""
+Benchmark of the session codecs - encode/decode time and size of the payload in Redis for typical sessions.
+
+Run from the project root:
+    python -m benchmarks.session_codec [--number 100000]
+
+Sessions:
+    `visitor`       - session of the anonymous visitor with alert message
+    `user`          - session of the user (identity and group)
+    `legacy user`   - session of the user of the older layout (whole db row, `about_me` text)
+"""
+
+import argparse
+import time
+import timeit
+
+from core.session_codec import (
+    BinaryCodec,
+    JsonCodec
+)
+
+
+def build_sessions() -> dict[str, dict]:
+    """
+    Return typical session data (as it is saved by session storage).
+
+    :return: session data by name
+    :rtype: dict[str, dict]
+    """
+
+    created = int(time.time())
+
+    sessions = {
+        'visitor': {
+            'created': created,
+            'session': {
+                'message': 'user with the given login was not found'
+            }
+        },
+        'user': {
+            'created': created,
+            'session': {
+                'user': {'id': 1024, 'login': 'thinker', 'group_id': 2, 'version': 2}
+            }
+        },
+        'legacy user': {
+            'created': created,
+            'session': {
+                'user': {
+                    'id': 1024,
+                    'login': 'thinker',
+                    'about_me': 'I think, therefore I am. ' * 40,
+                    'image_path': 'images/user_images/1024.jpg',
+                    'is_admin': 0,
+                    'is_moderator': 0,
+                    'group_id': 2
+                }
+            }
+        }
+    }
+
+    return sessions
+
+
+def run(number: int) -> None:
+    """
+    Run benchmark and print results.
+
+    :param number: quantity of the encodings (decodings) of every session
+    :type number: int
+
+    :return: None
+    :rtype: None
+    """
+
+    codecs = (JsonCodec(), BinaryCodec())
+
+    print(f'{"session":<14}{"codec":<8}{"bytes":>8}{"encode (us)":>14}{"decode (us)":>14}')
+
+    for session_name, data in build_sessions().items():
+        for codec in codecs:
+            payload = codec.encode(data)
+            assert codec.decode(payload) == data
+
+            encode_time = timeit.timeit(lambda: codec.encode(data), number=number) / number
+            decode_time = timeit.timeit(lambda: codec.decode(payload), number=number) / number
+
+            print(
+                f'{session_name:<14}{codec.name:<8}{len(payload):>8}'
+                f'{encode_time * 1_000_000:>14.2f}{decode_time * 1_000_000:>14.2f}'
+            )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark of the session codecs')
+    parser.add_argument('--number', type=int, default=100_000, help='quantity of the encodings of every session')
+
+    run(parser.parse_args().number)
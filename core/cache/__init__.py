@@ -0,0 +1,3 @@
+"""
+Contains modules that cache data (db data, rendered pages) and invalidate it.
+"""
@@ -0,0 +1,182 @@
+"""
+Contains in-process cache of the rows quantities (pagination totals) by normalized filter key.
+
+The same counts of the posts (notes) are computed for the same filters over and over,
+so, counts are kept in the worker memory with TTL.
+Counts without search word are purged precisely - write functions invalidate tags of the changed posts membership:
+    `posts_count` with `posts_of_rubric:<id>`, `posts_of_user:<id>` (no tag of the dimension - any value is affected),
+    `notes_of_user:<id>`.
+Counts with search word rely on TTL.
+
+Key: ('posts', rubric_id, user_id, normalized search word) or ('notes', user_id, rubric_id, normalized search word)
+
+.. function:: build_posts_count_key(rubric_id: Optional[int], user_id: Optional[int], search_word: Optional[str]
+        ) -> tuple
+    Return key of the posts count
+.. function:: build_notes_count_key(user_id: int, rubric_id: Optional[int], search_word: Optional[str]) -> tuple
+    Return key of the notes count
+.. function:: purge_counts(tags: set[str]) -> None
+    Purge cached counts by invalidated tags
+.. function:: init_counts_cache(app: aiohttp.web.Application) -> None
+    Register counts cache invalidation
+.. function:: close_counts_cache(app: aiohttp.web.Application) -> None
+    Unregister counts cache invalidation (and log statistics)
+
+.. const:: count_cache
+    Cache of the rows quantities (value - pair (rows quantity, flag of approximation))
+"""
+
+import logging
+from typing import Optional
+
+import aiohttp.web
+
+from .lru import LRUCache
+from ..database import invalidation
+from ..settings import (
+    COUNTS_CACHE_MAXSIZE,
+    COUNTS_CACHE_TTL
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+count_cache = LRUCache('count', maxsize=COUNTS_CACHE_MAXSIZE, ttl=COUNTS_CACHE_TTL)
+
+
+def _normalize_search_word(search_word: Optional[str]) -> Optional[str]:
+    """
+    Return normalized search word (full text search is case insensitive and ignores extra spaces).
+
+    :param search_word: search word
+    :type search_word: Optional[str]
+
+    :return: normalized search word (None - if it is empty)
+    :rtype: Optional[str]
+    """
+
+    return (' '.join(search_word.lower().split()) or None) if search_word else None
+
+
+def build_posts_count_key(rubric_id: Optional[int], user_id: Optional[int], search_word: Optional[str]) -> tuple:
+    """
+    Return key of the posts count.
+
+    :param rubric_id: rubric id filter
+    :type rubric_id: Optional[int]
+    :param user_id: user id filter
+    :type user_id: Optional[int]
+    :param search_word: search word filter
+    :type search_word: Optional[str]
+
+    :return: key
+    :rtype: tuple
+    """
+
+    return 'posts', rubric_id or None, user_id or None, _normalize_search_word(search_word)
+
+
+def build_notes_count_key(user_id: int, rubric_id: Optional[int], search_word: Optional[str]) -> tuple:
+    """
+    Return key of the notes count.
+
+    :param user_id: notes owner id
+    :type user_id: int
+    :param rubric_id: rubric id filter
+    :type rubric_id: Optional[int]
+    :param search_word: search word filter
+    :type search_word: Optional[str]
+
+    :return: key
+    :rtype: tuple
+    """
+
+    return 'notes', user_id, rubric_id or None, _normalize_search_word(search_word)
+
+
+def _is_affected_posts_count(key: tuple, rubric_ids: set[int], user_ids: set[int]) -> bool:
+    """
+    Return status of the posts count that is changed by membership change (counts with search word rely on TTL).
+
+    :param key: count key
+    :type key: tuple
+    :param rubric_ids: rubrics with changed membership (empty - any rubric)
+    :type rubric_ids: set[int]
+    :param user_ids: users with changed membership (empty - any user)
+    :type user_ids: set[int]
+
+    :return: status (True - count is changed)
+    :rtype: bool
+    """
+
+    kind, rubric_id, user_id, search_word = key
+
+    return (
+        kind == 'posts' and search_word is None
+        and (rubric_id is None or not rubric_ids or rubric_id in rubric_ids)
+        and (user_id is None or not user_ids or user_id in user_ids)
+    )
+
+
+async def purge_counts(tags: set[str]) -> None:
+    """
+    Purge cached counts by invalidated tags (used as invalidation handler).
+
+    :param tags: invalidated tags
+    :type tags: set[str]
+
+    :return: None
+    :rtype: None
+    """
+
+    if invalidation.ALL in tags:
+        count_cache.clear()
+        return
+
+    parsed_tags = [invalidation.parse_tag(tag) for tag in tags]
+
+    if invalidation.tag(invalidation.POSTS_COUNT) in tags:
+        rubric_ids = {id_ for kind, id_ in parsed_tags if kind == invalidation.POSTS_OF_RUBRIC and id_}
+        user_ids = {id_ for kind, id_ in parsed_tags if kind == invalidation.POSTS_OF_USER and id_}
+
+        count_cache.pop_where(lambda key, _: _is_affected_posts_count(key, rubric_ids, user_ids))
+
+    notes_user_ids = {id_ for kind, id_ in parsed_tags if kind == invalidation.NOTES_OF_USER and id_}
+    if notes_user_ids:
+        count_cache.pop_where(
+            lambda key, _: key[0] == 'notes' and key[1] in notes_user_ids and key[3] is None
+        )
+
+
+async def init_counts_cache(app: aiohttp.web.Application) -> None:
+    """
+    Register counts cache invalidation.
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    # counts are cached in memory of every worker
+    invalidation.add_handler(purge_counts, local=True)
+
+    logger.info('Counts cache has been set!')
+
+
+async def close_counts_cache(app: aiohttp.web.Application) -> None:
+    """
+    Unregister counts cache invalidation (and log statistics).
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    invalidation.remove_handler(purge_counts)
+
+    logger.info(f'Counts cache statistics: {count_cache.stats}')
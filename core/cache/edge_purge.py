@@ -0,0 +1,243 @@
+"""
+Contains purging of the public pages in shared HTTP caches (CDN, reverse proxy) by surrogate keys.
+
+Public pages for anonymous visitors carry surrogate keys - tags of the data that page shows (check `page_cache`),
+so, shared caches can keep pages long: writes purge pages of the changed data only.
+Purger is the shared invalidation handler (invoked only by the worker that changed data):
+invalidated tags are collected for the short delay and purged by one `PURGE` request per cache endpoint
+(keys are in the header, separated by spaces). Failed requests are retried with exponential backoff,
+purge that failed all retries is logged - page is refreshed by the shared cache TTL.
+Requests are sent in background - writes do not wait for shared caches.
+
+Tag `*` is not purged - shared caches have no key of all pages (pages expire by TTL).
+
+.. class:: EdgePurger
+    Implements batched purging of the shared caches by surrogate keys
+
+.. function:: init_edge_purger(app: aiohttp.web.Application) -> None
+    Create purger and register it as invalidation handler (if shared caches are set)
+.. function:: close_edge_purger(app: aiohttp.web.Application) -> None
+    Unregister purger and send pending purges
+
+.. const:: PURGE_METHOD
+    HTTP method of the purge request
+.. const:: PURGED_KINDS
+    Kinds of the tags that public pages are tagged by
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+import aiohttp
+import aiohttp.web
+
+from ..database import invalidation
+from ..settings import (
+    EDGE_CACHE_PURGE_BATCH_DELAY,
+    EDGE_CACHE_PURGE_BATCH_MAXSIZE,
+    EDGE_CACHE_PURGE_ENDPOINTS,
+    EDGE_CACHE_PURGE_HEADER,
+    EDGE_CACHE_PURGE_RETRIES,
+    EDGE_CACHE_PURGE_TIMEOUT
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+PURGE_METHOD = 'PURGE'
+
+PURGED_KINDS = frozenset((
+    invalidation.POST, invalidation.POSTS, invalidation.POST_RUBRIC, invalidation.POST_RUBRICS,
+    invalidation.POSTS_OF_USER, invalidation.USER
+))
+
+
+class EdgePurger:
+    """ Implements batched purging of the shared caches by surrogate keys """
+
+    def __init__(self, endpoints: list[str], header: str = EDGE_CACHE_PURGE_HEADER,
+                 batch_delay: float = EDGE_CACHE_PURGE_BATCH_DELAY,
+                 batch_maxsize: int = EDGE_CACHE_PURGE_BATCH_MAXSIZE,
+                 retries: int = EDGE_CACHE_PURGE_RETRIES, timeout: float = EDGE_CACHE_PURGE_TIMEOUT) -> None:
+        self.endpoints = endpoints
+        self.header = header
+        self.batch_delay = batch_delay
+        self.batch_maxsize = batch_maxsize
+        self.retries = retries
+
+        self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout))
+        self._pending: set[str] = set()
+        self._flush: Optional[asyncio.Task] = None
+        self._sends: set[asyncio.Task] = set()
+
+        self.purged_keys = 0
+        self.requests = 0
+        self.retried_requests = 0
+        self.failed_requests = 0
+
+    async def purge(self, tags: set[str]) -> None:
+        """
+        Schedule purge of the pages by invalidated tags (used as invalidation handler).
+
+        :param tags: invalidated tags
+        :type tags: set[str]
+
+        :return: None
+        :rtype: None
+        """
+
+        keys = {tag for tag in tags if invalidation.parse_tag(tag)[0] in PURGED_KINDS}
+        if not keys:
+            return
+
+        self._pending.update(keys)
+
+        # tags of the writes within the delay are purged together
+        if self._flush is None:
+            self._flush = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        """
+        Send pending purges after the batch delay.
+
+        :return: None
+        :rtype: None
+        """
+
+        await asyncio.sleep(self.batch_delay)
+        self._flush = None
+        self._send_pending()
+
+    def _send_pending(self) -> None:
+        """
+        Send pending purges in background (by batches of keys).
+
+        :return: None
+        :rtype: None
+        """
+
+        keys, self._pending = sorted(self._pending), set()
+
+        for start in range(0, len(keys), self.batch_maxsize):
+            batch = keys[start:start + self.batch_maxsize]
+            for endpoint in self.endpoints:
+                task = asyncio.create_task(self._send(endpoint, batch))
+                self._sends.add(task)
+                task.add_done_callback(self._sends.discard)
+
+    async def _send(self, endpoint: str, keys: list[str]) -> None:
+        """
+        Send purge request to the shared cache (retry it with exponential backoff).
+
+        :param endpoint: url of the shared cache
+        :type endpoint: str
+        :param keys: purged surrogate keys
+        :type keys: list[str]
+
+        :return: None
+        :rtype: None
+        """
+
+        headers = {self.header: ' '.join(keys)}
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried_requests += 1
+                await asyncio.sleep(self.batch_delay * 2 ** (attempt - 1))
+
+            self.requests += 1
+            try:
+                async with self._session.request(PURGE_METHOD, endpoint, headers=headers) as response:
+                    # missing keys are purged too - shared cache has nothing to drop
+                    if response.status < 500 and response.status != 429:
+                        if response.status >= 400:
+                            logger.warning(f'Purge of {len(keys)} keys is rejected by {endpoint}: {response.status}')
+                        else:
+                            self.purged_keys += len(keys)
+                        return
+                    logger.info(f'Purge of {len(keys)} keys by {endpoint} has failed: {response.status}')
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.info(f'Purge of {len(keys)} keys by {endpoint} has failed: {e!r}')
+
+        self.failed_requests += 1
+        logger.warning(f'Purge of {len(keys)} keys by {endpoint} has failed after {self.retries} retries: {keys}')
+
+    async def close(self) -> None:
+        """
+        Send pending purges, wait for purge requests and close HTTP session.
+
+        :return: None
+        :rtype: None
+        """
+
+        if self._flush is not None:
+            self._flush.cancel()
+            self._flush = None
+        self._send_pending()
+
+        await asyncio.gather(*self._sends, return_exceptions=True)
+        await self._session.close()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Return statistics of the purger.
+
+        :return: statistics
+        :rtype: dict[str, int]
+        """
+
+        return {
+            'purged_keys': self.purged_keys,
+            'requests': self.requests,
+            'retried_requests': self.retried_requests,
+            'failed_requests': self.failed_requests,
+            'pending_keys': len(self._pending)
+        }
+
+
+async def init_edge_purger(app: aiohttp.web.Application) -> None:
+    """
+    Create purger of the shared caches and register it as invalidation handler (if shared caches are set).
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    if not EDGE_CACHE_PURGE_ENDPOINTS:
+        app['edge_purger'] = None
+        return
+
+    edge_purger = EdgePurger(EDGE_CACHE_PURGE_ENDPOINTS)
+    # shared caches are purged once - by the worker that changed data
+    invalidation.add_handler(edge_purger.purge)
+
+    app['edge_purger'] = edge_purger
+
+    logger.info(f'Shared caches purger has been set (endpoints: {", ".join(EDGE_CACHE_PURGE_ENDPOINTS)})!')
+
+
+async def close_edge_purger(app: aiohttp.web.Application) -> None:
+    """
+    Unregister purger of the shared caches and send pending purges.
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    edge_purger = app.get('edge_purger')
+    if edge_purger is None:
+        return
+
+    invalidation.remove_handler(edge_purger.purge)
+    await edge_purger.close()
+
+    logger.info(f'Shared caches purger statistics: {edge_purger.stats}')
@@ -0,0 +1,329 @@
+"""
+Contains stale-while-revalidate cache of the hot list pages data (first pages of the posts feed and rubrics).
+
+First page of the posts feed is the hottest url - with plain TTL every expiration blocks requests on the fresh query.
+So, expired entry is served immediately while one background task refreshes it,
+entry that is older than the hard staleness limit is not served (request waits for the fresh data).
+Fresh entry is refreshed in background before expiration with probability weighted by its computation time
+(probabilistic early expiration - check `lru`).
+Concurrent loads of the same page are coalesced. Entries are dropped on the posts invalidation.
+Cached data is shared between requests - so, callers must not change it.
+
+.. class:: StaleWhileRevalidateCache
+    Implements in-process cache with stale-while-revalidate serving
+
+.. function:: is_hot_posts_page(params: validators.PostUrlParams) -> bool
+    Return status of the hot posts page
+.. function:: fetch_posts_page(app: aiohttp.web.Application, params: validators.PostUrlParams
+        ) -> tuple[list[dict[str, Union[int, str, datetime.datetime]]], db.PagesQuantity]
+    Fetch posts of the page and pages quantity
+.. function:: init_hot_pages_cache(app: aiohttp.web.Application) -> None
+    Create and set in app settings hot pages cache
+.. function:: close_hot_pages_cache(app: aiohttp.web.Application) -> None
+    Unregister hot pages cache invalidation and stop refreshes
+"""
+
+import asyncio
+import datetime
+import logging
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Hashable,
+    NamedTuple,
+    Union
+)
+
+import aiohttp.web
+
+from . import search
+from .lru import is_expired_early
+from ..database import (
+    db,
+    invalidation,
+    validators
+)
+from ..database.single_flight import (
+    SingleFlight,
+    bind_versions
+)
+from ..settings import (
+    DEFAULT_POSTS_ON_PAGE,
+    HOT_PAGES_CACHE_TTL,
+    HOT_PAGES_MAX_STALENESS
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry(NamedTuple):
+    """ Cached value with freshness limits (monotonic time) and duration of the value computation """
+    value: Any
+    fresh_until: float
+    stale_until: float
+    compute_time: float
+
+
+class StaleWhileRevalidateCache:
+    """ Implements in-process cache with stale-while-revalidate serving """
+
+    def __init__(self, name: str, ttl: float, max_staleness: float) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.max_staleness = max_staleness
+
+        self._entries: dict[Hashable, _Entry] = {}
+        self._loads = SingleFlight(name)
+        # key: background refresh task
+        self._refreshes: dict[Hashable, asyncio.Task] = {}
+        self.version = 0
+
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.early_refreshes = 0
+        self.refresh_errors = 0
+
+    async def get(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return cached value (stale value is returned too - and refreshed in background).
+
+        :param key: entry key
+        :type key: Hashable
+        :param load: async function without arguments that loads fresh value
+        :type load: Callable[[], Awaitable[Any]]
+
+        :return: value
+        :rtype: Any
+        """
+
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None and now < entry.fresh_until:
+            self.fresh_hits += 1
+            # popular entry is refreshed before expiration (probabilistically) - stale entries are rarely served
+            if is_expired_early(entry.fresh_until, entry.compute_time, now):
+                self.early_refreshes += 1
+                self._schedule_refresh(key, load)
+            return entry.value
+
+        if entry is not None and now < entry.stale_until:
+            self.stale_hits += 1
+            self._schedule_refresh(key, load)
+            return entry.value
+
+        self.misses += 1
+
+        return await self._load(key, load)
+
+    async def _load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Load fresh value and save entry (if cache was not invalidated while loading).
+
+        :param key: entry key
+        :type key: Hashable
+        :param load: async function without arguments that loads fresh value
+        :type load: Callable[[], Awaitable[Any]]
+
+        :return: value
+        :rtype: Any
+        """
+
+        version = self.version
+        start_time = time.monotonic()
+        # load that started before invalidation is not joined
+        with bind_versions((self.name, version)):
+            value = await self._loads.do(key, load)
+
+        if version == self.version:
+            now = time.monotonic()
+            self._entries[key] = _Entry(value, now + self.ttl, now + self.ttl + self.max_staleness, now - start_time)
+
+        return value
+
+    def _schedule_refresh(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Start background refresh of the entry (only one refresh of the entry at once).
+
+        :param key: entry key
+        :type key: Hashable
+        :param load: async function without arguments that loads fresh value
+        :type load: Callable[[], Awaitable[Any]]
+
+        :return: None
+        :rtype: None
+        """
+
+        if key not in self._refreshes:
+            self._refreshes[key] = asyncio.create_task(self._refresh(key, load))
+
+    async def _refresh(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Refresh entry (errors are logged - stale entry is served until the staleness limit).
+
+        :param key: entry key
+        :type key: Hashable
+        :param load: async function without arguments that loads fresh value
+        :type load: Callable[[], Awaitable[Any]]
+
+        :return: None
+        :rtype: None
+        """
+
+        try:
+            await self._load(key, load)
+        except Exception as error:
+            self.refresh_errors += 1
+            logger.exception(msg=f'Error raised while {self.name} entry {key} is refreshing: {error}', exc_info=error)
+        finally:
+            self._refreshes.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Drop all entries.
+
+        :return: None
+        :rtype: None
+        """
+
+        self.version += 1
+        self._entries.clear()
+
+    async def purge(self, tags: set[str]) -> None:
+        """
+        Drop all entries if posts are changed (used as invalidation handler).
+
+        :param tags: invalidated tags
+        :type tags: set[str]
+
+        :return: None
+        :rtype: None
+        """
+
+        if invalidation.ALL in tags or invalidation.tag(invalidation.POSTS) in tags:
+            self.clear()
+
+    async def stop(self) -> None:
+        """
+        Cancel background refreshes.
+
+        :return: None
+        :rtype: None
+        """
+
+        for task in list(self._refreshes.values()):
+            task.cancel()
+
+        await asyncio.gather(*self._refreshes.values(), return_exceptions=True)
+
+    def entries(self) -> dict[Hashable, _Entry]:
+        """
+        Return entries (for inspection).
+
+        :return: entries by key
+        :rtype: dict[Hashable, _Entry]
+        """
+
+        return dict(self._entries)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Return statistics of the cache.
+
+        :return: statistics
+        :rtype: dict[str, int]
+        """
+
+        stats = {
+            'size': len(self._entries),
+            'fresh_hits': self.fresh_hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'early_refreshes': self.early_refreshes,
+            'refreshing': len(self._refreshes),
+            'refresh_errors': self.refresh_errors
+        }
+
+        return stats
+
+
+def is_hot_posts_page(params: validators.PostUrlParams) -> bool:
+    """
+    Return status of the hot posts page - first page of the feed (or of the rubric) with default size.
+
+    :param params: validated url params
+    :type params: validators.PostUrlParams
+
+    :return: status (True - page is hot)
+    :rtype: bool
+    """
+
+    return params.page == 1 and params.quantity == DEFAULT_POSTS_ON_PAGE and not params.keyword and not params.thinker
+
+
+async def fetch_posts_page(app: aiohttp.web.Application, params: validators.PostUrlParams
+                           ) -> tuple[list[dict[str, Union[int, str, datetime.datetime]]], db.PagesQuantity]:
+    """
+    Fetch posts of the page and pages quantity (by own connection - might be invoked in background).
+
+    Search pages are served from search results cache.
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+    :param params: validated url params
+    :type params: validators.PostUrlParams
+
+    :return: posts and pages quantity
+    :rtype: tuple[list[dict[str, Union[int, str, datetime.datetime]]], db.PagesQuantity]
+    """
+
+    async with app['db'].acquire() as connection:
+        if params.keyword:
+            posts = await search.fetch_found_posts(connection, params)
+        else:
+            posts = await db.fetch_all_posts(connection, params)
+        pages_quantity = await db.fetch_posts_possible_pages_quantity(connection, params)
+
+    return posts, pages_quantity
+
+
+async def init_hot_pages_cache(app: aiohttp.web.Application) -> None:
+    """
+    Create and set in app settings hot pages cache.
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    hot_pages_cache = StaleWhileRevalidateCache('hot_posts_pages', HOT_PAGES_CACHE_TTL, HOT_PAGES_MAX_STALENESS)
+    # pages are cached in memory of every worker
+    invalidation.add_handler(hot_pages_cache.purge, local=True)
+
+    app['hot_pages_cache'] = hot_pages_cache
+
+    logger.info('Hot pages cache has been set!')
+
+
+async def close_hot_pages_cache(app: aiohttp.web.Application) -> None:
+    """
+    Unregister hot pages cache invalidation and stop background refreshes.
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    invalidation.remove_handler(app['hot_pages_cache'].purge)
+    await app['hot_pages_cache'].stop()
+
+    logger.info(f'Hot pages cache statistics: {app["hot_pages_cache"].stats}')
@@ -0,0 +1,163 @@
+"""
+Contains inspection of the in-process caches (report for admins to tune TTLs and sizes).
+
+Caches in the worker memory are reported by the worker that handles the request - workers have own entries.
+Memory of the cache is estimated by the sample of the entries (deep size of keys and values).
+
+Report row (by cache namespace): name, size, maxsize, memory estimate, hits, misses, hit rate, evictions,
+expirations (early too), average computation time, the hottest keys (and L2 statistics for two-tier caches).
+
+.. function:: estimate_size(value: Any, seen: Optional[set[int]] = None) -> int
+    Return deep size of the value (bytes)
+.. function:: build_report(app: aiohttp.web.Application) -> list[dict[str, Any]]
+    Return report of the caches
+"""
+
+import sys
+from typing import (
+    Any,
+    Optional
+)
+
+import aiohttp.web
+
+from . import (
+    lru,
+    tiered
+)
+from ..settings import (
+    CACHE_INSPECTION_HOTTEST_KEYS,
+    CACHE_INSPECTION_MEMORY_SAMPLE
+)
+
+
+def estimate_size(value: Any, seen: Optional[set[int]] = None) -> int:
+    """
+    Return deep size of the value (containers are walked, shared objects are counted once).
+
+    :param value: value
+    :type value: Any
+    :param seen: ids of the counted objects
+    :type seen: Optional[set[int]]
+
+    :return: size (bytes)
+    :rtype: int
+    """
+
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    size = sys.getsizeof(value)
+
+    if isinstance(value, dict):
+        size += sum(estimate_size(key, seen) + estimate_size(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, seen) for item in value)
+
+    return size
+
+
+def _estimate_memory(cache: lru.LRUCache) -> int:
+    """
+    Return memory estimate of the cache (by the sample of the most recently used entries).
+
+    :param cache: cache
+    :type cache: lru.LRUCache
+
+    :return: memory estimate (bytes)
+    :rtype: int
+    """
+
+    entries = cache.items()
+    if not entries:
+        return 0
+
+    sample = entries[-CACHE_INSPECTION_MEMORY_SAMPLE:]
+    sample_size = sum(estimate_size(entry) for entry in sample)
+
+    return sample_size * len(entries) // len(sample)
+
+
+def _hit_rate(hits: int, misses: int) -> float:
+    """
+    Return hit rate.
+
+    :param hits: quantity of the hits
+    :type hits: int
+    :param misses: quantity of the misses
+    :type misses: int
+
+    :return: hit rate (0 - if cache was not read)
+    :rtype: float
+    """
+
+    return round(hits / (hits + misses), 3) if hits + misses else 0.0
+
+
+def build_report(app: aiohttp.web.Application) -> list[dict[str, Any]]:
+    """
+    Return report of the caches in the worker memory (by cache namespace).
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: report rows
+    :rtype: list[dict[str, Any]]
+    """
+
+    tiered_stats = tiered.get_stats()
+
+    report = []
+    for cache in lru.get_caches():
+        stats = cache.stats
+        row = {
+            'name': cache.name,
+            'size': stats['size'],
+            'maxsize': stats['maxsize'],
+            'memory': _estimate_memory(cache),
+            'hits': stats['hits'],
+            'misses': stats['misses'],
+            'hit_rate': _hit_rate(stats['hits'], stats['misses']),
+            'evictions': stats['evictions'],
+            'expirations': stats['expirations'],
+            'early_expirations': stats['early_expirations'],
+            'average_compute_time': stats['average_compute_time'],
+            'hottest_keys': [
+                (repr(key), hits) for key, hits in cache.hottest_keys(CACHE_INSPECTION_HOTTEST_KEYS)
+            ]
+        }
+
+        # L1 of the two-tier cache has name of the namespace
+        namespace_stats = tiered_stats.get(cache.name)
+        if namespace_stats is not None:
+            row['l2_hits'] = namespace_stats['l2_hits']
+            row['hit_rate'] = namespace_stats['hit_rate']
+
+        report.append(row)
+
+    # stale-while-revalidate cache (entries are not evicted - keys are rubrics)
+    hot_pages_cache = app.get('hot_pages_cache')
+    if hot_pages_cache is not None:
+        stats = hot_pages_cache.stats
+        entries = hot_pages_cache.entries()
+        hits = stats['fresh_hits'] + stats['stale_hits']
+        report.append({
+            'name': hot_pages_cache.name,
+            'size': stats['size'],
+            'maxsize': None,
+            'memory': sum(estimate_size(entry.value) for entry in entries.values()),
+            'hits': hits,
+            'misses': stats['misses'],
+            'hit_rate': _hit_rate(hits, stats['misses']),
+            'evictions': None,
+            'expirations': None,
+            'early_expirations': stats['early_refreshes'],
+            'average_compute_time': (
+                sum(entry.compute_time for entry in entries.values()) / len(entries) if entries else 0.0
+            ),
+            'hottest_keys': []
+        })
+
+    return report
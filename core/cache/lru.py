@@ -0,0 +1,411 @@
+"""
+Contains in-process cache bounded by size (least recently used entries are evicted) with entries TTL.
+
+Entries of the popular keys expire at the same instant - and all readers recompute them together (stampede).
+So, entries keep time of the computation and reader recomputes entry before expiration with probability that grows
+near expiration and with the computation time (XFetch - probabilistic early expiration), other readers get the entry.
+
+.. class:: LRUCache
+    Implements in-process LRU cache with TTL and hit/miss/eviction statistics
+
+.. function:: is_expired_early(expiration_time: float, compute_time: float, now: float, beta: float = XFETCH_BETA
+        ) -> bool
+    Return status of the probabilistic early expiration
+.. function:: get_caches() -> list[LRUCache]
+    Return all created caches
+.. decorator:: cache_db_function(cache: LRUCache) -> Callable
+    Cache result of the db function (by arguments after connection)
+.. decorator:: cache_missing_records(cache: LRUCache, not_found_error: Type[Exception]) -> Callable
+    Cache absence of the record that db function fetches (negative cache)
+
+.. const:: MISSING
+    Marker of the absent entry
+"""
+
+import collections
+from functools import wraps
+import math
+import random
+import time
+from typing import (
+    Any,
+    Callable,
+    Hashable,
+    Optional,
+    Type,
+    Union
+)
+
+import aiomysql
+
+from ..database import single_flight
+from ..settings import XFETCH_BETA
+
+
+MISSING = object()
+
+# all created caches (for inspection)
+_caches: list['LRUCache'] = []
+
+
+def is_expired_early(expiration_time: float, compute_time: float, now: float, beta: float = XFETCH_BETA) -> bool:
+    """
+    Return status of the probabilistic early expiration of the entry (XFetch):
+    `now - compute_time * beta * log(random) >= expiration_time`.
+
+    :param expiration_time: expiration time of the entry
+    :type expiration_time: float
+    :param compute_time: duration of the entry computation (seconds)
+    :type compute_time: float
+    :param now: current time (in the same clock as expiration time)
+    :type now: float
+    :param beta: factor of the early expiration (> 1 - earlier, < 1 - later)
+    :type beta: float
+
+    :return: status (True - entry must be recomputed)
+    :rtype: bool
+    """
+
+    # 1 - random() is in (0, 1] - log is defined
+    return now - compute_time * beta * math.log(1 - random.random()) >= expiration_time
+
+
+class LRUCache:
+    """
+    Implements in-process LRU cache with TTL.
+
+    Cache counts version of the invalidations -
+    so, result of the read that was started before invalidation might be not saved (it might be stale).
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: Optional[float] = None) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        # key: (expiration time, value, computation time)
+        self._entries: collections.OrderedDict[Hashable, tuple[Optional[float], Any, Optional[float]]] = (
+            collections.OrderedDict()
+        )
+        self.version = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.early_expirations = 0
+        # hits of the cached keys
+        self._key_hits: collections.Counter[Hashable] = collections.Counter()
+        self.computations = 0
+        self.compute_time_total = 0.0
+
+        _caches.append(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Return value of the entry (and mark entry as recently used).
+
+        :param key: entry key
+        :type key: Hashable
+
+        :return: value or `MISSING` if entry is absent (or expired, or expired early for this reader)
+        :rtype: Any
+        """
+
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return MISSING
+
+        expiration_time, value, compute_time = entry
+        now = time.monotonic()
+        if expiration_time is not None and expiration_time <= now:
+            del self._entries[key]
+            self._key_hits.pop(key, None)
+            self.expirations += 1
+            self.misses += 1
+            return MISSING
+
+        # entry is kept for other readers - this reader recomputes it
+        if expiration_time is not None and compute_time and is_expired_early(expiration_time, compute_time, now):
+            self.early_expirations += 1
+            self.misses += 1
+            return MISSING
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self._key_hits[key] += 1
+
+        return value
+
+    def set(self, key: Hashable, value: Any, *, version: Optional[int] = None, compute_time: Optional[float] = None
+            ) -> None:
+        """
+        Save entry (least recently used entry is evicted if cache is full).
+
+        :param key: entry key
+        :type key: Hashable
+        :param value: entry value
+        :type value: Any
+        :keyword version: cache version on read start (entry is not saved if cache was invalidated after)
+        :type version: Optional[int]
+        :keyword compute_time: duration of the value computation (None - entry is not expired early)
+        :type compute_time: Optional[float]
+
+        :return: None
+        :rtype: None
+        """
+
+        if version is not None and version != self.version:
+            return
+
+        expiration_time = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (expiration_time, value, compute_time)
+        self._entries.move_to_end(key)
+
+        if compute_time is not None:
+            self.computations += 1
+            self.compute_time_total += compute_time
+
+        while len(self._entries) > self.maxsize:
+            evicted_key, _ = self._entries.popitem(last=False)
+            self._key_hits.pop(evicted_key, None)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        """
+        Invalidate entry.
+
+        :param key: entry key
+        :type key: Hashable
+
+        :return: None
+        :rtype: None
+        """
+
+        self.version += 1
+        self._entries.pop(key, None)
+        self._key_hits.pop(key, None)
+
+    def pop_where(self, predicate: Callable[[Hashable, Any], bool]) -> None:
+        """
+        Invalidate all entries that satisfy predicate.
+
+        :param predicate: function that gets key and value of the entry
+        :type predicate: Callable[[Hashable, Any], bool]
+
+        :return: None
+        :rtype: None
+        """
+
+        self.version += 1
+        for key in [key for key, (_, value, _) in self._entries.items() if predicate(key, value)]:
+            del self._entries[key]
+            self._key_hits.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Invalidate all entries.
+
+        :return: None
+        :rtype: None
+        """
+
+        self.version += 1
+        self._entries.clear()
+        self._key_hits.clear()
+
+    def items(self) -> list[tuple[Hashable, Any]]:
+        """
+        Return keys and values of the entries (expired entries too) - the most recently used last.
+
+        :return: keys and values
+        :rtype: list[tuple[Hashable, Any]]
+        """
+
+        return [(key, value) for key, (_, value, _) in self._entries.items()]
+
+    def hottest_keys(self, limit: int) -> list[tuple[Hashable, int]]:
+        """
+        Return the most hit keys of the cached entries.
+
+        :param limit: quantity of the keys
+        :type limit: int
+
+        :return: keys and quantities of the hits
+        :rtype: list[tuple[Hashable, int]]
+        """
+
+        return self._key_hits.most_common(limit)
+
+    @property
+    def stats(self) -> dict[str, Union[int, float]]:
+        """
+        Return statistics of the cache.
+
+        :return: statistics
+        :rtype: dict[str, Union[int, float]]
+        """
+
+        stats = {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'early_expirations': self.early_expirations,
+            'average_compute_time': self.compute_time_total / self.computations if self.computations else 0.0
+        }
+
+        return stats
+
+
+def get_caches() -> list[LRUCache]:
+    """
+    Return all created caches (for inspection).
+
+    :return: caches
+    :rtype: list[LRUCache]
+    """
+
+    return list(_caches)
+
+
+def cache_db_function(cache: LRUCache) -> Callable:
+    """
+    Cache result of the db function (key - arguments after connection).
+
+    Dict result is copied - so, callers might change it without cache corruption.
+    Decorated function has `get_cached` (cache lookup without connection) and `load` (db function with caching)
+    - for callers that acquire connection only on cache miss.
+    Duration of the db function is saved - popular entries are recomputed before expiration.
+    Errors (e.g. `RecordNotFoundError`) are not cached.
+
+    :param cache: cache that stores results
+    :type cache: LRUCache
+
+    :return: decorator
+    :rtype: Callable
+    """
+
+    def decorator(db_function: Callable) -> Callable:
+        def get_cached(*args: Any) -> Any:
+            """
+            Return cached result of the db function without db connection.
+
+            :param args: arguments that are passed to db function after connection
+            :type args: Any
+
+            :return: db function result or `MISSING`
+            :rtype: Any
+            """
+
+            result = cache.get(args)
+
+            return dict(result) if isinstance(result, dict) else result
+
+        async def load(connection: aiomysql.Connection, *args: Any) -> Any:
+            """
+            Execute db function and cache result (cache is not checked).
+
+            :param connection: db connection
+            :type connection: aiomysql.Connection
+            :param args: other arguments that were passed to db function
+            :type args: Any
+
+            :return: db function result
+            :rtype: Any
+            """
+
+            version = cache.version
+            start_time = time.monotonic()
+            # coalesced call that started before invalidation is not joined
+            with single_flight.bind_versions((cache.name, version)):
+                result = await db_function(connection, *args)
+            cache.set(args, result, version=version, compute_time=time.monotonic() - start_time)
+
+            return dict(result) if isinstance(result, dict) else result
+
+        @wraps(db_function)
+        async def inner(connection: aiomysql.Connection, *args: Any) -> Any:
+            """
+            Return cached result of the db function (or execute db function and cache result).
+
+            :param connection: db connection
+            :type connection: aiomysql.Connection
+            :param args: other arguments that were passed to db function
+            :type args: Any
+
+            :return: db function result
+            :rtype: Any
+            """
+
+            result = get_cached(*args)
+            if result is MISSING:
+                result = await load(connection, *args)
+
+            return result
+
+        # callers that acquire connection only on miss: `get_cached(*args)`, then `load(connection, *args)`
+        inner.get_cached = get_cached
+        inner.load = load
+
+        return inner
+
+    return decorator
+
+
+def cache_missing_records(cache: LRUCache, not_found_error: Type[Exception]) -> Callable:
+    """
+    Cache absence of the record that db function fetches (key - arguments after connection).
+
+    Known missing record is answered by error without db query.
+    Entries must be purged on the record insertion (and expire by cache TTL).
+
+    :param cache: cache that stores keys of the missing records
+    :type cache: LRUCache
+    :param not_found_error: error that db function raises if record is not found
+    :type not_found_error: Type[Exception]
+
+    :return: decorator
+    :rtype: Callable
+    """
+
+    def decorator(db_function: Callable) -> Callable:
+        @wraps(db_function)
+        async def inner(connection: aiomysql.Connection, *args: Any) -> Any:
+            """
+            Raise error if record is known as missing (or execute db function and remember missing record).
+
+            :param connection: db connection
+            :type connection: aiomysql.Connection
+            :param args: other arguments that were passed to db function
+            :type args: Any
+
+            :return: db function result
+            :rtype: Any
+
+            :raises not_found_error: raised if record is not found
+            """
+
+            key = args
+
+            if cache.get(key) is not MISSING:
+                raise not_found_error
+
+            version = cache.version
+            try:
+                with single_flight.bind_versions((cache.name, version)):
+                    return await db_function(connection, *args)
+            except not_found_error:
+                cache.set(key, True, version=version)
+                raise
+
+        return inner
+
+    return decorator
@@ -0,0 +1,316 @@
+"""
+Contains Redis cache of the rendered pages for anonymous visitors (requests without session cookie).
+
+For the visitor public pages are the same on every hit, so rendered bytes are served from Redis
+(without db queries and template rendering).
+Pages are tagged by the data that they show (views tag pages by `tag_page`),
+db write functions invalidate tags -> pages with invalidated tags are purged.
+
+Tags of the page are kept with the page - cached page is tagged too (tags are surrogate keys for shared HTTP caches).
+
+Page that raced invalidation is not saved: the worker notes generation of the invalidations that it had applied
+before rendering (check `invalidation`), page is saved only if shared generation is still the same
+(it is compared in Redis atomically with the write). So, page that was rendered from data read before invalidation
+or from local caches of the worker that has not applied invalidation yet is dropped.
+Tag `*` purges all pages.
+
+Redis layout:
+    `page_cache:page:<page key>`    - rendered page (bytes)
+    `page_cache:tags:<page key>`    - tags of the page (separated by spaces)
+    `page_cache:tag:<tag>`          - set of the page keys that are tagged by tag
+
+.. class:: PageCache
+    Implements Redis storage of the rendered pages
+
+.. decorator:: cache_anonymous_page(handler: Callable) -> Callable
+    Serve (or cache) rendered page for anonymous visitors
+
+.. function:: is_anonymous_request(request: aiohttp.web.Request) -> bool
+    Return status of the request absence of the session cookie
+.. function:: build_page_key(request: aiohttp.web.Request) -> str
+    Return page key by route and normalized query string
+.. function:: tag_page(request: aiohttp.web.Request, *tags: str) -> None
+    Tag page of the request
+.. function:: get_page_tags(request: aiohttp.web.Request) -> set[str]
+    Return tags of the page of the request
+.. function:: init_page_cache(app: aiohttp.web.Application) -> None
+    Create and set in app settings page cache
+.. function:: close_page_cache(app: aiohttp.web.Application) -> None
+    Unregister page cache invalidation
+
+.. const:: PAGE_TAGS_KEY
+    Key of the request storage for page tags
+"""
+
+from functools import wraps
+import logging
+import urllib.parse
+from typing import (
+    Callable,
+    Optional,
+    Union
+)
+
+import aiohttp.web
+import aiohttp_session
+import aioredis
+
+from ..database import invalidation
+from ..database.invalidation_bus import GENERATION_KEY
+from ..settings import PAGE_CACHE_TTL
+from ..views import utils
+
+
+logger = logging.getLogger(__name__)
+
+
+PAGE_TAGS_KEY = 'page_cache_tags'
+
+# script of the page write - page is saved only if shared generation was not changed since rendering start
+# KEYS: generation key, page key, page tags key, tag keys; ARGV: generation, page, tags of the page, TTL, page key
+_SAVE_SCRIPT = """
+if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[4])
+redis.call('SET', KEYS[3], ARGV[3], 'EX', ARGV[4])
+for i = 4, #KEYS do
+    redis.call('SADD', KEYS[i], ARGV[5])
+    redis.call('EXPIRE', KEYS[i], ARGV[4])
+end
+return 1
+"""
+
+
+class PageCache:
+    """ Implements Redis storage of the rendered pages """
+
+    page_key_prefix = 'page_cache:page:'
+    page_tags_key_prefix = 'page_cache:tags:'
+    tag_key_prefix = 'page_cache:tag:'
+
+    def __init__(self, redis: aioredis.Redis, ttl: int = PAGE_CACHE_TTL) -> None:
+        self.redis = redis
+        self.ttl = ttl
+
+    async def get(self, page_key: str) -> tuple[Optional[bytes], set[str]]:
+        """
+        Return rendered page and its tags.
+
+        :param page_key: page key
+        :type page_key: str
+
+        :return: rendered page (None - if page is not cached) and tags
+        :rtype: tuple[Optional[bytes], set[str]]
+        """
+
+        body, tags = await self.redis.mget(self.page_key_prefix + page_key, self.page_tags_key_prefix + page_key)
+
+        return body, set(tags.decode().split()) if tags else set()
+
+    async def save(self, page_key: str, body: bytes, tags: set[str], generation: int) -> bool:
+        """
+        Save rendered page and link page with tags if shared generation is still the generation of the rendering start.
+
+        :param page_key: page key
+        :type page_key: str
+        :param body: rendered page
+        :type body: bytes
+        :param tags: tags of the page
+        :type tags: set[str]
+        :param generation: generation of the invalidations that the worker had applied when rendering started
+        :type generation: int
+
+        :return: status of the saving (False - page raced invalidation)
+        :rtype: bool
+        """
+
+        saved = await self.redis.eval(
+            _SAVE_SCRIPT,
+            keys=[
+                GENERATION_KEY, self.page_key_prefix + page_key, self.page_tags_key_prefix + page_key,
+                *(self.tag_key_prefix + tag for tag in tags)
+            ],
+            args=[str(generation), body, ' '.join(sorted(tags)), self.ttl, page_key]
+        )
+
+        return bool(saved)
+
+    async def purge_tags(self, tags: set[str]) -> None:
+        """
+        Purge all pages that are tagged by tags (used as invalidation handler).
+
+        :param tags: invalidated tags
+        :type tags: set[str]
+
+        :return: None
+        :rtype: None
+        """
+
+        if invalidation.ALL in tags:
+            keys = [key async for key in self.redis.iscan(match='page_cache:*')]
+            for start in range(0, len(keys), 1000):
+                await self.redis.delete(*keys[start:start + 1000])
+            return
+
+        for tag in tags:
+            tag_key = self.tag_key_prefix + tag
+            page_keys = await self.redis.smembers(tag_key, encoding='utf-8')
+
+            await self.redis.delete(
+                tag_key,
+                *[self.page_key_prefix + page_key for page_key in page_keys],
+                *[self.page_tags_key_prefix + page_key for page_key in page_keys]
+            )
+
+
+def is_anonymous_request(request: aiohttp.web.Request) -> bool:
+    """
+    Return status of the request absence of the session cookie.
+
+    :param request: request
+    :type request: aiohttp.web.Request
+
+    :return: status (True - request without session cookie)
+    :rtype: bool
+    """
+
+    session_storage = request.get(aiohttp_session.STORAGE_KEY)
+    if session_storage is None:
+        return False
+
+    return session_storage.cookie_name not in request.cookies
+
+
+def build_page_key(request: aiohttp.web.Request) -> str:
+    """
+    Return page key by route and normalized query string (sorted params, empty params are dropped).
+
+    :param request: request
+    :type request: aiohttp.web.Request
+
+    :return: page key
+    :rtype: str
+    """
+
+    route_name = request.match_info.route.name
+    match_info = urllib.parse.urlencode(sorted(request.match_info.items()))
+    query = urllib.parse.urlencode(sorted((key, value) for key, value in request.rel_url.query.items() if value))
+
+    return f'{route_name}|{match_info}|{query}'
+
+
+def tag_page(request: aiohttp.web.Request, *tags: str) -> None:
+    """
+    Tag page of the request (page will be purged if any tag will be invalidated).
+
+    :param request: request
+    :type request: aiohttp.web.Request
+    :param tags: tags of the data that page shows
+    :type tags: str
+
+    :return: None
+    :rtype: None
+    """
+
+    request.setdefault(PAGE_TAGS_KEY, set()).update(tags)
+
+
+def get_page_tags(request: aiohttp.web.Request) -> set[str]:
+    """
+    Return tags of the page of the request.
+
+    :param request: request
+    :type request: aiohttp.web.Request
+
+    :return: tags of the data that page shows
+    :rtype: set[str]
+    """
+
+    return request.get(PAGE_TAGS_KEY, set())
+
+
+def cache_anonymous_page(handler: Callable) -> Callable:
+    """
+    Serve rendered page from cache for anonymous visitors (or cache page after rendering).
+
+    Decorator must envelop handler that return rendered response (above `aiohttp_jinja2.template`).
+
+    :param handler: view function
+    :type handler: Callable
+
+    :return: inner function
+    :rtype: Callable
+    """
+
+    @wraps(handler)
+    @utils.view_decorator
+    async def inner(handler_argument: Union[aiohttp.web.View, aiohttp.web.Request], request: aiohttp.web.Request
+                    ) -> aiohttp.web.StreamResponse:
+        """
+        Return cached page or render page and cache it.
+
+        :param handler_argument: argument that will be passed in view handler
+        :type handler_argument: Union[aiohttp.web.View, aiohttp.web.Request]
+        :param request: request
+        :type request: aiohttp.web.Request
+
+        :return: rendered page
+        :rtype: aiohttp.web.StreamResponse
+        """
+
+        page_cache: Optional[PageCache] = request.app.get('page_cache')
+
+        if page_cache is None or request.method != 'GET' or not is_anonymous_request(request):
+            return await handler(handler_argument)
+
+        page_key = build_page_key(request)
+
+        body, tags = await page_cache.get(page_key)
+        if body is not None:
+            tag_page(request, *tags)
+            return aiohttp.web.Response(body=body, content_type='text/html', charset='utf-8')
+
+        generation = invalidation.get_generation()
+        response = await handler(handler_argument)
+
+        if isinstance(response, aiohttp.web.Response) and response.status == 200 and response.body is not None:
+            if not await page_cache.save(page_key, response.body, get_page_tags(request), generation):
+                logger.debug(f'Page {page_key} raced invalidation - it is not cached')
+
+        return response
+
+    return inner
+
+
+async def init_page_cache(app: aiohttp.web.Application) -> None:
+    """
+    Create and set in app settings page cache (it is compulsory to init Redis pool before).
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    page_cache = PageCache(app['redis'])
+    invalidation.add_handler(page_cache.purge_tags)
+
+    app['page_cache'] = page_cache
+
+    logger.info('Page cache has been set!')
+
+
+async def close_page_cache(app: aiohttp.web.Application) -> None:
+    """
+    Unregister page cache invalidation.
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    invalidation.remove_handler(app['page_cache'].purge_tags)
@@ -0,0 +1,125 @@
+"""
+Contains versioned in-memory snapshot of the post rubrics (shared across workers by version in Redis).
+
+Post rubrics are shown by post forms and rubrics page on every hit, but they are changed rarely,
+so, every worker keeps snapshot of the rubrics list in memory.
+Post rubrics write functions invalidate `post_rubrics` tag -> version in Redis is bumped,
+workers compare version of the snapshot with version in Redis (one cheap Redis read)
+and reload snapshot from db only if version is changed.
+Tag `*` bumps version too - snapshots of all workers are reloaded.
+
+Redis layout:
+    `post_rubrics:version`  - version of the post rubrics list (counter)
+
+.. class:: PostRubricsSnapshot
+    Implements in-memory snapshot of the post rubrics
+
+.. function:: init_post_rubrics_snapshot(app: aiohttp.web.Application) -> None
+    Create and set in app settings post rubrics snapshot
+.. function:: close_post_rubrics_snapshot(app: aiohttp.web.Application) -> None
+    Unregister post rubrics snapshot invalidation
+"""
+
+import asyncio
+import logging
+from typing import (
+    Optional,
+    Union
+)
+
+import aiohttp.web
+import aiomysql
+import aioredis
+
+from ..database import (
+    db,
+    invalidation
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class PostRubricsSnapshot:
+    """ Implements in-memory snapshot of the post rubrics (reloaded when version in Redis is changed) """
+
+    version_key = 'post_rubrics:version'
+
+    def __init__(self, redis: aioredis.Redis, db_pool: aiomysql.Pool) -> None:
+        self.redis = redis
+        self.db_pool = db_pool
+
+        self._version: Optional[bytes] = None
+        self._rubrics: Optional[list[dict[str, Union[int, str]]]] = None
+        # only one reload of the snapshot at once
+        self._reload_lock = asyncio.Lock()
+
+    async def get(self) -> list[dict[str, Union[int, str]]]:
+        """
+        Return post rubrics (snapshot is reloaded from db if it is stale).
+
+        Version is read before db query -
+        so, snapshot that was loaded while rubrics were changing is reloaded on the next read.
+
+        :return: data of the post rubrics
+        :rtype: list[dict[str, Union[int, str]]]
+        """
+
+        version = await self.redis.get(self.version_key)
+
+        if self._rubrics is None or version != self._version:
+            async with self._reload_lock:
+                if self._rubrics is None or version != self._version:
+                    async with self.db_pool.acquire() as connection:
+                        rubrics = await db.fetch_all_post_rubrics(connection)
+
+                    self._version, self._rubrics = version, rubrics
+
+        return [dict(rubric) for rubric in self._rubrics]
+
+    async def bump_version(self, tags: set[str]) -> None:
+        """
+        Bump version of the post rubrics if list is changed or all data is invalidated (used as invalidation handler).
+
+        :param tags: invalidated tags
+        :type tags: set[str]
+
+        :return: None
+        :rtype: None
+        """
+
+        if invalidation.ALL in tags or invalidation.tag(invalidation.POST_RUBRICS) in tags:
+            await self.redis.incr(self.version_key)
+
+
+async def init_post_rubrics_snapshot(app: aiohttp.web.Application) -> None:
+    """
+    Create and set in app settings post rubrics snapshot (it is compulsory to init db and Redis pools before).
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    post_rubrics_snapshot = PostRubricsSnapshot(app['redis'], app['db'])
+    invalidation.add_handler(post_rubrics_snapshot.bump_version)
+
+    app['post_rubrics_snapshot'] = post_rubrics_snapshot
+
+    logger.info('Post rubrics snapshot has been set!')
+
+
+async def close_post_rubrics_snapshot(app: aiohttp.web.Application) -> None:
+    """
+    Unregister post rubrics snapshot invalidation.
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    invalidation.remove_handler(app['post_rubrics_snapshot'].bump_version)
@@ -0,0 +1,195 @@
+"""
+Contains in-process caches of the records that are fetched by id (posts and notes) and of the user note rubrics.
+
+Post (note) pages and owner checks fetch the same record on every hit,
+so, records are kept in the worker memory (bounded LRU with TTL).
+Write functions invalidate tags of the changed data - records are purged by tags (check `purge_records`)
+in every worker (tags are published for other workers by invalidation bus).
+
+Note rubrics of the user are fetched by every notes form - they are cached by user (write-through:
+write functions put fresh rubrics of the user in the cache after invalidation of the `note_rubrics:<user_id>` tag).
+
+Thinker page data (public user data and the latest posts of the user) is cached as one aggregate -
+it is purged by the tags of the user, of the user posts membership, of the shown posts and of their rubrics.
+
+Shards of the user notes (notes shards directory) are cached by user - notes requests do not read the directory
+in the main db, moving of the user notes invalidates the `notes_shard:<user_id>` tag.
+
+Ids of the missing posts and users are cached too (short TTL) - scans of the nonexistent pages do not hit db.
+Insert functions invalidate tag of the new record - so, missing id is purged when it becomes existing.
+
+.. function:: purge_records(tags: set[str]) -> None
+    Purge cached records by invalidated tags
+.. function:: get_stats() -> dict[str, dict[str, int]]
+    Return statistics of the records caches
+.. function:: init_records_cache(app: aiohttp.web.Application) -> None
+    Register records caches invalidation
+.. function:: close_records_cache(app: aiohttp.web.Application) -> None
+    Unregister records caches invalidation (and log statistics)
+
+.. const:: post_cache
+    Cache of the posts (key - (post_id,))
+.. const:: note_cache
+    Cache of the notes (key - (note_id,))
+.. const:: thinker_cache
+    Cache of the thinker pages data (key - (user_id,))
+.. const:: note_rubrics_cache
+    Cache of the note rubrics of the users (key - (user_id,))
+.. const:: shard_placement_cache
+    Cache of the shards of the user notes (key - (user_id, shards_quantity))
+.. const:: missing_post_cache
+    Cache of the missing posts ids (key - (post_id,))
+.. const:: missing_user_cache
+    Cache of the missing users ids (key - (user_id,))
+"""
+
+import logging
+
+import aiohttp.web
+
+from .lru import LRUCache
+from ..database import invalidation
+from ..settings import (
+    MISSING_RECORDS_CACHE_MAXSIZE,
+    MISSING_RECORDS_CACHE_TTL,
+    NOTE_RUBRICS_CACHE_MAXSIZE,
+    NOTE_RUBRICS_CACHE_TTL,
+    RECORDS_CACHE_MAXSIZE,
+    RECORDS_CACHE_TTL,
+    SHARD_PLACEMENT_CACHE_MAXSIZE,
+    SHARD_PLACEMENT_CACHE_TTL
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+post_cache = LRUCache('post', maxsize=RECORDS_CACHE_MAXSIZE, ttl=RECORDS_CACHE_TTL)
+# note ids are unique across notes shards - so, note id is enough for the key
+note_cache = LRUCache('note', maxsize=RECORDS_CACHE_MAXSIZE, ttl=RECORDS_CACHE_TTL)
+thinker_cache = LRUCache('thinker', maxsize=RECORDS_CACHE_MAXSIZE, ttl=RECORDS_CACHE_TTL)
+
+# the least recently active users are evicted
+note_rubrics_cache = LRUCache('note_rubrics', maxsize=NOTE_RUBRICS_CACHE_MAXSIZE, ttl=NOTE_RUBRICS_CACHE_TTL)
+shard_placement_cache = LRUCache(
+    'shard_placement', maxsize=SHARD_PLACEMENT_CACHE_MAXSIZE, ttl=SHARD_PLACEMENT_CACHE_TTL
+)
+
+missing_post_cache = LRUCache('missing_post', maxsize=MISSING_RECORDS_CACHE_MAXSIZE, ttl=MISSING_RECORDS_CACHE_TTL)
+missing_user_cache = LRUCache('missing_user', maxsize=MISSING_RECORDS_CACHE_MAXSIZE, ttl=MISSING_RECORDS_CACHE_TTL)
+
+_caches = (
+    post_cache, note_cache, thinker_cache, note_rubrics_cache, shard_placement_cache,
+    missing_post_cache, missing_user_cache
+)
+
+
+def _shows_post(thinker_page: dict, column: str, value: int) -> bool:
+    """
+    Return status of the thinker page that shows post with column value.
+
+    :param thinker_page: cached data of the thinker page
+    :type thinker_page: dict
+    :param column: post column
+    :type column: str
+    :param value: column value
+    :type value: int
+
+    :return: status (True - page shows the post)
+    :rtype: bool
+    """
+
+    return any(post[column] == value for post in thinker_page['posts'])
+
+
+async def purge_records(tags: set[str]) -> None:
+    """
+    Purge cached records by invalidated tags (used as invalidation handler).
+
+    Posts keep rubric title and author login, notes keep rubric title -
+    so, records are purged by the tags of the rubrics and users too.
+
+    :param tags: invalidated tags
+    :type tags: set[str]
+
+    :return: None
+    :rtype: None
+    """
+
+    if invalidation.ALL in tags:
+        for cache in _caches:
+            cache.clear()
+        return
+
+    for tag in tags:
+        kind, id_ = invalidation.parse_tag(tag)
+        if id_ is None:
+            continue
+
+        if kind == invalidation.POST:
+            post_cache.pop((id_,))
+            missing_post_cache.pop((id_,))
+            thinker_cache.pop_where(lambda _, thinker_page: _shows_post(thinker_page, 'id', id_))
+        elif kind == invalidation.POSTS_OF_USER:
+            thinker_cache.pop((id_,))
+        elif kind == invalidation.NOTE:
+            note_cache.pop((id_,))
+        elif kind == invalidation.POST_RUBRIC:
+            post_cache.pop_where(lambda _, post: post['rubric_id'] == id_)
+            thinker_cache.pop_where(lambda _, thinker_page: _shows_post(thinker_page, 'rubric_id', id_))
+        elif kind == invalidation.NOTE_RUBRIC:
+            note_cache.pop_where(lambda _, note: note['rubric_id'] == id_)
+        elif kind == invalidation.NOTE_RUBRICS:
+            note_rubrics_cache.pop((id_,))
+        elif kind == invalidation.NOTES_SHARD:
+            shard_placement_cache.pop_where(lambda key, _: key[0] == id_)
+        elif kind == invalidation.USER:
+            missing_user_cache.pop((id_,))
+            thinker_cache.pop((id_,))
+            note_rubrics_cache.pop((id_,))
+            post_cache.pop_where(lambda _, post: post['user_id'] == id_)
+            note_cache.pop_where(lambda _, note: note['user_id'] == id_)
+
+
+def get_stats() -> dict[str, dict[str, int]]:
+    """
+    Return statistics of the records caches (hits, misses, evictions).
+
+    :return: statistics by the cache name
+    :rtype: dict[str, dict[str, int]]
+    """
+
+    return {cache.name: cache.stats for cache in _caches}
+
+
+async def init_records_cache(app: aiohttp.web.Application) -> None:
+    """
+    Register records caches invalidation.
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    # records are cached in memory of every worker
+    invalidation.add_handler(purge_records, local=True)
+
+    logger.info('Records cache has been set!')
+
+
+async def close_records_cache(app: aiohttp.web.Application) -> None:
+    """
+    Unregister records caches invalidation (and log statistics).
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    invalidation.remove_handler(purge_records)
+
+    logger.info(f'Records cache statistics: {get_stats()}')
@@ -0,0 +1,296 @@
+"""
+Contains in-process cache of the search results (ids of the found posts) by normalized query.
+
+Popular searches run full text search (and sorting of the found posts) on every hit.
+So, ordered ids of the first `SEARCH_CACHE_RESULTS_LIMIT` found posts are kept in the worker memory,
+pages are served by slicing of the ids list and fetching of the posts by ids (one query by primary key).
+Pages after the cached ids are fetched by full text search as before.
+
+Keyword is normalized - full text search is case insensitive, ignores extra spaces and stop words
+(default InnoDB stop words), so, the same search has the same key. Normalized keyword is searched.
+Entries are dropped on the posts invalidation (and expire by TTL).
+
+Searched keywords are counted in Redis (sorted set) - popular queries are reported (and warmed up on startup).
+Searches are counted by view decorator above the page cache - searches that are served from the page cache are counted.
+
+Key: (normalized keyword, rubric_id, user_id)
+
+.. function:: normalize_keyword(keyword: str) -> str
+    Return normalized keyword
+.. function:: fetch_found_posts(connection: aiomysql.Connection, params: validators.PostUrlParams
+        ) -> list[dict[str, Union[int, str, datetime.datetime]]]
+    Fetch posts of the search page
+.. function:: fetch_found_post_ids(connection: aiomysql.Connection, keyword: str, rubric_id: Optional[int],
+        user_id: Optional[int]) -> list[int]
+    Fetch cached ids of the found posts
+.. function:: purge_search(tags: set[str]) -> None
+    Purge search results by invalidated tags
+.. function:: count_query(redis: aioredis.Redis, keyword: str) -> None
+    Count searched keyword
+.. decorator:: count_searches(handler: Callable) -> Callable
+    Count keyword of the served search page
+.. function:: fetch_popular_queries(redis: aioredis.Redis, limit: int = POPULAR_QUERIES_REPORT_LIMIT
+        ) -> list[tuple[str, int]]
+    Fetch the most popular keywords (report)
+.. function:: init_search_cache(app: aiohttp.web.Application) -> None
+    Register search cache invalidation
+.. function:: close_search_cache(app: aiohttp.web.Application) -> None
+    Unregister search cache invalidation (and log statistics)
+
+.. const:: STOP_WORDS
+    Words that full text search ignores
+.. const:: POPULAR_QUERIES_KEY
+    Redis key of the searched keywords counters
+.. const:: search_cache
+    Cache of the ids of the found posts
+"""
+
+import datetime
+from functools import wraps
+import logging
+import random
+from typing import (
+    Callable,
+    Optional,
+    Union
+)
+
+import aiohttp.web
+import aiomysql
+import aioredis
+
+from .lru import (
+    LRUCache,
+    MISSING
+)
+from ..database import (
+    db,
+    invalidation,
+    single_flight,
+    validators
+)
+from ..views import utils
+from ..settings import (
+    POPULAR_QUERIES_MAXSIZE,
+    POPULAR_QUERIES_REPORT_LIMIT,
+    SEARCH_CACHE_MAXSIZE,
+    SEARCH_CACHE_RESULTS_LIMIT,
+    SEARCH_CACHE_TTL
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# default stop words of InnoDB full text search
+STOP_WORDS = frozenset((
+    'a', 'about', 'an', 'are', 'as', 'at', 'be', 'by', 'com', 'de', 'en', 'for', 'from', 'how', 'i', 'in', 'is', 'it',
+    'la', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'what', 'when', 'where', 'who', 'will', 'with', 'und',
+    'www'
+))
+
+POPULAR_QUERIES_KEY = 'search:popular_queries'
+
+search_cache = LRUCache('search', maxsize=SEARCH_CACHE_MAXSIZE, ttl=SEARCH_CACHE_TTL)
+
+
+def normalize_keyword(keyword: str) -> str:
+    """
+    Return normalized keyword - lowercase words without stop words
+    (if keyword consists of stop words only - they are kept).
+
+    :param keyword: search word
+    :type keyword: str
+
+    :return: normalized keyword
+    :rtype: str
+    """
+
+    words = keyword.lower().split()
+    significant_words = [word for word in words if word not in STOP_WORDS]
+
+    return ' '.join(significant_words or words)
+
+
+async def fetch_found_post_ids(connection: aiomysql.Connection, keyword: str, rubric_id: Optional[int],
+                               user_id: Optional[int]) -> list[int]:
+    """
+    Fetch ids of the found posts (the first `SEARCH_CACHE_RESULTS_LIMIT` ids, cached).
+
+    :param connection: db connection
+    :type connection: aiomysql.Connection
+    :param keyword: normalized keyword
+    :type keyword: str
+    :param rubric_id: rubric id filter
+    :type rubric_id: Optional[int]
+    :param user_id: user id filter
+    :type user_id: Optional[int]
+
+    :return: ids of the found posts (the newest first)
+    :rtype: list[int]
+    """
+
+    key = (keyword, rubric_id or None, user_id or None)
+
+    post_ids = search_cache.get(key)
+    if post_ids is MISSING:
+        version = search_cache.version
+        # coalesced search that started before invalidation is not joined
+        with single_flight.bind_versions((search_cache.name, version)):
+            post_ids = await db.fetch_found_post_ids(connection, *key, SEARCH_CACHE_RESULTS_LIMIT)
+        search_cache.set(key, post_ids, version=version)
+
+    return post_ids
+
+
+async def fetch_found_posts(connection: aiomysql.Connection, params: validators.PostUrlParams
+                            ) -> list[dict[str, Union[int, str, datetime.datetime]]]:
+    """
+    Fetch posts of the search page (from cached ids - if page is within them).
+
+    :param connection: db connection
+    :type connection: aiomysql.Connection
+    :param params: validated url params (with keyword)
+    :type params: validators.PostUrlParams
+
+    :return: data of the posts
+    :rtype: list[dict[str, Union[int, str, datetime.datetime]]]
+    """
+
+    keyword = normalize_keyword(params.keyword)
+    post_ids = await fetch_found_post_ids(connection, keyword, params.rubric, params.thinker)
+
+    offset = (params.page - 1) * params.quantity
+    # ids list that is shorter than the limit contains all found posts
+    if offset + params.quantity <= len(post_ids) or len(post_ids) < SEARCH_CACHE_RESULTS_LIMIT:
+        return await db.fetch_posts_by_ids(connection, post_ids[offset:offset + params.quantity])
+
+    return await db.fetch_all_posts(connection, params.copy(update={'keyword': keyword}))
+
+
+async def purge_search(tags: set[str]) -> None:
+    """
+    Purge search results if posts are changed (used as invalidation handler).
+
+    :param tags: invalidated tags
+    :type tags: set[str]
+
+    :return: None
+    :rtype: None
+    """
+
+    if invalidation.ALL in tags or invalidation.tag(invalidation.POSTS) in tags:
+        search_cache.clear()
+
+
+async def count_query(redis: aioredis.Redis, keyword: str) -> None:
+    """
+    Count searched keyword (the least popular keywords are trimmed from time to time).
+
+    :param redis: Redis connections pool
+    :type redis: aioredis.Redis
+    :param keyword: search word
+    :type keyword: str
+
+    :return: None
+    :rtype: None
+    """
+
+    await redis.zincrby(POPULAR_QUERIES_KEY, 1, normalize_keyword(keyword))
+
+    # trimming is not needed on every search
+    if random.random() < 0.01:
+        await redis.zremrangebyrank(POPULAR_QUERIES_KEY, 0, -POPULAR_QUERIES_MAXSIZE - 1)
+
+
+def count_searches(handler: Callable) -> Callable:
+    """
+    Count keyword (url parameter `search_word`) of the successfully served page.
+
+    Decorator must envelop page cache (above `page_cache.cache_anonymous_page`) - so, cached pages are counted too.
+
+    :param handler: view function
+    :type handler: Callable
+
+    :return: inner function
+    :rtype: Callable
+    """
+
+    @wraps(handler)
+    @utils.view_decorator
+    async def inner(handler_argument: Union[aiohttp.web.View, aiohttp.web.Request], request: aiohttp.web.Request
+                    ) -> aiohttp.web.StreamResponse:
+        """
+        Return page and count its keyword.
+
+        :param handler_argument: argument that will be passed in view handler
+        :type handler_argument: Union[aiohttp.web.View, aiohttp.web.Request]
+        :param request: request
+        :type request: aiohttp.web.Request
+
+        :return: page
+        :rtype: aiohttp.web.StreamResponse
+        """
+
+        response = await handler(handler_argument)
+
+        keyword = request.rel_url.query.get('search_word')
+        # invalid params are not counted - they are rejected by validation (error page or redirect)
+        if keyword and getattr(response, 'status', None) == 200:
+            await count_query(request.app['redis'], keyword)
+
+        return response
+
+    return inner
+
+
+async def fetch_popular_queries(redis: aioredis.Redis, limit: int = POPULAR_QUERIES_REPORT_LIMIT
+                                ) -> list[tuple[str, int]]:
+    """
+    Fetch the most popular keywords (report of the searches).
+
+    :param redis: Redis connections pool
+    :type redis: aioredis.Redis
+    :param limit: quantity of the keywords
+    :type limit: int
+
+    :return: pairs (normalized keyword, searches quantity) - the most popular first
+    :rtype: list[tuple[str, int]]
+    """
+
+    queries = await redis.zrevrange(POPULAR_QUERIES_KEY, 0, limit - 1, withscores=True, encoding='utf-8')
+
+    return [(keyword, int(searches_quantity)) for keyword, searches_quantity in queries]
+
+
+async def init_search_cache(app: aiohttp.web.Application) -> None:
+    """
+    Register search cache invalidation.
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    # search results are cached in memory of every worker
+    invalidation.add_handler(purge_search, local=True)
+
+    logger.info('Search cache has been set!')
+
+
+async def close_search_cache(app: aiohttp.web.Application) -> None:
+    """
+    Unregister search cache invalidation (and log statistics).
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    invalidation.remove_handler(purge_search)
+
+    logger.info(f'Search cache statistics: {search_cache.stats}')
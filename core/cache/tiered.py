@@ -0,0 +1,489 @@
+"""
+Contains two-tier cache of the db reads: in-process L1 (bounded LRU) and shared Redis L2.
+
+Db read functions are cached by decorator (`cache_db_function`) - caching is not hand-written in views.
+Read goes L1 -> L2 -> db: L2 hit fills L1, db result fills both tiers.
+Every decorated function has own namespace (names are unique) with own TTL and hit/miss statistics.
+
+Key is derived from arguments after connection (validated params models are converted to dicts)
+- check `single_flight.freeze`. Entries are tagged (tags are derived from result and arguments),
+write functions invalidate tags -> tagged entries are purged:
+    - L1 - in every worker (local handler, tags are published for other workers by invalidation bus);
+    - L2 - once by worker that invalidated tags (shared handler).
+Value that raced invalidation is not shared: it is not saved in L2 if L1 of the worker was purged while value was
+loading or if shared generation of the invalidations (check `invalidation`) is not the generation that the worker
+had applied when load started (generation is compared in Redis atomically with the write).
+So, L2 never keeps value that was read before invalidation or from L1 of the worker that has not applied it yet.
+L1 of other worker that loaded value before it applied invalidation is stale until bus message is handled.
+Entries keep time of the computation - popular entries are recomputed before expiration in both tiers
+(probabilistic early expiration - check `lru`), without locks between workers.
+
+Values are serialized by pickle (compressed by zlib if serialized value is big).
+L2 errors do not break reads - value is fetched from db (errors are logged).
+
+Redis layout:
+    `tiered_cache:<namespace>:<key hash>`   - serialized entry (tags, value, computation time, expiration time)
+    `tiered_cache:tag:<tag>`                - set of the value keys that are tagged by tag
+
+Tag `*` purges all entries of both tiers (L2 keys are scanned by prefix).
+
+.. class:: TieredCache
+    Implements two-tier cache of the namespace
+
+.. decorator:: cache_db_function(namespace: str, ttl: int, tags: Optional[Callable[..., Iterable[str]]] = None,
+        l1_maxsize: int = TIERED_CACHE_L1_MAXSIZE, l1_ttl: int = TIERED_CACHE_L1_TTL) -> Callable
+    Cache result of the db function in both tiers
+
+.. function:: dumps(value: Any) -> bytes
+    Serialize value
+.. function:: loads(data: bytes) -> Any
+    Deserialize value
+.. function:: purge_local(tags: set[str]) -> None
+    Purge L1 entries by invalidated tags
+.. function:: purge_shared(tags: set[str]) -> None
+    Purge L2 entries by invalidated tags
+.. function:: get_stats() -> dict[str, dict[str, Union[int, float]]]
+    Return statistics of the namespaces
+.. function:: init_tiered_cache(app: aiohttp.web.Application) -> None
+    Set Redis of L2 and register invalidation
+.. function:: close_tiered_cache(app: aiohttp.web.Application) -> None
+    Unregister invalidation (and log statistics)
+"""
+
+from functools import wraps
+import hashlib
+import logging
+import pickle
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Iterable,
+    Optional,
+    Union
+)
+import zlib
+
+import aiohttp.web
+import aiomysql
+import aioredis
+
+from .lru import (
+    is_expired_early,
+    LRUCache,
+    MISSING
+)
+from ..database import invalidation
+from ..database.invalidation_bus import GENERATION_KEY
+from ..database.single_flight import freeze
+from ..settings import (
+    TIERED_CACHE_COMPRESSION_THRESHOLD,
+    TIERED_CACHE_L1_MAXSIZE,
+    TIERED_CACHE_L1_TTL
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# markers of the serialized value (first byte)
+_PLAIN = b'p'
+_COMPRESSED = b'z'
+
+KEY_PREFIX = 'tiered_cache:'
+TAG_KEY_PREFIX = 'tiered_cache:tag:'
+
+# script of the L2 write - entry is saved only if shared generation was not changed since load start
+# KEYS: generation key, entry key, tag keys; ARGV: generation, serialized entry, TTL
+_SAVE_SCRIPT = """
+if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+for i = 3, #KEYS do
+    redis.call('SADD', KEYS[i], KEYS[2])
+    redis.call('EXPIRE', KEYS[i], ARGV[3])
+end
+return 1
+"""
+
+# Redis of L2 (L2 is not used until it is set)
+_redis: Optional[aioredis.Redis] = None
+# namespace: cache
+_caches: dict[str, 'TieredCache'] = {}
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Serialize value (by pickle, compressed if it is bigger than threshold).
+
+    :param value: value
+    :type value: Any
+
+    :return: serialized value
+    :rtype: bytes
+    """
+
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    if len(data) > TIERED_CACHE_COMPRESSION_THRESHOLD:
+        return _COMPRESSED + zlib.compress(data)
+
+    return _PLAIN + data
+
+
+def loads(data: bytes) -> Any:
+    """
+    Deserialize value.
+
+    :param data: serialized value
+    :type data: bytes
+
+    :return: value
+    :rtype: Any
+    """
+
+    marker, data = data[:1], data[1:]
+    if marker == _COMPRESSED:
+        data = zlib.decompress(data)
+
+    return pickle.loads(data)
+
+
+class TieredCache:
+    """ Implements two-tier cache of the namespace (in-process L1 and shared Redis L2) """
+
+    def __init__(self, namespace: str, ttl: int, l1_maxsize: int = TIERED_CACHE_L1_MAXSIZE,
+                 l1_ttl: int = TIERED_CACHE_L1_TTL) -> None:
+        self.namespace = namespace
+        self.ttl = ttl
+        # L1 entry: (tags, value)
+        self.l1 = LRUCache(namespace, maxsize=l1_maxsize, ttl=min(l1_ttl, ttl))
+
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.l2_early_expirations = 0
+        self.l2_errors = 0
+        self.l2_rejected_writes = 0
+
+    def build_key(self, *args: Any, **kwargs: Any) -> str:
+        """
+        Return key of the value by arguments (the same in all workers).
+
+        :param args: arguments
+        :type args: Any
+        :param kwargs: keyword arguments
+        :type kwargs: Any
+
+        :return: key
+        :rtype: str
+        """
+
+        arguments_hash = hashlib.sha1(repr((freeze(args), freeze(kwargs))).encode()).hexdigest()
+
+        return f'{KEY_PREFIX}{self.namespace}:{arguments_hash}'
+
+    async def _get_l2(self, key: str) -> Any:
+        """
+        Return value from L2 (errors are logged).
+
+        :param key: key
+        :type key: str
+
+        :return: entry (tags, value, computation time, expiration time) or `MISSING`
+        :rtype: Any
+        """
+
+        if _redis is None:
+            return MISSING
+
+        try:
+            data = await _redis.get(key)
+            return MISSING if data is None else loads(data)
+        except Exception as error:
+            self.l2_errors += 1
+            logger.warning(f'Error raised while {self.namespace} L2 entry is read: {error}')
+            return MISSING
+
+    async def _set_l2(self, key: str, entry: tuple[frozenset[str], Any, float, float], generation: int) -> None:
+        """
+        Save value in L2 and link key with tags if shared generation is still the generation of the load start
+        (errors are logged).
+
+        :param key: key
+        :type key: str
+        :param entry: tags, value, computation time and expiration time (unix time)
+        :type entry: tuple[frozenset[str], Any, float, float]
+        :param generation: generation of the invalidations that the worker had applied when load started
+        :type generation: int
+
+        :return: None
+        :rtype: None
+        """
+
+        if _redis is None:
+            return
+
+        try:
+            saved = await _redis.eval(
+                _SAVE_SCRIPT,
+                keys=[GENERATION_KEY, key, *(TAG_KEY_PREFIX + tag for tag in entry[0])],
+                args=[str(generation), dumps(entry), self.ttl]
+            )
+        except Exception as error:
+            self.l2_errors += 1
+            logger.warning(f'Error raised while {self.namespace} L2 entry is saved: {error}')
+            return
+
+        if not saved:
+            self.l2_rejected_writes += 1
+
+    async def get_or_load(self, key: str, load: Callable[[], Awaitable[Any]],
+                          get_tags: Callable[[Any], Iterable[str]]) -> Any:
+        """
+        Return cached value (L1 -> L2) or load value and cache it in both tiers.
+
+        :param key: key
+        :type key: str
+        :param load: async function without arguments that loads value
+        :type load: Callable[[], Awaitable[Any]]
+        :param get_tags: function that gets loaded value and returns its tags
+        :type get_tags: Callable[[Any], Iterable[str]]
+
+        :return: value
+        :rtype: Any
+        """
+
+        entry = self.l1.get(key)
+        if entry is not MISSING:
+            self.l1_hits += 1
+            return entry[1]
+
+        version = self.l1.version
+        generation = invalidation.get_generation()
+
+        l2_entry = await self._get_l2(key)
+        if l2_entry is not MISSING:
+            tags, value, compute_time, expiration_time = l2_entry
+
+            # entry is kept for other readers - this reader recomputes it
+            if is_expired_early(expiration_time, compute_time, time.time()):
+                self.l2_early_expirations += 1
+            else:
+                self.l2_hits += 1
+                self.l1.set(key, (tags, value), version=version, compute_time=compute_time)
+                return value
+
+        self.misses += 1
+
+        start_time = time.monotonic()
+        value = await load()
+        compute_time = time.monotonic() - start_time
+        tags = frozenset(get_tags(value))
+
+        self.l1.set(key, (tags, value), version=version, compute_time=compute_time)
+        # value that raced invalidation of the worker is not shared
+        if self.l1.version == version:
+            await self._set_l2(key, (tags, value, compute_time, time.time() + self.ttl), generation)
+        else:
+            self.l2_rejected_writes += 1
+
+        return value
+
+    def purge_l1(self, tags: set[str]) -> None:
+        """
+        Purge L1 entries that are tagged by any tag.
+
+        :param tags: invalidated tags
+        :type tags: set[str]
+
+        :return: None
+        :rtype: None
+        """
+
+        if invalidation.ALL in tags:
+            self.l1.clear()
+        else:
+            self.l1.pop_where(lambda _, entry: not tags.isdisjoint(entry[0]))
+
+    @property
+    def stats(self) -> dict[str, Union[int, float]]:
+        """
+        Return statistics of the namespace.
+
+        :return: statistics
+        :rtype: dict[str, Union[int, float]]
+        """
+
+        reads_quantity = self.l1_hits + self.l2_hits + self.misses
+
+        stats = {
+            'l1_size': len(self.l1),
+            'l1_hits': self.l1_hits,
+            'l2_hits': self.l2_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.l1_hits + self.l2_hits) / reads_quantity, 3) if reads_quantity else 0.0,
+            'l1_evictions': self.l1.evictions,
+            'early_expirations': self.l1.early_expirations + self.l2_early_expirations,
+            'l2_rejected_writes': self.l2_rejected_writes,
+            'l2_errors': self.l2_errors
+        }
+
+        return stats
+
+
+def cache_db_function(namespace: str, ttl: int, tags: Optional[Callable[..., Iterable[str]]] = None,
+                      l1_maxsize: int = TIERED_CACHE_L1_MAXSIZE, l1_ttl: int = TIERED_CACHE_L1_TTL) -> Callable:
+    """
+    Cache result of the db function in both tiers (key - arguments after connection).
+
+    Results are shared between callers of the worker - so, callers must not change them.
+    Errors (e.g. `RecordNotFoundError`) are not cached.
+
+    :param namespace: unique name of the cache
+    :type namespace: str
+    :param ttl: TTL of the L2 entries (seconds)
+    :type ttl: int
+    :param tags: function that gets result and arguments (after connection) and returns tags of the result
+    :type tags: Optional[Callable[..., Iterable[str]]]
+    :param l1_maxsize: max quantity of the L1 entries
+    :type l1_maxsize: int
+    :param l1_ttl: TTL of the L1 entries (seconds, it is not longer than `ttl`)
+    :type l1_ttl: int
+
+    :return: decorator
+    :rtype: Callable
+
+    :raises ValueError: raised if namespace is already used
+    """
+
+    if namespace in _caches:
+        raise ValueError(f'Namespace {namespace} of the tiered cache is already used')
+
+    cache = TieredCache(namespace, ttl, l1_maxsize, l1_ttl)
+    _caches[namespace] = cache
+
+    def decorator(db_function: Callable) -> Callable:
+        @wraps(db_function)
+        async def inner(connection: aiomysql.Connection, *args: Any, **kwargs: Any) -> Any:
+            """
+            Return cached result of the db function (or execute db function and cache result).
+
+            :param connection: db connection
+            :type connection: aiomysql.Connection
+            :param args: other arguments that were passed to db function
+            :type args: Any
+            :param kwargs: keyword arguments that were passed to db function
+            :type kwargs: Any
+
+            :return: db function result
+            :rtype: Any
+            """
+
+            return await cache.get_or_load(
+                cache.build_key(*args, **kwargs),
+                lambda: db_function(connection, *args, **kwargs),
+                lambda result: tags(result, *args, **kwargs) if tags is not None else ()
+            )
+
+        inner.cache = cache
+
+        return inner
+
+    return decorator
+
+
+async def purge_local(tags: set[str]) -> None:
+    """
+    Purge L1 entries of all namespaces by invalidated tags (used as local invalidation handler).
+
+    :param tags: invalidated tags
+    :type tags: set[str]
+
+    :return: None
+    :rtype: None
+    """
+
+    for cache in _caches.values():
+        cache.purge_l1(tags)
+
+
+async def purge_shared(tags: set[str]) -> None:
+    """
+    Purge L2 entries by invalidated tags (used as shared invalidation handler).
+
+    :param tags: invalidated tags
+    :type tags: set[str]
+
+    :return: None
+    :rtype: None
+    """
+
+    if _redis is None:
+        return
+
+    if invalidation.ALL in tags:
+        keys = [key async for key in _redis.iscan(match=KEY_PREFIX + '*')]
+        for start in range(0, len(keys), 1000):
+            await _redis.delete(*keys[start:start + 1000])
+        return
+
+    for tag in tags:
+        tag_key = TAG_KEY_PREFIX + tag
+        keys = await _redis.smembers(tag_key, encoding='utf-8')
+
+        await _redis.delete(tag_key, *keys)
+
+
+def get_stats() -> dict[str, dict[str, Union[int, float]]]:
+    """
+    Return statistics of the namespaces (hits by tiers, misses, hit rate).
+
+    :return: statistics by the namespace
+    :rtype: dict[str, dict[str, Union[int, float]]]
+    """
+
+    return {namespace: cache.stats for namespace, cache in _caches.items()}
+
+
+async def init_tiered_cache(app: aiohttp.web.Application) -> None:
+    """
+    Set Redis of L2 and register invalidation (it is compulsory to init Redis pool before).
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    global _redis
+    _redis = app['redis']
+
+    # L1 is in memory of every worker, L2 is shared
+    invalidation.add_handler(purge_local, local=True)
+    invalidation.add_handler(purge_shared)
+
+    logger.info(f'Tiered cache has been set! Namespaces: {", ".join(_caches)}')
+
+
+async def close_tiered_cache(app: aiohttp.web.Application) -> None:
+    """
+    Unregister invalidation, unset Redis of L2 (and log statistics).
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    global _redis
+
+    invalidation.remove_handler(purge_local)
+    invalidation.remove_handler(purge_shared)
+    _redis = None
+
+    logger.info(f'Tiered cache statistics: {get_stats()}')
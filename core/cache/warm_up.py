@@ -0,0 +1,155 @@
+"""
+Contains warm-up of the caches before the worker accepts traffic (on app startup - after all caches are set).
+
+New worker starts with cold caches - so, the first traffic lands on db with no cache in front.
+Warm-up preloads post rubrics snapshot, hot posts pages, the newest posts, results of the most popular searches
+and compiles templates.
+Posts pages after the first one have no cache tier - they are fetched to warm db buffers.
+Warm-up is limited by time budget and must not break startup (errors are logged).
+
+.. function:: warm_up_caches(app: aiohttp.web.Application) -> None
+    Warm up caches (limited by time budget)
+"""
+
+import asyncio
+import logging
+import time
+
+import aiohttp.web
+import aiohttp_jinja2
+
+from . import (
+    hot_pages,
+    search
+)
+from ..database import (
+    db,
+    validators
+)
+from ..settings import (
+    WARM_UP_POSTS_PAGES,
+    WARM_UP_SEARCHES,
+    WARM_UP_TIME_BUDGET
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_up_templates(app: aiohttp.web.Application) -> int:
+    """
+    Compile all templates (compiled templates are cached by Jinja environment).
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: quantity of the compiled templates
+    :rtype: int
+    """
+
+    environment = aiohttp_jinja2.get_env(app)
+
+    template_names = environment.list_templates()
+    for template_name in template_names:
+        environment.get_template(template_name)
+
+    return len(template_names)
+
+
+async def _warm_up_posts(app: aiohttp.web.Application) -> int:
+    """
+    Preload hot posts pages (the first page of the feed and rubrics), the next feed pages and the newest posts.
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: quantity of the preloaded posts
+    :rtype: int
+    """
+
+    post_rubrics = await app['post_rubrics_snapshot'].get()
+
+    # first pages of the feed and rubrics are hot pages
+    newest_posts = []
+    for rubric_id in [None] + [post_rubric['id'] for post_rubric in post_rubrics]:
+        params = validators.PostUrlParams(rubric=rubric_id)
+        posts, _ = await app['hot_pages_cache'].get(
+            rubric_id, lambda params=params: hot_pages.fetch_posts_page(app, params)
+        )
+
+        if rubric_id is None:
+            newest_posts = posts
+
+    async with app['db'].acquire() as connection:
+        for page_number in range(2, WARM_UP_POSTS_PAGES + 1):
+            await db.fetch_all_posts(connection, validators.PostUrlParams(page=page_number))
+
+        # the newest posts are the most visited posts
+        for post in newest_posts:
+            await db.fetch_one_post(connection, post['id'])
+
+    return len(newest_posts)
+
+
+async def _warm_up_searches(app: aiohttp.web.Application) -> int:
+    """
+    Preload results of the most popular searches (over all posts).
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: quantity of the preloaded searches
+    :rtype: int
+    """
+
+    popular_queries = await search.fetch_popular_queries(app['redis'], WARM_UP_SEARCHES)
+
+    async with app['db'].acquire() as connection:
+        for keyword, _ in popular_queries:
+            await search.fetch_found_post_ids(connection, keyword, None, None)
+
+    return len(popular_queries)
+
+
+async def _warm_up(app: aiohttp.web.Application) -> None:
+    """
+    Warm up caches step by step (from the cheapest step).
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    templates_quantity = _warm_up_templates(app)
+    logger.info(f'Warm-up: {templates_quantity} templates have been compiled')
+
+    posts_quantity = await _warm_up_posts(app)
+    logger.info(f'Warm-up: post rubrics, hot posts pages and {posts_quantity} newest posts have been cached')
+
+    searches_quantity = await _warm_up_searches(app)
+    logger.info(f'Warm-up: results of {searches_quantity} popular searches have been cached')
+
+
+async def warm_up_caches(app: aiohttp.web.Application) -> None:
+    """
+    Warm up caches (limited by time budget - the rest caches stay cold).
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    start_time = time.monotonic()
+
+    try:
+        await asyncio.wait_for(_warm_up(app), timeout=WARM_UP_TIME_BUDGET)
+    except asyncio.TimeoutError:
+        logger.warning(f'Warm-up has been stopped by time budget ({WARM_UP_TIME_BUDGET} s)')
+    except Exception as error:
+        logger.exception(msg=f'Error raised while caches are warming up: {error}', exc_info=error)
+    else:
+        logger.info(f'Caches have been warmed up in {time.monotonic() - start_time:.2f} s!')
@@ -4,15 +4,21 @@ Contains functions that execute operations with db.
 .. exception:: RecordNotFoundError(Exception)
     Raised when record in the DB is not found
 
+.. class:: PagesQuantity(NamedTuple)
+    Quantity of the possible pages (and flag of approximation)
+
 .. decorator:: check_record_in_db(db_function: Callable) -> Callable
 
-.. function:: execute_query(connection: aiomysql.Connection, query: str, params: dict) -> None:
+.. function:: execute_query(connection: aiomysql.Connection, query: str, params: dict) -> int:
     Shortcut function for operations except that fetch some info
+.. function:: execute_queries_in_transaction(connection: aiomysql.Connection, queries: list[tuple[str, dict]]
+        ) -> None:
+    Shortcut function for few operations that must be applied together
 .. function:: fetch_posts_possible_pages_quantity(connection: aiomysql.Connection, params: validators.PostUrlParams,
-        *args: Any, user_id: Optional[int] = None) -> int:
+        *args: Any, user_id: Optional[int] = None) -> PagesQuantity:
     CRUD function
 .. function:: fetch_notes_possible_pages_quantity(connection: aiomysql.Connection, params: validators.NoteUrlParams,
-        user_id: int ) -> int:
+        user_id: int ) -> PagesQuantity:
     CRUD function
 .. function:: fetch_all_post_rubrics(connection: aiomysql.Connection) -> list[dict[str, Union[int, str]]]:
     CRUD function
@@ -21,6 +27,12 @@ Contains functions that execute operations with db.
 .. function:: fetch_all_posts(connection: aiomysql.Connection, params: validators.PostUrlParams, *args: Any,
         user_id: Optional[int] = None) -> list[dict[str, Union[int, str, datetime.datetime]]]:
     CRUD function
+.. function:: fetch_found_post_ids(connection: aiomysql.Connection, search_word: str, rubric_id: Optional[int],
+        user_id: Optional[int], limit: int) -> list[int]:
+    Fetch ids of the posts that are found by search word (the newest first)
+.. function:: fetch_posts_by_ids(connection: aiomysql.Connection, post_ids: list[int]
+        ) -> list[dict[str, Union[int, str, datetime.datetime]]]:
+    Fetch posts (as in the list) by ids
 .. function:: fetch_one_post(connection: aiomysql.Connection, post_id: int
         ) -> dict[str, Union[int, str, datetime.datetime]]:
     CRUD function
@@ -39,6 +51,9 @@ Contains functions that execute operations with db.
 .. function:: fetch_one_user(connection: aiomysql.Connection, *args, user_id: Optional[int] = None,
         login: Optional[str] = None, password: Optional[str] = None) -> dict[str, Union[int, str]]:
     CRUD function
+.. function:: fetch_thinker_page(connection: aiomysql.Connection, user_id: int
+        ) -> dict[str, Union[dict, list[dict]]]:
+    Fetch data of the thinker page (public user data and the latest posts of the user)
 .. function:: fetch_all_moderators(connection: aiomysql.Connection) -> list[dict[str, Union[int, str]]]:
     CRUD function
 .. function:: insert_post_rubric(connection: aiomysql.Connection, post_rubric: validators.PostRubricCreation) -> None:
@@ -80,13 +95,22 @@ Contains functions that execute operations with db.
     CRUD function
 .. function:: delete_note(connection: aiomysql.Connection, note_id: int,) -> None:
     CRUD function
-.. function:: delete_user(connection: aiomysql.Connection, user_id: int) -> None:
+.. function:: delete_user(connection: aiomysql.Connection, notes_connection: aiomysql.Connection, user_id: int
+        ) -> None:
     CRUD function
 .. function:: add_user_in_moderators(connection: aiomysql.Connection, user_id: int) -> None:
     Set moderator grant for user
 .. function:: delete_user_from_moderators(connection: aiomysql.Connection, user_id: int) -> None:
     Unet moderator grant for user
 
+Write functions invalidate tags of the changed data (cached data is purged by tags) - check `invalidation`.
+Posts and notes fetched by id (and ids of the missing posts and users) are cached in the worker memory
+- check `cache.records`. Note rubrics of the user are cached too (write functions update them - write-through).
+Thinker page data (profile and the latest posts) is cached as one aggregate - check `cache.records`.
+Other cached reads are cached in two tiers (worker memory and Redis) by decorator - check `cache.tiered`.
+Identical concurrent reads of the posts (and pages quantity) are coalesced - check `single_flight`.
+Rows quantities (pagination totals) are cached by filters - check `cache.counts`.
+
 .. const:: jinja_sql
     Template engine for sql on Jinja basis
 """
@@ -94,9 +118,11 @@ Contains functions that execute operations with db.
 import datetime
 import pathlib
 from functools import wraps
+import time
 from typing import (
     Any,
     Callable,
+    NamedTuple,
     Optional,
     Union
 )
@@ -105,7 +131,23 @@ import aiomysql
 import math
 from jinjasql import JinjaSql
 
-from . import validators
+from . import (
+    invalidation,
+    single_flight,
+    validators
+)
+from ..cache import (
+    counts,
+    lru,
+    records,
+    tiered
+)
+from ..settings import (
+    APPROXIMATE_COUNT_THRESHOLD,
+    MODERATORS_CACHE_TTL,
+    POST_RUBRIC_CACHE_TTL,
+    THINKER_PAGE_POSTS_QUANTITY
+)
 
 # template engine for sql on Jinja basis
 jinja_sql = JinjaSql(param_style='pyformat')
@@ -115,6 +157,12 @@ class RecordNotFoundError(Exception):
     """ Raised when record in the DB is not found """
 
 
+class PagesQuantity(NamedTuple):
+    """ Quantity of the possible pages (approximate - if rows quantity is over the count threshold) """
+    quantity: int
+    is_approximate: bool = False
+
+
 def check_record_in_db(db_function: Callable) -> Callable:
     """
     Envelopes db function to raise `RecordNotFoundError` if result is empty.
@@ -160,7 +208,7 @@ def check_record_in_db(db_function: Callable) -> Callable:
 # ------------------------- HELP FUNCTIONS (SHORTCUT)
 
 
-async def execute_query(connection: aiomysql.Connection, query: str, params: dict) -> None:
+async def execute_query(connection: aiomysql.Connection, query: str, params: dict) -> int:
     """
     Execute query (might be used for insert, update, delete actions that do not fetch result - only execute).
 
@@ -171,26 +219,189 @@ async def execute_query(connection: aiomysql.Connection, query: str, params: dic
     :param params: query params
     :type params: dict
 
-    :return: None
-    :rtype: None
+    :return: id of the inserted row (for insert actions)
+    :rtype: int
     """
 
     async with connection.cursor() as cursor:
         await cursor.execute(query, params)
 
+        return cursor.lastrowid
+
+
+async def execute_queries_in_transaction(connection: aiomysql.Connection, queries: list[tuple[str, dict]]) -> None:
+    """
+    Execute queries in one transaction (might be used for update of the denormalized data with source data).
+
+    :param connection: db connection
+    :type connection: aiomysql.Connection
+    :param queries: pairs (sql query, query params)
+    :type queries: list[tuple[str, dict]]
+
+    :return: None
+    :rtype: None
+    """
+
+    await connection.begin()
+    try:
+        async with connection.cursor() as cursor:
+            for query, params in queries:
+                await cursor.execute(query, params)
+    except Exception:
+        await connection.rollback()
+        raise
+    else:
+        await connection.commit()
+
 
 # ------------------------- CRUD OPERATIONS
 
 
+async def _fetch_row_columns(connection: aiomysql.Connection, table_name: str, row_id: int, columns: tuple[str, ...]
+                             ) -> Optional[dict[str, Any]]:
+    """
+    Fetch columns of the row by id (used by write functions to know changed membership).
+
+    :param connection: db connection
+    :type connection: aiomysql.Connection
+    :param table_name: table name
+    :type table_name: str
+    :param row_id: row id
+    :type row_id: int
+    :param columns: column names
+    :type columns: tuple[str, ...]
+
+    :return: columns values (None - if row is not found)
+    :rtype: Optional[dict[str, Any]]
+    """
+
+    query = 'SELECT {columns} FROM `{table_name}` WHERE `id` = %(row_id)s;'.format(
+        columns=', '.join(f'`{column}`' for column in columns), table_name=table_name
+    )
+    params = {
+        'row_id': row_id
+    }
+
+    async with connection.cursor(aiomysql.cursors.DictCursor) as cursor:
+        await cursor.execute(query, params)
+        row = await cursor.fetchone()
+
+    return row
+
+
+def _get_posts_count_tags(*args: Any, rubric_ids: tuple[Optional[int], ...] = (),
+                          user_ids: tuple[Optional[int], ...] = ()) -> list[str]:
+    """
+    Return tags of the changed posts membership (ids that are None are skipped).
+
+    :keyword rubric_ids: ids of the rubrics with changed membership (empty - any rubric)
+    :type rubric_ids: tuple[Optional[int], ...]
+    :keyword user_ids: ids of the users with changed membership (empty - any user)
+    :type user_ids: tuple[Optional[int], ...]
+
+    :return: tags
+    :rtype: list[str]
+    """
+
+    tags = [invalidation.tag(invalidation.POSTS_COUNT)]
+    tags.extend(invalidation.tag(invalidation.POSTS_OF_RUBRIC, rubric_id) for rubric_id in rubric_ids if rubric_id)
+    tags.extend(invalidation.tag(invalidation.POSTS_OF_USER, user_id) for user_id in user_ids if user_id)
+
+    return tags
+
+
+async def _write_through_note_rubrics(connection: aiomysql.Connection, user_id: int) -> None:
+    """
+    Invalidate note rubrics of the user and put fresh note rubrics in the cache of this worker
+    (other workers fetch them on demand).
+
+    :param connection: db connection
+    :type connection: aiomysql.Connection
+    :param user_id: user id
+    :type user_id: int
+
+    :return: None
+    :rtype: None
+    """
+
+    await invalidation.invalidate(invalidation.tag(invalidation.NOTE_RUBRICS, user_id))
+
+    version = records.note_rubrics_cache.version
+    # original function - without cache
+    note_rubrics = await fetch_all_note_rubrics.__wrapped__(connection, user_id)
+    records.note_rubrics_cache.set((user_id,), note_rubrics, version=version)
+
+
 # # ------------------------- AGGREGATE QUERIES
 
+
+async def _fetch_bounded_rows_quantity(connection: aiomysql.Connection, query: str, bound_params: Union[dict, list],
+                                       *args: Any,
+                                       table_name_for_estimation: Optional[str] = None
+                                       ) -> tuple[int, bool]:
+    """
+    Fetch bounded quantity of the rows (query must count rows with `LIMIT APPROXIMATE_COUNT_THRESHOLD + 1`).
+
+    If quantity of the rows is bigger than threshold - quantity is approximate:
+        - estimation by table statistics (if `table_name_for_estimation` is passed - unfiltered rows);
+        - threshold itself (lower bound) otherwise.
+
+    :param connection: db connection
+    :type connection: aiomysql.Connection
+    :param query: prepared count query
+    :type query: str
+    :param bound_params: query params
+    :type bound_params: Union[dict, list]
+    :keyword table_name_for_estimation: table name that statistics might be used for estimation
+    :type table_name_for_estimation: Optional[str]
+
+    :return: pair (rows quantity, flag of approximation)
+    :rtype: tuple[int, bool]
+    """
+
+    async with connection.cursor() as cursor:
+        await cursor.execute(query, bound_params)
+        query_result = await cursor.fetchone()
+    rows_quantity = int(query_result[0])
+
+    if rows_quantity <= APPROXIMATE_COUNT_THRESHOLD:
+        return (rows_quantity, False)
+
+    if table_name_for_estimation:
+        estimation_query = """
+            SELECT
+                `TABLE_ROWS`
+            FROM
+                `information_schema`.`TABLES`
+            WHERE
+                `TABLE_SCHEMA` = DATABASE() AND `TABLE_NAME` = %(table_name)s
+            ;
+        """
+        estimation_params = {
+            'table_name': table_name_for_estimation
+        }
+
+        async with connection.cursor() as cursor:
+            await cursor.execute(estimation_query, estimation_params)
+            estimation_result = await cursor.fetchone()
+
+        if estimation_result and estimation_result[0]:
+            rows_quantity = max(rows_quantity, int(estimation_result[0]))
+
+    return (rows_quantity, True)
+
+
+@single_flight.coalesce
 async def fetch_posts_possible_pages_quantity(connection: aiomysql.Connection, params: validators.PostUrlParams,
                                               *args: Any,
                                               user_id: Optional[int] = None
-                                              ) -> int:
+                                              ) -> PagesQuantity:
     """
     Fetch quantity of the possible posts pages.
 
+    Posts are counted up to `APPROXIMATE_COUNT_THRESHOLD` (so, cost of the counting is bounded),
+    quantity of pages over threshold is approximate. Rows quantity is cached by filters.
+
     :param connection: db connection
     :type connection: aiomysql.Connection
     :param params: additional params
@@ -199,47 +410,65 @@ async def fetch_posts_possible_pages_quantity(connection: aiomysql.Connection, p
     :type user_id: int
 
     :return: possible quantity of pages
-    :rtype: int
+    :rtype: PagesQuantity
     """
 
     query_template = """
         SELECT
             COUNT(*)
-        FROM
-            `posts`
-        WHERE 
-            1 = 1
-            {% if rubric_id %}
-                AND `rubric_id` = {{ rubric_id }}
-            {% endif %}
-            {% if search_word %}
-                AND MATCH (`posts`.`title`, `posts`.`content`) AGAINST ({{ search_word }})
-            {% endif %}
-            {% if user_id %}
-                AND `posts`.`user_id` = {{ user_id }}
-            {% endif %}
+        FROM (
+            SELECT
+                1
+            FROM
+                `posts`
+            WHERE 
+                1 = 1
+                {% if rubric_id %}
+                    AND `rubric_id` = {{ rubric_id }}
+                {% endif %}
+                {% if search_word %}
+                    AND MATCH (`posts`.`title`, `posts`.`content`) AGAINST ({{ search_word }})
+                {% endif %}
+                {% if user_id %}
+                    AND `posts`.`user_id` = {{ user_id }}
+                {% endif %}
+            LIMIT {{ count_limit }}
+        ) AS `limited_posts`
         ;
     """
     params = params.dict(by_alias=True)
-    if 'user_id' not in params and user_id is not None:
+    if user_id:
         params['user_id'] = user_id
+    params['count_limit'] = APPROXIMATE_COUNT_THRESHOLD + 1
 
     query, bound_params = jinja_sql.prepare_query(query_template, params)
 
-    async with connection.cursor() as cursor:
-        await cursor.execute(query, bound_params)
-        query_result = await cursor.fetchone()
-    posts_quantity = int(query_result[0])
+    count_key = counts.build_posts_count_key(params['rubric_id'], params['user_id'], params['search_word'])
+    rows_quantity = counts.count_cache.get(count_key)
+    if rows_quantity is lru.MISSING:
+        version = counts.count_cache.version
+        is_filtered = any(params[key] for key in ('rubric_id', 'search_word', 'user_id'))
+        start_time = time.monotonic()
+        rows_quantity = await _fetch_bounded_rows_quantity(
+            connection, query, bound_params, table_name_for_estimation=None if is_filtered else 'posts'
+        )
+        counts.count_cache.set(count_key, rows_quantity, version=version, compute_time=time.monotonic() - start_time)
+
+    posts_quantity, is_approximate = rows_quantity
     possible_pages_quantity = math.ceil(posts_quantity / params['rows_quantity'])
 
-    return possible_pages_quantity
+    return PagesQuantity(possible_pages_quantity, is_approximate)
 
 
+@single_flight.coalesce
 async def fetch_notes_possible_pages_quantity(connection: aiomysql.Connection, params: validators.NoteUrlParams,
                                               user_id: int
-                                              ) -> int:
+                                              ) -> PagesQuantity:
     """
-    Fetch quantity of the possible posts pages.
+    Fetch quantity of the possible notes pages.
+
+    Notes are counted up to `APPROXIMATE_COUNT_THRESHOLD` (so, cost of the counting is bounded),
+    quantity of pages over threshold is approximate. Rows quantity is cached by filters.
 
     :param connection: db connection
     :type connection: aiomysql.Connection
@@ -249,36 +478,48 @@ async def fetch_notes_possible_pages_quantity(connection: aiomysql.Connection, p
     :type user_id: int
 
     :return: possible quantity pages
-    :rtype: int
+    :rtype: PagesQuantity
     """
 
     query_template = """
         SELECT 
             COUNT(*)
-        FROM
-            `notes`
-        WHERE
-            `notes`.`user_id` = {{ user_id }}
-            {% if rubric_id %}
-                AND `rubric_id` = {{ rubric_id }}
-            {% endif %}
-            {% if search_word %}
-                AND MATCH (`notes`.`content`) AGAINST ({{ search_word }})
-            {% endif %}
+        FROM (
+            SELECT
+                1
+            FROM
+                `notes`
+            WHERE
+                `notes`.`user_id` = {{ user_id }}
+                {% if rubric_id %}
+                    AND `rubric_id` = {{ rubric_id }}
+                {% endif %}
+                {% if search_word %}
+                    AND MATCH (`notes`.`content`) AGAINST ({{ search_word }})
+                {% endif %}
+            LIMIT {{ count_limit }}
+        ) AS `limited_notes`
         ; 
     """
     params = params.dict(by_alias=True)
     params['user_id'] = user_id
+    params['count_limit'] = APPROXIMATE_COUNT_THRESHOLD + 1
 
     query, bound_params = jinja_sql.prepare_query(query_template, params)
 
-    async with connection.cursor() as cursor:
-        await cursor.execute(query, bound_params)
-        query_result = await cursor.fetchone()
-    posts_quantity = int(query_result[0])
-    possible_pages_quantity = math.ceil(posts_quantity / params['rows_quantity'])
+    count_key = counts.build_notes_count_key(user_id, params['rubric_id'], params['search_word'])
+    rows_quantity = counts.count_cache.get(count_key)
+    if rows_quantity is lru.MISSING:
+        version = counts.count_cache.version
+        start_time = time.monotonic()
+        rows_quantity = await _fetch_bounded_rows_quantity(connection, query, bound_params)
+        counts.count_cache.set(count_key, rows_quantity, version=version, compute_time=time.monotonic() - start_time)
+
+    notes_quantity, is_approximate = rows_quantity
+    possible_pages_quantity = math.ceil(notes_quantity / params['rows_quantity'])
+
+    return PagesQuantity(possible_pages_quantity, is_approximate)
 
-    return possible_pages_quantity
 
 # # ------------------------- READ QUERIES
 
@@ -306,6 +547,10 @@ async def fetch_all_post_rubrics(connection: aiomysql.Connection) -> list[dict[s
     return post_rubrics
 
 
+@tiered.cache_db_function(
+    'post_rubric', POST_RUBRIC_CACHE_TTL,
+    tags=lambda post_rubric, post_rubric_id: [invalidation.tag(invalidation.POST_RUBRIC, post_rubric_id)]
+)
 @check_record_in_db
 async def fetch_one_post_rubric(connection: aiomysql.Connection, post_rubric_id: int) -> dict[str, Union[int, str]]:
     """
@@ -332,6 +577,7 @@ async def fetch_one_post_rubric(connection: aiomysql.Connection, post_rubric_id:
     return post_rubric
 
 
+@single_flight.coalesce
 async def fetch_all_posts(connection: aiomysql.Connection, params: validators.PostUrlParams,
                           *args: Any,
                           user_id: Optional[int] = None
@@ -359,14 +605,10 @@ async def fetch_all_posts(connection: aiomysql.Connection, params: validators.Po
             `posts`.`edited_date` AS `edited_date`,
             `posts`.`user_id` AS `user_id`,
             `posts`.`rubric_id` AS `rubric_id`,
-            `post_rubrics`.`title` AS `rubric`,
-            `users`.`login` AS `author`
+            `posts`.`rubric_title` AS `rubric`,
+            `posts`.`author_login` AS `author`
         FROM
             `posts`
-                LEFT JOIN
-            `post_rubrics` ON `posts`.`rubric_id` = `post_rubrics`.`id`
-                LEFT JOIN
-            `users` ON `posts`.`user_id` = `users`.`id`
         WHERE 
             1 = 1
             {% if rubric_id %}
@@ -396,6 +638,112 @@ async def fetch_all_posts(connection: aiomysql.Connection, params: validators.Po
     return posts
 
 
+@single_flight.coalesce
+async def fetch_found_post_ids(connection: aiomysql.Connection, search_word: str, rubric_id: Optional[int],
+                               user_id: Optional[int], limit: int) -> list[int]:
+    """
+    Fetch ids of the posts that are found by search word (in order of the posts list - the newest first).
+
+    :param connection: db connection
+    :type connection: aiomysql.Connection
+    :param search_word: search word
+    :type search_word: str
+    :param rubric_id: rubric id filter
+    :type rubric_id: Optional[int]
+    :param user_id: user id filter
+    :type user_id: Optional[int]
+    :param limit: max quantity of the ids
+    :type limit: int
+
+    :return: ids of the posts
+    :rtype: list[int]
+    """
+
+    query_template = """
+        SELECT
+            `posts`.`id` AS `id`
+        FROM
+            `posts`
+        WHERE
+            MATCH (`posts`.`title`, `posts`.`content`) AGAINST ({{ search_word }})
+            {% if rubric_id %}
+                AND `rubric_id` = {{ rubric_id }}
+            {% endif %}
+            {% if user_id %}
+                AND `posts`.`user_id` = {{ user_id }}
+            {% endif %}
+        ORDER BY `posts`.`created_date` DESC
+        LIMIT {{ limit }}
+        ;
+    """
+    params = {
+        'search_word': search_word,
+        'rubric_id': rubric_id,
+        'user_id': user_id,
+        'limit': limit
+    }
+
+    query, bound_params = jinja_sql.prepare_query(query_template, params)
+
+    async with connection.cursor() as cursor:
+        await cursor.execute(query, bound_params)
+        rows = await cursor.fetchall()
+
+    return [post_id for post_id, in rows]
+
+
+async def fetch_posts_by_ids(connection: aiomysql.Connection, post_ids: list[int]
+                             ) -> list[dict[str, Union[int, str, datetime.datetime]]]:
+    """
+    Fetch posts by ids (data as in the posts list, in order of the ids - deleted posts are skipped).
+
+    :param connection: db connection
+    :type connection: aiomysql.Connection
+    :param post_ids: ids of the posts
+    :type post_ids: list[int]
+
+    :return: data of the posts
+    :rtype: list[dict[str, Union[int, str, datetime.datetime]]]
+    """
+
+    if not post_ids:
+        return []
+
+    query_template = """
+        SELECT
+            `posts`.`id` AS `id`,
+            `posts`.`title` AS `title`,
+            LEFT(`posts`.`content`, 100) AS `content`,
+            `posts`.`created_date` AS `created_date`,
+            `posts`.`edited_date` AS `edited_date`,
+            `posts`.`user_id` AS `user_id`,
+            `posts`.`rubric_id` AS `rubric_id`,
+            `posts`.`rubric_title` AS `rubric`,
+            `posts`.`author_login` AS `author`
+        FROM
+            `posts`
+        WHERE
+            `posts`.`id` IN {{ post_ids | inclause }}
+        ;
+    """
+    params = {
+        'post_ids': post_ids
+    }
+
+    query, bound_params = jinja_sql.prepare_query(query_template, params)
+
+    async with connection.cursor(aiomysql.cursors.DictCursor) as cursor:
+        await cursor.execute(query, bound_params)
+        posts = await cursor.fetchall()
+
+    posts_by_ids = {post['id']: post for post in posts}
+
+    return [posts_by_ids[post_id] for post_id in post_ids if post_id in posts_by_ids]
+
+
+@lru.cache_db_function(records.post_cache)
+@lru.cache_missing_records(records.missing_post_cache, RecordNotFoundError)
+@single_flight.coalesce
 @check_record_in_db
 async def fetch_one_post(connection: aiomysql.Connection, post_id: int
                          ) -> dict[str, Union[int, str, datetime.datetime]]:
@@ -420,14 +768,10 @@ async def fetch_one_post(connection: aiomysql.Connection, post_id: int
             `posts`.`edited_date` AS `edited_date`,
             `posts`.`user_id` AS `user_id`,
             `posts`.`rubric_id` AS `rubric_id`,
-            `post_rubrics`.`title` AS `rubric`,
-            `users`.`login` AS `author`
+            `posts`.`rubric_title` AS `rubric`,
+            `posts`.`author_login` AS `author`
         FROM
             `posts`
-                LEFT JOIN
-            `post_rubrics` ON `posts`.`rubric_id` = `post_rubrics`.`id`
-                LEFT JOIN
-            `users` ON `posts`.`user_id` = `users`.`id`
         WHERE
             `posts`.`id` = %(post_id)s
         ;
@@ -457,11 +801,9 @@ async def fetch_one_random_post(connection: aiomysql.Connection) -> dict[str, Un
     query = """
         SELECT
             `posts`.*,
-            `post_rubrics`.`title` AS `rubric`
+            `posts`.`rubric_title` AS `rubric`
         FROM
             `posts`
-                LEFT JOIN
-            `post_rubrics` ON `posts`.`rubric_id` = `post_rubrics`.`id`
         ORDER BY RAND()
         LIMIT 1
         ;
@@ -480,6 +822,7 @@ async def fetch_one_random_post(connection: aiomysql.Connection) -> dict[str, Un
 # # # ------------------------- Notes
 
 
+@lru.cache_db_function(records.note_rubrics_cache)
 async def fetch_all_note_rubrics(connection: aiomysql.Connection, user_id: int) -> list[dict[str, Union[int, str]]]:
     """
     Fetch all notes by rubric.
@@ -584,6 +927,7 @@ async def fetch_all_notes(connection: aiomysql.Connection, user_id: int, params:
     return notes
 
 
+@lru.cache_db_function(records.note_cache)
 @check_record_in_db
 async def fetch_one_note(connection: aiomysql.Connection, note_id: int
                          ) -> dict[str, Union[int, str, datetime.datetime]]:
@@ -688,6 +1032,63 @@ async def fetch_one_user(connection: aiomysql.Connection,
     return user
 
 
+@lru.cache_db_function(records.thinker_cache)
+@lru.cache_missing_records(records.missing_user_cache, RecordNotFoundError)
+@single_flight.coalesce
+@check_record_in_db
+async def fetch_thinker_page(connection: aiomysql.Connection, user_id: int) -> dict[str, Union[dict, list[dict]]]:
+    """
+    Fetch data of the thinker page - public data of the user and the latest posts of the user
+    (posts are the first page of the user posts).
+
+    :param connection: db connection
+    :type connection: aiomysql.Connection
+    :param user_id: user id
+    :type user_id: int
+
+    :return: data of the thinker page (`user`, `posts`), None - if user is not found
+    :rtype: dict[str, Union[dict, list[dict]]]
+    """
+
+    query = """
+        SELECT
+            `users`.`id` AS `id`,
+            `users`.`login` AS `login`,
+            `users`.`about_me` AS `about_me`,
+            `users`.`image_path` AS `image_path`,
+            `users`.`edited_date` AS `edited_date`
+        FROM
+            `users`
+        WHERE
+            `users`.`id` = %(user_id)s
+        ;
+    """
+    params = {
+        'user_id': user_id
+    }
+
+    async with connection.cursor(aiomysql.cursors.DictCursor) as cursor:
+        await cursor.execute(query, params)
+        user = await cursor.fetchone()
+
+    if user is None:
+        return None
+
+    posts = await fetch_all_posts(
+        connection, validators.PostUrlParams(thinker=user_id, quantity=THINKER_PAGE_POSTS_QUANTITY)
+    )
+
+    thinker_page = {
+        'user': user,
+        'posts': posts
+    }
+
+    return thinker_page
+
+
+@tiered.cache_db_function(
+    'moderators', MODERATORS_CACHE_TTL, tags=lambda moderators: [invalidation.tag(invalidation.MODERATORS)]
+)
 async def fetch_all_moderators(connection: aiomysql.Connection) -> list[dict[str, Union[int, str]]]:
     """
     Fetch all users with moderator grant.
@@ -729,6 +1130,8 @@ async def insert_post_rubric(connection: aiomysql.Connection, post_rubric: valid
 
     await execute_query(connection, query, params)
 
+    await invalidation.invalidate(invalidation.tag(invalidation.POST_RUBRICS))
+
 
 async def insert_post(connection: aiomysql.Connection, post: validators.PostCreation) -> None:
     """
@@ -744,13 +1147,23 @@ async def insert_post(connection: aiomysql.Connection, post: validators.PostCrea
     """
 
     query = """
-        INSERT INTO `posts` (`title`, `content`, `user_id`, `rubric_id`) 
-        VALUES (%(title)s, %(content)s, %(user_id)s, %(rubric_id)s)
+        INSERT INTO `posts` (`title`, `content`, `user_id`, `rubric_id`, `author_login`, `rubric_title`) 
+        SELECT
+            %(title)s, %(content)s, %(user_id)s, %(rubric_id)s,
+            (SELECT `login` FROM `users` WHERE `id` = %(user_id)s),
+            (SELECT `title` FROM `post_rubrics` WHERE `id` = %(rubric_id)s)
         ;
     """
     params = post.dict(by_alias=True)
 
-    await execute_query(connection, query, params)
+    post_id = await execute_query(connection, query, params)
+
+    # new id might be cached as missing
+    await invalidation.invalidate(
+        invalidation.tag(invalidation.POST, post_id),
+        invalidation.tag(invalidation.POSTS),
+        *_get_posts_count_tags(rubric_ids=(post.rubric_id,), user_ids=(post.user_id,))
+    )
 
 
 # # # ------------------------- Notes
@@ -773,6 +1186,8 @@ async def insert_note_rubric(connection: aiomysql.Connection, note_rubric: valid
 
     await execute_query(connection, query, params)
 
+    await _write_through_note_rubrics(connection, note_rubric.user_id)
+
 
 async def insert_note(connection: aiomysql.Connection, note: validators.NoteCreation) -> None:
     """
@@ -796,6 +1211,8 @@ async def insert_note(connection: aiomysql.Connection, note: validators.NoteCrea
 
     await execute_query(connection, query, params)
 
+    await invalidation.invalidate(invalidation.tag(invalidation.NOTES_OF_USER, note.user_id))
+
 
 # # # ------------------------- Users
 
@@ -824,7 +1241,10 @@ async def insert_user(connection: aiomysql.Connection, user: validators.UserCrea
     params = user.dict(by_alias=True)
     params['is_admin'] = user_is_admin
 
-    await execute_query(connection, query, params)
+    user_id = await execute_query(connection, query, params)
+
+    # new id might be cached as missing
+    await invalidation.invalidate(invalidation.tag(invalidation.USER, user_id))
 
 
 # # ------------------------- UPDATE QUERIES
@@ -857,10 +1277,25 @@ async def update_post_rubric(connection: aiomysql.Connection,
         WHERE
             `id` = %(post_rubric_id)s;
     """
+    # fan out new title on posts (`edited_date` is kept - post content is not edited)
+    posts_query = """
+        UPDATE `posts`
+        SET
+            `rubric_title` = %(title)s,
+            `edited_date` = `edited_date`
+        WHERE
+            `rubric_id` = %(post_rubric_id)s;
+    """
     params = post_rubric.dict(by_alias=True)
     params['post_rubric_id'] = post_rubric_id
 
-    await execute_query(connection, query, params)
+    await execute_queries_in_transaction(connection, [(query, params), (posts_query, params)])
+
+    await invalidation.invalidate(
+        invalidation.tag(invalidation.POST_RUBRIC, post_rubric_id),
+        invalidation.tag(invalidation.POST_RUBRICS),
+        invalidation.tag(invalidation.POSTS)
+    )
 
 
 async def update_post(connection: aiomysql.Connection, post_id: int, post: validators.PostEditing) -> None:
@@ -883,15 +1318,27 @@ async def update_post(connection: aiomysql.Connection, post_id: int, post: valid
         SET 
             `title` = %(title)s,
             `content` = %(content)s,
-            `rubric_id` = %(rubric_id)s
+            `rubric_id` = %(rubric_id)s,
+            `rubric_title` = (SELECT `title` FROM `post_rubrics` WHERE `id` = %(rubric_id)s)
         WHERE
             `id` = %(post_id)s;
     """
     params = post.dict(by_alias=True)
     params['post_id'] = post_id
 
+    old_post = await _fetch_row_columns(connection, 'posts', post_id, ('rubric_id', 'user_id'))
+
     await execute_query(connection, query, params)
 
+    tags = [invalidation.tag(invalidation.POST, post_id), invalidation.tag(invalidation.POSTS)]
+    # moving between rubrics changes posts quantities
+    if old_post and old_post['rubric_id'] != post.rubric_id:
+        tags.extend(_get_posts_count_tags(
+            rubric_ids=(old_post['rubric_id'], post.rubric_id), user_ids=(old_post['user_id'],)
+        ))
+
+    await invalidation.invalidate(*tags)
+
 
 # # # ------------------------- Notes
 
@@ -925,6 +1372,12 @@ async def update_note_rubric(connection: aiomysql.Connection,
 
     await execute_query(connection, query, params)
 
+    await invalidation.invalidate(invalidation.tag(invalidation.NOTE_RUBRIC, note_rubric_id))
+
+    note_rubric_owner = await _fetch_row_columns(connection, 'note_rubrics', note_rubric_id, ('user_id',))
+    if note_rubric_owner:
+        await _write_through_note_rubrics(connection, note_rubric_owner['user_id'])
+
 
 async def update_note(connection: aiomysql.Connection, note_id: int, note: validators.NoteEditing) -> None:
     """
@@ -952,8 +1405,17 @@ async def update_note(connection: aiomysql.Connection, note_id: int, note: valid
     params = note.dict(by_alias=True)
     params['note_id'] = note_id
 
+    old_note = await _fetch_row_columns(connection, 'notes', note_id, ('rubric_id', 'user_id'))
+
     await execute_query(connection, query, params)
 
+    tags = [invalidation.tag(invalidation.NOTE, note_id)]
+    # moving between rubrics changes notes quantities
+    if old_note and old_note['rubric_id'] != note.rubric_id:
+        tags.append(invalidation.tag(invalidation.NOTES_OF_USER, old_note['user_id']))
+
+    await invalidation.invalidate(*tags)
+
 
 # # # ------------------------- Users
 
@@ -980,12 +1442,27 @@ async def update_user_login(connection: aiomysql.Connection, user_id: int, new_l
         WHERE
             `id` = %(user_id)s;
     """
+    # fan out new login on posts (`edited_date` is kept - post content is not edited)
+    posts_query = """
+        UPDATE `posts`
+        SET
+            `author_login` = %(new_login)s,
+            `edited_date` = `edited_date`
+        WHERE
+            `user_id` = %(user_id)s;
+    """
     params = {
         'user_id': user_id,
         'new_login': new_login
     }
 
-    await execute_query(connection, query, params)
+    await execute_queries_in_transaction(connection, [(query, params), (posts_query, params)])
+
+    await invalidation.invalidate(
+        invalidation.tag(invalidation.USER, user_id),
+        invalidation.tag(invalidation.POSTS),
+        invalidation.tag(invalidation.MODERATORS)
+    )
 
 
 async def update_user_password(connection: aiomysql.Connection, user_id: int, new_password: str) -> None:
@@ -1046,6 +1523,8 @@ async def update_user_info(connection: aiomysql.Connection, user_id: int, new_in
 
     await execute_query(connection, query, params)
 
+    await invalidation.invalidate(invalidation.tag(invalidation.USER, user_id))
+
 
 async def update_user_image_path(connection: aiomysql.Connection, user_id: int, new_image_path: Optional[pathlib.Path]
                                  ) -> None:
@@ -1077,6 +1556,8 @@ async def update_user_image_path(connection: aiomysql.Connection, user_id: int,
 
     await execute_query(connection, query, params)
 
+    await invalidation.invalidate(invalidation.tag(invalidation.USER, user_id))
+
 
 # # ------------------------- DELETE QUERIES
 
@@ -1097,6 +1578,15 @@ async def delete_post_rubric(connection: aiomysql.Connection, post_rubric_id: in
     :rtype: None
     """
 
+    # `rubric_id` of the posts is set to NULL by foreign key, denormalized title - explicitly
+    posts_query = """
+        UPDATE `posts`
+        SET
+            `rubric_title` = NULL,
+            `edited_date` = `edited_date`
+        WHERE
+            `rubric_id` = %(post_rubric_id)s;
+    """
     query = """
         DELETE FROM `post_rubrics` 
         WHERE
@@ -1106,7 +1596,14 @@ async def delete_post_rubric(connection: aiomysql.Connection, post_rubric_id: in
         'post_rubric_id': post_rubric_id
     }
 
-    await execute_query(connection, query, params)
+    await execute_queries_in_transaction(connection, [(posts_query, params), (query, params)])
+
+    await invalidation.invalidate(
+        invalidation.tag(invalidation.POST_RUBRIC, post_rubric_id),
+        invalidation.tag(invalidation.POST_RUBRICS),
+        invalidation.tag(invalidation.POSTS),
+        *_get_posts_count_tags(rubric_ids=(post_rubric_id,))
+    )
 
 
 async def delete_post(connection: aiomysql.Connection, post_id: int) -> None:
@@ -1131,8 +1628,16 @@ async def delete_post(connection: aiomysql.Connection, post_id: int) -> None:
         'post_id': post_id
     }
 
+    old_post = await _fetch_row_columns(connection, 'posts', post_id, ('rubric_id', 'user_id'))
+
     await execute_query(connection, query, params)
 
+    tags = [invalidation.tag(invalidation.POST, post_id), invalidation.tag(invalidation.POSTS)]
+    if old_post:
+        tags.extend(_get_posts_count_tags(rubric_ids=(old_post['rubric_id'],), user_ids=(old_post['user_id'],)))
+
+    await invalidation.invalidate(*tags)
+
 
 # # # Notes
 
@@ -1159,8 +1664,20 @@ async def delete_note_rubric(connection: aiomysql.Connection, note_rubric_id: in
         'note_rubric_id': note_rubric_id
     }
 
+    old_note_rubric = await _fetch_row_columns(connection, 'note_rubrics', note_rubric_id, ('user_id',))
+
     await execute_query(connection, query, params)
 
+    # notes of the rubric are deleted by foreign key
+    tags = [invalidation.tag(invalidation.NOTE_RUBRIC, note_rubric_id)]
+    if old_note_rubric:
+        tags.append(invalidation.tag(invalidation.NOTES_OF_USER, old_note_rubric['user_id']))
+
+    await invalidation.invalidate(*tags)
+
+    if old_note_rubric:
+        await _write_through_note_rubrics(connection, old_note_rubric['user_id'])
+
 
 async def delete_note(connection: aiomysql.Connection, note_id: int,) -> None:
     """
@@ -1184,18 +1701,30 @@ async def delete_note(connection: aiomysql.Connection, note_id: int,) -> None:
         'note_id': note_id
     }
 
+    old_note = await _fetch_row_columns(connection, 'notes', note_id, ('user_id',))
+
     await execute_query(connection, query, params)
 
+    tags = [invalidation.tag(invalidation.NOTE, note_id)]
+    if old_note:
+        tags.append(invalidation.tag(invalidation.NOTES_OF_USER, old_note['user_id']))
+
+    await invalidation.invalidate(*tags)
+
 
 # # # Users
 
 
-async def delete_user(connection: aiomysql.Connection, user_id: int) -> None:
+async def delete_user(connection: aiomysql.Connection, notes_connection: aiomysql.Connection, user_id: int) -> None:
     """
-    Delete the user.
+    Delete the user with its notes and note rubrics.
+
+    Notes shards have no users table (no foreign keys) - so, notes are deleted explicitly before the user.
 
     :param connection: db connection
     :type connection: aiomysql.Connection
+    :param notes_connection: connection of the shard that stores user notes (check `sharding.acquire_notes_connection`)
+    :type notes_connection: aiomysql.Connection
     :param user_id: user id
     :type user_id: int
 
@@ -1203,6 +1732,22 @@ async def delete_user(connection: aiomysql.Connection, user_id: int) -> None:
     :rtype: None
     """
 
+    # child table first
+    notes_queries = [
+        (f'DELETE FROM `{table_name}` WHERE `user_id` = %(user_id)s;', {'user_id': user_id})
+        for table_name in ('notes', 'note_rubrics')
+    ]
+    await execute_queries_in_transaction(notes_connection, notes_queries)
+
+    # `user_id` of the posts is set to NULL by foreign key, denormalized login - explicitly
+    posts_query = """
+        UPDATE `posts`
+        SET
+            `author_login` = NULL,
+            `edited_date` = `edited_date`
+        WHERE
+            `user_id` = %(user_id)s;
+    """
     query = """
         DELETE FROM `users` 
         WHERE
@@ -1212,7 +1757,16 @@ async def delete_user(connection: aiomysql.Connection, user_id: int) -> None:
         'user_id': user_id
     }
 
-    await execute_query(connection, query, params)
+    await execute_queries_in_transaction(connection, [(posts_query, params), (query, params)])
+
+    await invalidation.invalidate(
+        invalidation.tag(invalidation.USER, user_id),
+        invalidation.tag(invalidation.POSTS),
+        *_get_posts_count_tags(user_ids=(user_id,)),
+        invalidation.tag(invalidation.NOTES_OF_USER, user_id),
+        invalidation.tag(invalidation.NOTE_RUBRICS, user_id),
+        invalidation.tag(invalidation.MODERATORS)
+    )
 
 
 # ------------------------- Admin manipulations
@@ -1244,6 +1798,8 @@ async def add_user_in_moderators(connection: aiomysql.Connection, user_id: int)
 
     await execute_query(connection, query, params)
 
+    await invalidation.invalidate(invalidation.tag(invalidation.MODERATORS))
+
 
 async def delete_user_from_moderators(connection: aiomysql.Connection, user_id: int) -> None:
     """
@@ -1270,3 +1826,5 @@ async def delete_user_from_moderators(connection: aiomysql.Connection, user_id:
     }
 
     await execute_query(connection, query, params)
+
+    await invalidation.invalidate(invalidation.tag(invalidation.MODERATORS))
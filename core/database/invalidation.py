@@ -0,0 +1,302 @@
+"""
+Contains invalidation of the cached data by tags.
+
+Db write functions invalidate tags of the changed data, caches register handlers that purge entries by tags.
+Tag is a string `kind:id` (or just `kind` for collections), for example: `post:5`, `posts`.
+
+Handlers are shared (caches in Redis - invoked only by the worker that changed data)
+or local (caches in the worker memory - invoked by every worker).
+Other workers get invalidated tags by publisher (check `invalidation_bus`).
+
+Invalidations are numbered by the shared generation counter (it is set by invalidation bus): every invalidation
+increments counter before handlers are invoked, worker keeps the latest generation that its local caches applied.
+Shared caches (Redis) save value only if shared generation is still the generation that the worker had applied
+when value was read - so, value that raced invalidation (in any worker) or that was read from the local caches
+of the worker that has not applied invalidation yet is not saved.
+
+.. function:: tag(kind: str, id_: Optional[int] = None) -> str
+    Return tag of the entity (collection)
+.. function:: parse_tag(tag_: str) -> tuple[str, Optional[int]]
+    Return kind and id of the tag
+.. function:: add_handler(handler: Callable[[set[str]], Awaitable[None]], *args, local: bool = False) -> None
+    Register invalidation handler
+.. function:: remove_handler(handler: Callable[[set[str]], Awaitable[None]]) -> None
+    Unregister invalidation handler
+.. function:: set_publisher(publisher: Optional[Callable[[set[str], Optional[int]], Awaitable[None]]]) -> None
+    Set publisher of the invalidated tags for other workers
+.. function:: set_generation_counter(counter: Optional[Callable[[], Awaitable[int]]]) -> None
+    Set shared counter of the invalidations
+.. function:: get_generation() -> int
+    Return the latest generation that is applied by the worker
+.. function:: apply_generation(generation: Optional[int]) -> None
+    Mark generation as applied by the worker
+.. function:: invalidate(*tags: str) -> None
+    Invalidate tags (invoke all registered handlers and publish tags)
+.. function:: invalidate_locally(tags: set[str], generation: Optional[int] = None) -> None
+    Invalidate tags that were published by other worker (invoke local handlers)
+
+.. const:: ALL
+    Tag of the all data (local caches are flushed)
+
+.. const:: POST
+    Kind of the tag - one post
+.. const:: POSTS
+    Kind of the tag - lists of posts
+.. const:: POST_RUBRIC
+    Kind of the tag - one post rubric
+.. const:: POST_RUBRICS
+    Kind of the tag - list of post rubrics
+.. const:: POSTS_COUNT
+    Kind of the tag - membership of the posts is changed (posts quantities are changed)
+.. const:: POSTS_OF_RUBRIC
+    Kind of the tag - membership of the rubric posts is changed
+.. const:: POSTS_OF_USER
+    Kind of the tag - membership of the user posts is changed
+.. const:: NOTE
+    Kind of the tag - one note
+.. const:: NOTE_RUBRIC
+    Kind of the tag - one note rubric
+.. const:: NOTE_RUBRICS
+    Kind of the tag - list of the user note rubrics (id - user id)
+.. const:: NOTES_OF_USER
+    Kind of the tag - membership of the user notes is changed
+.. const:: MODERATORS
+    Kind of the tag - list of the moderators
+.. const:: USER
+    Kind of the tag - one user
+.. const:: NOTES_SHARD
+    Kind of the tag - placement of the user notes in the shards (id - user id)
+.. const:: KINDS
+    All kinds of the tags
+"""
+
+import logging
+from typing import (
+    Awaitable,
+    Callable,
+    Optional
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+ALL = '*'
+POST = 'post'
+POSTS = 'posts'
+POST_RUBRIC = 'post_rubric'
+POST_RUBRICS = 'post_rubrics'
+POSTS_COUNT = 'posts_count'
+POSTS_OF_RUBRIC = 'posts_of_rubric'
+POSTS_OF_USER = 'posts_of_user'
+NOTE = 'note'
+NOTE_RUBRIC = 'note_rubric'
+NOTE_RUBRICS = 'note_rubrics'
+NOTES_OF_USER = 'notes_of_user'
+MODERATORS = 'moderators'
+USER = 'user'
+NOTES_SHARD = 'notes_shard'
+
+KINDS = frozenset((
+    POST, POSTS, POST_RUBRIC, POST_RUBRICS, POSTS_COUNT, POSTS_OF_RUBRIC, POSTS_OF_USER,
+    NOTE, NOTE_RUBRIC, NOTE_RUBRICS, NOTES_OF_USER, MODERATORS, USER, NOTES_SHARD
+))
+
+
+# registered handlers (caches register them on app startup): handler - local status
+_handlers: dict[Callable[[set[str]], Awaitable[None]], bool] = {}
+# publisher of the invalidated tags (and their generation) for other workers
+_publisher: Optional[Callable[[set[str], Optional[int]], Awaitable[None]]] = None
+# shared counter of the invalidations and the latest generation that is applied by the worker
+_generation_counter: Optional[Callable[[], Awaitable[int]]] = None
+_generation = 0
+
+
+def tag(kind: str, id_: Optional[int] = None) -> str:
+    """
+    Return tag of the entity (or of the collection if id is not passed).
+
+    :param kind: kind of the entity
+    :type kind: str
+    :param id_: entity id
+    :type id_: Optional[int]
+
+    :return: tag
+    :rtype: str
+    """
+
+    return kind if id_ is None else f'{kind}:{id_}'
+
+
+def parse_tag(tag_: str) -> tuple[str, Optional[int]]:
+    """
+    Return kind and id of the tag (id is None for the collection tag).
+
+    :param tag_: tag
+    :type tag_: str
+
+    :return: kind and id
+    :rtype: tuple[str, Optional[int]]
+    """
+
+    kind, _, id_ = tag_.partition(':')
+
+    return kind, int(id_) if id_.isdigit() else None
+
+
+def add_handler(handler: Callable[[set[str]], Awaitable[None]], *args, local: bool = False) -> None:
+    """
+    Register invalidation handler (async function that gets set of tags).
+
+    :param handler: invalidation handler
+    :type handler: Callable[[set[str]], Awaitable[None]]
+    :keyword local: handler purges cache in the worker memory (it is invoked by every worker)
+    :type local: bool
+
+    :return: None
+    :rtype: None
+    """
+
+    _handlers[handler] = local
+
+
+def remove_handler(handler: Callable[[set[str]], Awaitable[None]]) -> None:
+    """
+    Unregister invalidation handler.
+
+    :param handler: invalidation handler
+    :type handler: Callable[[set[str]], Awaitable[None]]
+
+    :return: None
+    :rtype: None
+    """
+
+    _handlers.pop(handler, None)
+
+
+def set_publisher(publisher: Optional[Callable[[set[str], Optional[int]], Awaitable[None]]]) -> None:
+    """
+    Set publisher of the invalidated tags for other workers (None - unset).
+
+    :param publisher: async function that gets set of tags and their generation
+    :type publisher: Optional[Callable[[set[str], Optional[int]], Awaitable[None]]]
+
+    :return: None
+    :rtype: None
+    """
+
+    global _publisher
+    _publisher = publisher
+
+
+def set_generation_counter(counter: Optional[Callable[[], Awaitable[int]]]) -> None:
+    """
+    Set shared counter of the invalidations (None - unset).
+
+    :param counter: async function that increments counter and returns new generation
+    :type counter: Optional[Callable[[], Awaitable[int]]]
+
+    :return: None
+    :rtype: None
+    """
+
+    global _generation_counter
+    _generation_counter = counter
+
+
+def get_generation() -> int:
+    """
+    Return the latest generation that is applied by the worker (its local caches are purged).
+
+    :return: generation
+    :rtype: int
+    """
+
+    return _generation
+
+
+def apply_generation(generation: Optional[int]) -> None:
+    """
+    Mark generation as applied by the worker (older generation is skipped).
+
+    :param generation: generation (None - unknown)
+    :type generation: Optional[int]
+
+    :return: None
+    :rtype: None
+    """
+
+    global _generation
+    if generation is not None and generation > _generation:
+        _generation = generation
+
+
+async def _invoke_handlers(tags: set[str], handlers: list[Callable[[set[str]], Awaitable[None]]]) -> None:
+    """
+    Invoke handlers - errors of the handlers are logged (not raised).
+
+    :param tags: invalidated tags
+    :type tags: set[str]
+    :param handlers: invalidation handlers
+    :type handlers: list[Callable[[set[str]], Awaitable[None]]]
+
+    :return: None
+    :rtype: None
+    """
+
+    for handler in handlers:
+        try:
+            await handler(tags)
+        except Exception as error:
+            logger.exception(msg=f'Error raised while cache is invalidating by tags {tags}: {error}', exc_info=error)
+
+
+async def invalidate(*tags: str) -> None:
+    """
+    Invalidate tags - invoke all registered handlers and publish tags for other workers.
+
+    Invalidation must not break the write - so, errors of the handlers (and publisher) are logged (not raised).
+
+    :param tags: tags of the changed data
+    :type tags: str
+
+    :return: None
+    :rtype: None
+    """
+
+    tags = set(tags)
+
+    # generation is incremented before handlers - shared caches reject values that were read before invalidation
+    generation = None
+    if _generation_counter is not None:
+        try:
+            generation = await _generation_counter()
+        except Exception as error:
+            logger.exception(msg=f'Error raised while generation of tags {tags} is incremented: {error}',
+                             exc_info=error)
+
+    await _invoke_handlers(tags, list(_handlers))
+    apply_generation(generation)
+
+    if _publisher is not None:
+        try:
+            await _publisher(tags, generation)
+        except Exception as error:
+            logger.exception(msg=f'Error raised while tags {tags} are publishing: {error}', exc_info=error)
+
+
+async def invalidate_locally(tags: set[str], generation: Optional[int] = None) -> None:
+    """
+    Invalidate tags that were published by other worker - invoke only local handlers and apply generation.
+
+    :param tags: tags of the changed data
+    :type tags: set[str]
+    :param generation: generation of the invalidation (None - unknown)
+    :type generation: Optional[int]
+
+    :return: None
+    :rtype: None
+    """
+
+    await _invoke_handlers(tags, [handler for handler, local in _handlers.items() if local])
+    apply_generation(generation)
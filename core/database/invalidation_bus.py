@@ -0,0 +1,265 @@
+"""
+Contains cross-worker invalidation bus over Redis pub/sub.
+
+Every worker (process or node) keeps local caches in memory - they must be invalidated on every worker,
+not only on the worker that changed data. So, the worker publishes invalidated tags in Redis channel,
+other workers listen channel and invoke local invalidation handlers (own messages are skipped).
+
+Pub/sub does not keep messages - messages published while worker is not subscribed are lost.
+So, after reconnection (subscription gap) worker flushes all local caches (conservatively).
+Startup waits for the first subscription (worker does not fill local caches before it gets messages),
+worker that is not subscribed within timeout is not started.
+
+Bus keeps shared generation counter of the invalidations (check `invalidation`): message carries generation,
+worker applies it after local caches are purged. After subscription worker applies the current generation
+(local caches are empty or flushed).
+
+Message (JSON): {'worker': <worker id>, 'tags': [<tag>, ...], 'generation': <generation>}
+
+.. class:: InvalidationBus
+    Implements publishing and listening of the invalidated tags
+
+.. function:: init_invalidation_bus(app: aiohttp.web.Application) -> None
+    Create invalidation bus, start listening and wait for the first subscription
+.. function:: close_invalidation_bus(app: aiohttp.web.Application) -> None
+    Stop listening and close invalidation bus
+
+.. const:: CHANNEL
+    Redis channel of the invalidated tags
+.. const:: GENERATION_KEY
+    Redis key of the generation counter of the invalidations
+"""
+
+import asyncio
+import logging
+from typing import (
+    Optional,
+    Union
+)
+import uuid
+
+import aiohttp.web
+import aioredis
+
+from . import invalidation
+from ..settings import (
+    INVALIDATION_BUS_SUBSCRIBE_TIMEOUT,
+    REDIS_ADDRESS
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+CHANNEL = 'invalidation'
+GENERATION_KEY = 'invalidation:generation'
+
+
+class InvalidationBus:
+    """ Implements publishing and listening of the invalidated tags (Redis pub/sub) """
+
+    # delays between reconnection attempts (seconds)
+    min_reconnect_delay = 0.5
+    max_reconnect_delay = 30
+
+    def __init__(self, redis: aioredis.Redis, address: Union[tuple, str] = REDIS_ADDRESS) -> None:
+        self.redis = redis
+        self.address = address
+        self.worker_id = uuid.uuid4().hex
+
+        self._listening_task: Optional[asyncio.Task] = None
+        self._subscriber: Optional[aioredis.Redis] = None
+        self._subscribed = asyncio.Event()
+
+    async def publish(self, tags: set[str], generation: Optional[int] = None) -> None:
+        """
+        Publish invalidated tags for other workers (used as invalidation publisher).
+
+        :param tags: invalidated tags
+        :type tags: set[str]
+        :param generation: generation of the invalidation (None - unknown)
+        :type generation: Optional[int]
+
+        :return: None
+        :rtype: None
+        """
+
+        message = {'worker': self.worker_id, 'tags': sorted(tags), 'generation': generation}
+        await self.redis.publish_json(CHANNEL, message)
+
+    async def increment_generation(self) -> int:
+        """
+        Increment shared generation counter of the invalidations (used as invalidation generation counter).
+
+        :return: new generation
+        :rtype: int
+        """
+
+        return await self.redis.incr(GENERATION_KEY)
+
+    async def _apply_current_generation(self) -> None:
+        """
+        Apply the current shared generation (local caches have no data that was read before it).
+
+        :return: None
+        :rtype: None
+        """
+
+        generation = await self.redis.get(GENERATION_KEY)
+        invalidation.apply_generation(int(generation) if generation is not None else 0)
+
+    async def _handle_message(self, message: dict) -> None:
+        """
+        Invalidate local caches by tags of the message (own messages are skipped).
+
+        :param message: message from the channel
+        :type message: dict
+
+        :return: None
+        :rtype: None
+        """
+
+        if message.get('worker') == self.worker_id:
+            return
+
+        generation = message.get('generation')
+        await invalidation.invalidate_locally(
+            set(message.get('tags', ())), generation if isinstance(generation, int) else None
+        )
+
+    async def _listen(self) -> None:
+        """
+        Listen channel (subscription is restored on connection loss, local caches are flushed after gap).
+
+        :return: None
+        :rtype: None
+        """
+
+        reconnect_delay = self.min_reconnect_delay
+        was_subscribed = False
+
+        while True:
+            try:
+                self._subscriber = await aioredis.create_redis(self.address)
+                channel, = await self._subscriber.subscribe(CHANNEL)
+
+                # messages might be lost while worker was not subscribed
+                if was_subscribed:
+                    logger.warning('Invalidation bus has been resubscribed, local caches are flushed')
+                    await invalidation.invalidate_locally({invalidation.ALL})
+                await self._apply_current_generation()
+                was_subscribed = True
+                self._subscribed.set()
+                reconnect_delay = self.min_reconnect_delay
+
+                while await channel.wait_message():
+                    try:
+                        message = await channel.get_json()
+                    except ValueError as error:
+                        logger.warning(f'Invalid message was skipped by invalidation bus: {error}')
+                        continue
+
+                    await self._handle_message(message)
+
+                logger.warning('Invalidation bus subscription has been closed')
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.exception(msg=f'Error raised while invalidation bus is listening: {error}', exc_info=error)
+            finally:
+                if self._subscriber is not None:
+                    self._subscriber.close()
+                    await self._subscriber.wait_closed()
+                    self._subscriber = None
+
+            await asyncio.sleep(reconnect_delay)
+            reconnect_delay = min(reconnect_delay * 2, self.max_reconnect_delay)
+
+    def start(self) -> None:
+        """
+        Start listening of the channel (in the background task).
+
+        :return: None
+        :rtype: None
+        """
+
+        self._listening_task = asyncio.create_task(self._listen())
+
+    async def wait_subscribed(self, timeout: float = INVALIDATION_BUS_SUBSCRIBE_TIMEOUT) -> None:
+        """
+        Wait for the first subscription of the channel.
+
+        :param timeout: timeout (seconds)
+        :type timeout: float
+
+        :return: None
+        :rtype: None
+
+        :raises asyncio.TimeoutError: raised if channel was not subscribed within timeout
+        """
+
+        await asyncio.wait_for(self._subscribed.wait(), timeout)
+
+    async def stop(self) -> None:
+        """
+        Stop listening of the channel.
+
+        :return: None
+        :rtype: None
+        """
+
+        if self._listening_task is not None:
+            self._listening_task.cancel()
+            try:
+                await self._listening_task
+            except asyncio.CancelledError:
+                pass
+            self._listening_task = None
+
+
+async def init_invalidation_bus(app: aiohttp.web.Application) -> None:
+    """
+    Create invalidation bus, set it as invalidation publisher, start listening and wait for the first subscription
+    (it is compulsory to init Redis pool before).
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+
+    :raises asyncio.TimeoutError: raised if channel was not subscribed within timeout
+    """
+
+    invalidation_bus = InvalidationBus(app['redis'])
+    invalidation.set_publisher(invalidation_bus.publish)
+    invalidation.set_generation_counter(invalidation_bus.increment_generation)
+    invalidation_bus.start()
+
+    app['invalidation_bus'] = invalidation_bus
+
+    # local caches that are filled before subscription miss invalidations of other workers
+    try:
+        await invalidation_bus.wait_subscribed()
+    except asyncio.TimeoutError:
+        logger.error(f'Invalidation bus has not been subscribed within {INVALIDATION_BUS_SUBSCRIBE_TIMEOUT} seconds')
+        await close_invalidation_bus(app)
+        raise
+
+    logger.info(f'Invalidation bus has been set (worker {invalidation_bus.worker_id})!')
+
+
+async def close_invalidation_bus(app: aiohttp.web.Application) -> None:
+    """
+    Stop listening and unset invalidation publisher.
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    invalidation.set_publisher(None)
+    invalidation.set_generation_counter(None)
+    await app['invalidation_bus'].stop()
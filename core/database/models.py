@@ -16,15 +16,23 @@ Contains classes that implement the database objects. `Database` and `TableName`
     Contains sql queries that implement this entity (create/drop)
 .. class:: TableNotes
     Contains sql queries that implement this entity (create/drop)
+.. class:: TableNotesShardsDirectory
+    Contains sql queries that implement this entity (create/drop)
+.. class:: TableShardNoteRubrics
+    Contains sql queries that implement this entity (create/drop) [on the notes shard]
+.. class:: TableShardNotes
+    Contains sql queries that implement this entity (create/drop) [on the notes shard]
 
 .. const:: tables
     Contains all database tables in order (ParentTable, ChildTable)
+.. const:: shard_tables
+    Contains all notes shard tables in order (ParentTable, ChildTable)
 """
 
-__all__ = ['Database', 'tables']
+__all__ = ['Database', 'tables', 'shard_tables']
 
 
-__version__ = 1.0
+__version__ = 1.3
 
 
 class Database:
@@ -57,6 +65,7 @@ CREATE TABLE IF NOT EXISTS `users` (
     `image_path` VARCHAR(255) DEFAULT NULL,
     `is_admin` TINYINT(1) NOT NULL DEFAULT '0',
     `is_moderator` TINYINT(1) NOT NULL DEFAULT '0',
+    `edited_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     PRIMARY KEY (`id`)
 )  ENGINE=INNODB;
     """
@@ -79,6 +88,7 @@ class TablePostRubrics:
 CREATE TABLE IF NOT EXISTS `post_rubrics` (
     `id` INT NOT NULL AUTO_INCREMENT,
     `title` VARCHAR(255) NOT NULL,
+    `edited_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     `user_id` INT NULL,
     PRIMARY KEY (`id`),
     FOREIGN KEY (`user_id`)
@@ -90,7 +100,12 @@ CREATE TABLE IF NOT EXISTS `post_rubrics` (
 
 
 class TablePosts:
-    """ Implement `posts` table """
+    """
+    Implement `posts` table.
+
+    `author_login` and `rubric_title` are denormalized copies of `users`.`login` and `post_rubrics`.`title`
+    (posts are read without joins), they are kept in sync by db functions.
+    """
     create_table = """
 CREATE TABLE IF NOT EXISTS `posts` (
     `id` INT NOT NULL AUTO_INCREMENT,
@@ -100,7 +115,12 @@ CREATE TABLE IF NOT EXISTS `posts` (
     `edited_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     `user_id` INT NULL,
     `rubric_id` INT NULL,
+    `author_login` VARCHAR(255) NULL,
+    `rubric_title` VARCHAR(255) NULL,
     PRIMARY KEY (`id`),
+    INDEX (`created_date`),
+    INDEX (`rubric_id`, `created_date`),
+    INDEX (`user_id`, `created_date`),
     FULLTEXT ( `title` , `content` ),
     FOREIGN KEY (`user_id`)
         REFERENCES `users` (`id`)
@@ -119,6 +139,7 @@ class TableNoteRubrics:
 CREATE TABLE IF NOT EXISTS `note_rubrics` (
     `id` INT NOT NULL AUTO_INCREMENT,
     `title` VARCHAR(255) NOT NULL,
+    `edited_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     `user_id` INT NOT NULL,
     PRIMARY KEY (`id`),
     FOREIGN KEY (`user_id`)
@@ -152,6 +173,60 @@ CREATE TABLE IF NOT EXISTS `notes` (
     drop_table = "DROP TABLE IF EXISTS `notes`;"
 
 
+class TableNotesShardsDirectory:
+    """ Implement `notes_shards_directory` table (explicit placements of the users' notes on shards) """
+    create_table = """
+CREATE TABLE IF NOT EXISTS `notes_shards_directory` (
+    `user_id` INT NOT NULL,
+    `shard_id` INT NOT NULL,
+    PRIMARY KEY (`user_id`),
+    FOREIGN KEY (`user_id`)
+        REFERENCES `users` (`id`)
+        ON DELETE CASCADE ON UPDATE NO ACTION
+)  ENGINE=INNODB;
+    """
+    drop_table = "DROP TABLE IF EXISTS `notes_shards_directory`;"
+
+
+# notes shards do not store `users` - so, shard tables have not foreign keys on `users`
+
+
+class TableShardNoteRubrics:
+    """ Implement `note_rubrics` table on the notes shard """
+    create_table = """
+CREATE TABLE IF NOT EXISTS `note_rubrics` (
+    `id` INT NOT NULL AUTO_INCREMENT,
+    `title` VARCHAR(255) NOT NULL,
+    `edited_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    `user_id` INT NOT NULL,
+    PRIMARY KEY (`id`),
+    INDEX (`user_id`)
+)  ENGINE=INNODB;
+    """
+    drop_table = "DROP TABLE IF EXISTS `note_rubrics`;"
+
+
+class TableShardNotes:
+    """ Implement `notes` table on the notes shard """
+    create_table = """
+CREATE TABLE IF NOT EXISTS `notes` (
+    `id` INT NOT NULL AUTO_INCREMENT,
+    `content` TEXT NOT NULL,
+    `created_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    `edited_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    `rubric_id` INT NULL,
+    `user_id` INT NOT NULL,
+    PRIMARY KEY (`id`),
+    INDEX (`user_id`, `created_date`),
+    FULLTEXT ( `content` ),
+    FOREIGN KEY (`rubric_id`)
+        REFERENCES `note_rubrics` (`id`)
+        ON DELETE CASCADE ON UPDATE NO ACTION
+)  ENGINE=INNODB;
+    """
+    drop_table = "DROP TABLE IF EXISTS `notes`;"
+
+
 # ------------------------- It`s compulsory to keep order like: -------------------------
 # TableParent, TableChild ...
 # This order counts in `init_db.py` when tables create or drop.
@@ -161,5 +236,10 @@ tables: tuple = (
     TablePosts,
     TableNoteRubrics,
     TableNotes,
+    TableNotesShardsDirectory,
+)
+shard_tables: tuple = (
+    TableShardNoteRubrics,
+    TableShardNotes,
 )
 # ------------------------- ||||||||||||||||||||||||||||||||||| -------------------------
@@ -16,6 +16,7 @@ from ..settings import (
     DB_NAME,
     DB_HOST,
     DB_PORT,
+    DB_POOL_MINSIZE,
     DB_USER,
     DB_PASSWORD
 )
@@ -41,6 +42,7 @@ async def init_mysql(app: aiohttp.web.Application) -> None:
         user=DB_USER,
         password=DB_PASSWORD,
         db=DB_NAME,
+        minsize=DB_POOL_MINSIZE,
         autocommit=True
     )
 
@@ -0,0 +1,49 @@
+"""
+Contains functions that manage Redis connection for caches (actions on start and on shut).
+
+.. function:: init_redis(app: aiohttp.web.Application) -> None
+    Create and set in app settings Redis pool
+.. function:: close_redis(app: aiohttp.web.Application) -> None
+    Close Redis connection
+"""
+
+import logging
+
+import aiohttp.web
+import aioredis
+
+from ..settings import REDIS_ADDRESS
+
+
+logger = logging.getLogger(__name__)
+
+
+async def init_redis(app: aiohttp.web.Application) -> None:
+    """
+    Create and set in app settings Redis pool.
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    app['redis'] = await aioredis.create_redis_pool(REDIS_ADDRESS)
+
+    logger.info('Redis pool has been set!')
+
+
+async def close_redis(app: aiohttp.web.Application) -> None:
+    """
+    Close Redis connection.
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    app['redis'].close()
+    await app['redis'].wait_closed()
@@ -0,0 +1,378 @@
+"""
+Contains notes sharding (notes and note rubrics of the user are stored on one of the configured MySQL instances).
+
+Notes and note rubrics are strictly per user, so all user rows are stored on the one shard.
+Shard of the user is resolved:
+    - by the `notes_shards_directory` table (main db) - explicit placement (set on rebalancing);
+    - by `user_id % shards_quantity` - if the user has not explicit placement.
+Resolved shard is cached in the worker memory (check `records.shard_placement_cache`),
+moving of the user notes invalidates it in all workers.
+
+If shards are not configured - the main db pool is the only shard (and directory is not used).
+
+Ids of the shard rows are interleaved (`auto_increment_increment` = shards quantity,
+`auto_increment_offset` = shard id + 1), so ids are unique between shards and rows might be moved without id changes.
+So, it is compulsory to keep the order and the quantity of the configured shards.
+
+.. function:: init_notes_shards(app: aiohttp.web.Application) -> None
+    Create and set in app settings MySQL pools of the notes shards
+.. function:: close_notes_shards(app: aiohttp.web.Application) -> None
+    Close notes shards connections
+.. function:: create_notes_shard_pool(host: str, port: int, shard_id: int, shards_quantity: int) -> aiomysql.Pool
+    Create MySQL pool of the notes shard
+.. function:: get_default_shard_id(user_id: int, shards_quantity: int) -> int
+    Return shard id of the user without explicit placement
+.. function:: fetch_user_shard_id(connection: aiomysql.Connection, user_id: int, shards_quantity: int) -> int
+    Return shard id of the user
+.. function:: acquire_notes_connection(app: aiohttp.web.Application, user_id: int) -> AsyncIterator
+    Acquire connection of the shard that stores user notes
+.. function:: move_user_notes(main_connection: aiomysql.Connection, source_connection: aiomysql.Connection,
+        target_connection: aiomysql.Connection, user_id: int, target_shard_id: int) -> None
+    Move user notes (and note rubrics) between shards
+"""
+
+import contextlib
+import logging
+from typing import (
+    AsyncIterator,
+    Union
+)
+
+import aiohttp.web
+import aiomysql
+
+from . import invalidation
+from ..cache import (
+    lru,
+    records
+)
+from ..settings import (
+    DB_NAME,
+    DB_USER,
+    DB_PASSWORD,
+    NOTES_SHARDS_ADDRESSES
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+async def init_notes_shards(app: aiohttp.web.Application) -> None:
+    """
+    Create and set in app settings MySQL pools of the notes shards.
+
+    It is compulsory to init the main db pool before (it is used as the only shard if shards are not configured).
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    if not NOTES_SHARDS_ADDRESSES:
+        app['notes_shards'] = (app['db'], )
+        return
+
+    shards_quantity = len(NOTES_SHARDS_ADDRESSES)
+    app['notes_shards'] = tuple([
+        await create_notes_shard_pool(host, port, shard_id, shards_quantity)
+        for shard_id, (host, port) in enumerate(NOTES_SHARDS_ADDRESSES)
+    ])
+
+    logger.info(f'Notes shards pools have been set! Shards quantity: {shards_quantity}')
+
+
+async def close_notes_shards(app: aiohttp.web.Application) -> None:
+    """
+    Close notes shards connections (the main db pool is closed separately).
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    for pool in app['notes_shards']:
+        if pool is app['db']:
+            continue
+
+        pool.close()
+        await pool.wait_closed()
+
+
+async def create_notes_shard_pool(host: str, port: int, shard_id: int, shards_quantity: int) -> aiomysql.Pool:
+    """
+    Create MySQL pool of the notes shard (with interleaved auto increment ids).
+
+    :param host: shard host
+    :type host: str
+    :param port: shard port
+    :type port: int
+    :param shard_id: shard id (index in the configured shards)
+    :type shard_id: int
+    :param shards_quantity: quantity of the configured shards
+    :type shards_quantity: int
+
+    :return: shard pool
+    :rtype: aiomysql.Pool
+    """
+
+    pool: aiomysql.Pool = await aiomysql.create_pool(
+        host=host,
+        port=port,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        db=DB_NAME,
+        autocommit=True,
+        init_command=(
+            f'SET SESSION auto_increment_increment = {shards_quantity}, '
+            f'auto_increment_offset = {shard_id + 1};'
+        )
+    )
+
+    return pool
+
+
+def get_default_shard_id(user_id: int, shards_quantity: int) -> int:
+    """
+    Return shard id of the user that has not explicit placement.
+
+    :param user_id: user id
+    :type user_id: int
+    :param shards_quantity: quantity of the configured shards
+    :type shards_quantity: int
+
+    :return: shard id
+    :rtype: int
+    """
+
+    return user_id % shards_quantity
+
+
+@lru.cache_db_function(records.shard_placement_cache)
+async def fetch_user_shard_id(connection: aiomysql.Connection, user_id: int, shards_quantity: int) -> int:
+    """
+    Fetch shard id of the user (explicit placement or default, it is cached in the worker memory).
+
+    :param connection: main db connection
+    :type connection: aiomysql.Connection
+    :param user_id: user id
+    :type user_id: int
+    :param shards_quantity: quantity of the configured shards
+    :type shards_quantity: int
+
+    :return: shard id
+    :rtype: int
+    """
+
+    query = 'SELECT `shard_id` FROM `notes_shards_directory` WHERE `user_id` = %(user_id)s;'
+    params = {
+        'user_id': user_id
+    }
+
+    async with connection.cursor() as cursor:
+        await cursor.execute(query, params)
+        query_result = await cursor.fetchone()
+
+    if query_result is None:
+        return get_default_shard_id(user_id, shards_quantity)
+
+    return int(query_result[0])
+
+
+@contextlib.asynccontextmanager
+async def acquire_notes_connection(app: aiohttp.web.Application, user_id: int) -> AsyncIterator[aiomysql.Connection]:
+    """
+    Acquire connection of the shard that stores user notes (and note rubrics).
+
+    Usage:
+        async with sharding.acquire_notes_connection(request.app, user_id) as connection:
+            ...
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+    :param user_id: user id (owner of the notes)
+    :type user_id: int
+
+    :return: shard connection
+    :rtype: AsyncIterator[aiomysql.Connection]
+    """
+
+    shards: tuple[aiomysql.Pool] = app['notes_shards']
+
+    if len(shards) == 1:
+        shard_id = 0
+    else:
+        # main db connection is acquired only if placement is not cached
+        shard_id = fetch_user_shard_id.get_cached(user_id, len(shards))
+        if shard_id is lru.MISSING:
+            async with app['db'].acquire() as connection:
+                shard_id = await fetch_user_shard_id.load(connection, user_id, len(shards))
+
+    async with shards[shard_id].acquire() as connection:
+        yield connection
+
+
+# ------------------------- REBALANCING
+
+
+async def _fetch_user_rows(connection: aiomysql.Connection, table_name: str, user_id: int
+                           ) -> list[dict[str, Union[int, str]]]:
+    """ Fetch all rows of the user from the shard table """
+    query = f'SELECT * FROM `{table_name}` WHERE `user_id` = %(user_id)s ORDER BY `id`;'
+    params = {
+        'user_id': user_id
+    }
+
+    async with connection.cursor(aiomysql.cursors.DictCursor) as cursor:
+        await cursor.execute(query, params)
+        rows = await cursor.fetchall()
+
+    return rows
+
+
+async def _insert_rows(connection: aiomysql.Connection, table_name: str, rows: list[dict[str, Union[int, str]]]
+                       ) -> None:
+    """ Insert rows (with all their columns - including ids) in the shard table """
+    if not rows:
+        return
+
+    columns = list(rows[0])
+    query = 'INSERT INTO `{table_name}` ({columns}) VALUES ({values});'.format(
+        table_name=table_name,
+        columns=', '.join(f'`{column}`' for column in columns),
+        values=', '.join(f'%({column})s' for column in columns)
+    )
+
+    async with connection.cursor() as cursor:
+        await cursor.executemany(query, rows)
+
+
+async def _copy_user_rows(source_connection: aiomysql.Connection, target_connection: aiomysql.Connection,
+                          user_id: int, copied_ids: dict[str, set[int]]
+                          ) -> None:
+    """ Copy rows of the user (that were not copied yet) from source shard to target shard in one transaction """
+    rows_for_copying = {}
+    for table_name in ('note_rubrics', 'notes'):
+        rows = await _fetch_user_rows(source_connection, table_name, user_id)
+        rows_for_copying[table_name] = [row for row in rows if row['id'] not in copied_ids[table_name]]
+
+    await target_connection.begin()
+    try:
+        # parent table first
+        for table_name in ('note_rubrics', 'notes'):
+            await _insert_rows(target_connection, table_name, rows_for_copying[table_name])
+    except Exception:
+        await target_connection.rollback()
+        raise
+    else:
+        await target_connection.commit()
+
+    for table_name, rows in rows_for_copying.items():
+        copied_ids[table_name].update(row['id'] for row in rows)
+
+
+async def _delete_copied_rows(connection: aiomysql.Connection, user_id: int, copied_ids: dict[str, set[int]]) -> None:
+    """ Delete copied rows of the user from source shard (rubrics of the not copied notes are kept) """
+    async with connection.cursor() as cursor:
+        # child table first
+        if copied_ids['notes']:
+            query = 'DELETE FROM `notes` WHERE `user_id` = %(user_id)s AND `id` IN %(ids)s;'
+            await cursor.execute(query, {'user_id': user_id, 'ids': tuple(copied_ids['notes'])})
+
+        # rubric deleting cascades notes - so, rubric of the note that was not copied yet is kept
+        if copied_ids['note_rubrics']:
+            query = """
+                DELETE FROM `note_rubrics`
+                WHERE
+                    `user_id` = %(user_id)s
+                    AND `id` IN %(ids)s
+                    AND `id` NOT IN (
+                        SELECT `rubric_id` FROM `notes` WHERE `user_id` = %(user_id)s AND `rubric_id` IS NOT NULL
+                    );
+            """
+            await cursor.execute(query, {'user_id': user_id, 'ids': tuple(copied_ids['note_rubrics'])})
+
+
+async def move_user_notes(main_connection: aiomysql.Connection,
+                          source_connection: aiomysql.Connection, target_connection: aiomysql.Connection,
+                          user_id: int, target_shard_id: int
+                          ) -> None:
+    """
+    Move user notes (and note rubrics) from source shard to target shard.
+
+    Steps:
+        1. copy rows of the user in the target shard (ids are kept - they are unique between shards);
+        2. switch placement of the user in the directory and invalidate cached placement
+           (new requests work with the target shard);
+        3. copy rows that were created in the source shard while step 1 was executing;
+        4. delete copied rows of the user from the source shard (only copied ids);
+        5. copy and delete rows that were created in the source shard after step 3
+           (by requests that resolved the old placement just before the switch), rows that are left are logged.
+
+    Edits of the already copied rows made during moving are lost - so, it is better to move inactive users.
+    Edits and rows of the requests that resolved the old placement and write in the source shard after step 5
+    are left in the source shard (they are not shown) - such rows are found by the final check and logged.
+
+    :param main_connection: main db connection (directory is stored there)
+    :type main_connection: aiomysql.Connection
+    :param source_connection: connection of the shard that currently stores user notes
+    :type source_connection: aiomysql.Connection
+    :param target_connection: connection of the shard that will store user notes
+    :type target_connection: aiomysql.Connection
+    :param user_id: user id
+    :type user_id: int
+    :param target_shard_id: target shard id
+    :type target_shard_id: int
+
+    :return: None
+    :rtype: None
+    """
+
+    copied_ids = {
+        'note_rubrics': set(),
+        'notes': set()
+    }
+
+    await _copy_user_rows(source_connection, target_connection, user_id, copied_ids)
+
+    query = """
+        INSERT INTO `notes_shards_directory` (`user_id`, `shard_id`)
+        VALUES (%(user_id)s, %(shard_id)s)
+        ON DUPLICATE KEY UPDATE `shard_id` = %(shard_id)s
+        ;
+    """
+    params = {
+        'user_id': user_id,
+        'shard_id': target_shard_id
+    }
+
+    async with main_connection.cursor() as cursor:
+        await cursor.execute(query, params)
+
+    # workers route new requests by the new placement
+    await invalidation.invalidate(invalidation.tag(invalidation.NOTES_SHARD, user_id))
+
+    await _copy_user_rows(source_connection, target_connection, user_id, copied_ids)
+    await _delete_copied_rows(source_connection, user_id, copied_ids)
+
+    # rows that were inserted in the source shard after the last copy
+    await _copy_user_rows(source_connection, target_connection, user_id, copied_ids)
+    await _delete_copied_rows(source_connection, user_id, copied_ids)
+
+    left_rows = {
+        table_name: [row['id'] for row in await _fetch_user_rows(source_connection, table_name, user_id)]
+        for table_name in ('note_rubrics', 'notes')
+    }
+    if any(left_rows.values()):
+        logger.warning(
+            f'Rows of the user [{user_id}] were written in the source shard while notes were moving '
+            f'- they are left there: {left_rows}'
+        )
+
+    logger.info(
+        f'Notes of the user [{user_id}] have been moved in the shard [{target_shard_id}]! '
+        f'Note rubrics: {len(copied_ids["note_rubrics"])}, notes: {len(copied_ids["notes"])}'
+    )
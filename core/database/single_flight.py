@@ -0,0 +1,238 @@
+"""
+Contains single-flight coalescing of the identical concurrent db reads.
+
+Concurrent callers of the db read with the same arguments share one in-flight call:
+the first caller (leader) executes query, other callers (followers) wait for its result (or exception).
+Results are shared between callers - so, callers must not change them.
+
+Caches that store the shared result bind their versions (check `bind_versions`) - calls are coalesced
+only with the calls of the same versions. So, caller that started after invalidation does not get (and store)
+the result of the call that started before invalidation.
+
+.. class:: SingleFlight
+    Implements coalescing of the concurrent calls by key
+
+.. decorator:: coalesce(db_function: Callable) -> Callable
+    Coalesce concurrent calls of the db function (by arguments after connection)
+
+.. function:: bind_versions(*versions: Hashable) -> ContextManager[None]
+    Coalesce calls within the block only with calls of the same versions
+.. function:: freeze(value: Any) -> Hashable
+    Return hashable representation of the argument
+.. function:: get_stats() -> dict[str, dict[str, int]]
+    Return statistics of the coalesced calls
+.. function:: log_stats(app: aiohttp.web.Application) -> None
+    Log statistics of the coalesced calls
+"""
+
+import asyncio
+import contextlib
+import contextvars
+from functools import wraps
+import logging
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    ContextManager,
+    Hashable
+)
+
+import aiohttp.web
+import aiomysql
+import pydantic
+
+
+logger = logging.getLogger(__name__)
+
+
+# versions of the caches that store result of the call (they are the part of the call key)
+_call_versions: contextvars.ContextVar[tuple] = contextvars.ContextVar('call_versions', default=())
+
+
+class SingleFlight:
+    """ Implements coalescing of the concurrent calls by key """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+        # key: future of the in-flight call
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Execute call or wait for the in-flight call with the same key (and the same bound versions).
+
+        If leader call was cancelled - the first follower executes own call, other followers wait for it.
+
+        :param key: call key
+        :type key: Hashable
+        :param call: async function without arguments
+        :type call: Callable[[], Awaitable[Any]]
+
+        :return: call result
+        :rtype: Any
+        """
+
+        key = (key, _call_versions.get())
+
+        future = self._calls.get(key)
+        while future is not None:
+            self.coalesced += 1
+            try:
+                # follower cancellation must not cancel shared call
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+            # leader was cancelled - call of the first resumed follower is shared
+            future = self._calls.get(key)
+
+        self.calls += 1
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+
+        try:
+            result = await call()
+        except Exception as error:
+            future.set_exception(error)
+            # mark exception as retrieved (it is raised to leader anyway)
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if not future.done():
+                future.cancel()
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Return statistics of the calls.
+
+        :return: statistics
+        :rtype: dict[str, int]
+        """
+
+        stats = {
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._calls)
+        }
+
+        return stats
+
+
+# single flights of the decorated db functions
+_single_flights: list[SingleFlight] = []
+
+
+@contextlib.contextmanager
+def bind_versions(*versions: Hashable) -> ContextManager[None]:
+    """
+    Coalesce calls within the block only with calls of the same versions (of the caches that store results).
+
+    :param versions: versions of the caches (e.g. pairs (cache name, cache version))
+    :type versions: Hashable
+
+    :return: context manager
+    :rtype: ContextManager[None]
+    """
+
+    token = _call_versions.set(_call_versions.get() + versions)
+    try:
+        yield
+    finally:
+        _call_versions.reset(token)
+
+
+def freeze(value: Any) -> Hashable:
+    """
+    Return hashable representation of the argument (validated params models are unhashable).
+
+    :param value: argument
+    :type value: Any
+
+    :return: hashable representation
+    :rtype: Hashable
+    """
+
+    if isinstance(value, pydantic.BaseModel):
+        return type(value).__name__, freeze(value.dict())
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (set, frozenset)):
+        # order of the set items differs between processes
+        return tuple(sorted((freeze(item) for item in value), key=repr))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+
+    return value
+
+
+def coalesce(db_function: Callable) -> Callable:
+    """
+    Coalesce concurrent calls of the db function (key - arguments after connection).
+
+    :param db_function: db read function
+    :type db_function: Callable
+
+    :return: inner function
+    :rtype: Callable
+    """
+
+    single_flight = SingleFlight(db_function.__name__)
+    _single_flights.append(single_flight)
+
+    @wraps(db_function)
+    async def inner(connection: aiomysql.Connection, *args: Any, **kwargs: Any) -> Any:
+        """
+        Return result of the in-flight call with the same arguments (or execute db function).
+
+        :param connection: db connection
+        :type connection: aiomysql.Connection
+        :param args: other arguments that were passed to db function
+        :type args: Any
+        :param kwargs: keyword arguments that were passed to db function
+        :type kwargs: Any
+
+        :return: db function result
+        :rtype: Any
+        """
+
+        key = (freeze(args), freeze(kwargs))
+
+        return await single_flight.do(key, lambda: db_function(connection, *args, **kwargs))
+
+    return inner
+
+
+def get_stats() -> dict[str, dict[str, int]]:
+    """
+    Return statistics of the coalesced calls (by db function name).
+
+    :return: statistics
+    :rtype: dict[str, dict[str, int]]
+    """
+
+    return {single_flight.name: single_flight.stats for single_flight in _single_flights}
+
+
+async def log_stats(app: aiohttp.web.Application) -> None:
+    """
+    Log statistics of the coalesced calls (on app shut).
+
+    :param app: instance of the web application
+    :type app: aiohttp.web.Application
+
+    :return: None
+    :rtype: None
+    """
+
+    logger.info(f'Single-flight statistics: {get_stats()}')
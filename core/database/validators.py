@@ -29,6 +29,8 @@ Contains validation models.
     Implement validation model
 .. class:: NoteEditing(pydantic.BaseModel)
     Implement validation model
+.. class:: CachePurging(pydantic.BaseModel)
+    Implement validation model
 .. class:: PostUrlParams(pydantic.BaseModel)
     Implement validation model
 .. class:: NoteUrlParams(pydantic.BaseModel)
@@ -52,6 +54,7 @@ from typing import (
 
 import pydantic
 
+from . import invalidation
 from ..settings import (
     DEFAULT_POSTS_ON_PAGE,
     DEFAULT_NOTES_ON_PAGE
@@ -186,17 +189,38 @@ class NoteEditing(pydantic.BaseModel):
     _convert_empty_values = pydantic.validator('rubric_id', allow_reuse=True, pre=True)(convert_empty_value)
 
 
+class CachePurging(pydantic.BaseModel):
+    tags: list[str] = pydantic.fields.Field(min_items=1)
+
+    @pydantic.validator('tags', pre=True)
+    def split_tags(cls, tags):
+        # tags are separated by spaces (or commas)
+        if isinstance(tags, str):
+            return tags.replace(',', ' ').split()
+
+        return tags
+
+    @pydantic.validator('tags', each_item=True)
+    def is_known_tag(cls, tag_):
+        kind, id_ = invalidation.parse_tag(tag_)
+
+        if tag_ == invalidation.ALL or (kind in invalidation.KINDS and (id_ is not None or ':' not in tag_)):
+            return tag_
+
+        raise ValueError(f'unknown tag {tag_}; expected: `kind` or `kind:id` or `{invalidation.ALL}`')
+
+
 class PostUrlParams(pydantic.BaseModel):
-    page: Optional[int] = pydantic.fields.Field(alias='page_number', default=1)
-    quantity: Optional[int] = pydantic.fields.Field(alias='rows_quantity', default=DEFAULT_POSTS_ON_PAGE)
+    page: Optional[int] = pydantic.fields.Field(alias='page_number', default=1, ge=1)
+    quantity: Optional[int] = pydantic.fields.Field(alias='rows_quantity', default=DEFAULT_POSTS_ON_PAGE, ge=1)
     rubric: Optional[int] = pydantic.fields.Field(alias='rubric_id')
     keyword: Optional[str] = pydantic.fields.Field(alias='search_word')
     thinker: Optional[int] = pydantic.fields.Field(alias='user_id')
 
 
 class NoteUrlParams(pydantic.BaseModel):
-    page: Optional[int] = pydantic.fields.Field(alias='page_number', default=1)
-    quantity: Optional[int] = pydantic.fields.Field(alias='rows_quantity', default=DEFAULT_NOTES_ON_PAGE)
+    page: Optional[int] = pydantic.fields.Field(alias='page_number', default=1, ge=1)
+    quantity: Optional[int] = pydantic.fields.Field(alias='rows_quantity', default=DEFAULT_NOTES_ON_PAGE, ge=1)
     rubric: Optional[int] = pydantic.fields.Field(alias='rubric_id')
     keyword: Optional[str] = pydantic.fields.Field(alias='search_word')
 
@@ -15,8 +15,22 @@ import aiohttp_session
 import aiohttp_jinja2
 import jinja2
 
+from .cache.counts import init_counts_cache, close_counts_cache
+from .cache.edge_purge import init_edge_purger, close_edge_purger
+from .cache.hot_pages import init_hot_pages_cache, close_hot_pages_cache
+from .cache.page_cache import init_page_cache, close_page_cache
+from .cache.post_rubrics import init_post_rubrics_snapshot, close_post_rubrics_snapshot
+from .cache.records import init_records_cache, close_records_cache
+from .cache.search import init_search_cache, close_search_cache
+from .cache.tiered import init_tiered_cache, close_tiered_cache
+from .cache.warm_up import warm_up_caches
+from .database.invalidation_bus import init_invalidation_bus, close_invalidation_bus
 from .database.mysql import init_mysql, close_mysql
+from .database.redis import init_redis, close_redis
+from .database.sharding import init_notes_shards, close_notes_shards
+from .database.single_flight import log_stats as log_single_flight_stats
 from .middlewares import (
+    create_cache_control_middleware,
     create_session_redis_storage,
     setup_middlewares
 )
@@ -50,15 +64,60 @@ async def init_app() -> aiohttp.web.Application:
     app.on_startup.append(init_mysql)
     app.on_cleanup.append(close_mysql)
 
+    # create notes shards connections on startup (after db connection), shutdown on exit
+    app.on_startup.append(init_notes_shards)
+    app.on_cleanup.append(close_notes_shards)
+
+    # log statistics of the coalesced db reads on exit
+    app.on_cleanup.append(log_single_flight_stats)
+
+    # register in-process records caches invalidation on startup, unregister on exit
+    app.on_startup.append(init_records_cache)
+    app.on_cleanup.append(close_records_cache)
+
+    # register in-process counts cache invalidation on startup, unregister on exit
+    app.on_startup.append(init_counts_cache)
+    app.on_cleanup.append(close_counts_cache)
+
+    # register in-process search cache invalidation on startup, unregister on exit
+    app.on_startup.append(init_search_cache)
+    app.on_cleanup.append(close_search_cache)
+
+    # create in-process hot pages cache on startup (after db connection), stop its refreshes on exit
+    app.on_startup.append(init_hot_pages_cache)
+    app.on_cleanup.append(close_hot_pages_cache)
+
+    # create redis connection (for caches) and caches on startup, shutdown on exit
+    app.on_startup.append(init_redis)
+    app.on_startup.append(init_invalidation_bus)
+    app.on_startup.append(init_page_cache)
+    app.on_startup.append(init_tiered_cache)
+    app.on_startup.append(init_post_rubrics_snapshot)
+    app.on_cleanup.append(close_post_rubrics_snapshot)
+
+    # create purger of the shared HTTP caches on startup (if they are set), send pending purges on exit
+    app.on_startup.append(init_edge_purger)
+    app.on_cleanup.append(close_edge_purger)
+    app.on_cleanup.append(close_tiered_cache)
+    app.on_cleanup.append(close_page_cache)
+    app.on_cleanup.append(close_invalidation_bus)
+    app.on_cleanup.append(close_redis)
+
     # setup views and routes
     setup_routes(app)
 
     # setup middlewares
+    # cache control middleware is the outermost - it sees cookies that are set by session middleware
+    app.middlewares.append(create_cache_control_middleware())
+
     session_redis_storage = await create_session_redis_storage()
     aiohttp_session.setup(app, session_redis_storage)
 
     setup_middlewares(app)
 
+    # warm up caches on startup (after all caches are set) - before the worker accepts traffic
+    app.on_startup.append(warm_up_caches)
+
     return app
 
 
@@ -3,12 +3,17 @@ Contains middlewares that wrap server work.
 
 .. function:: create_error_middleware(overrides) -> Callable
     create error middleware
-.. function:: create_session_redis_storage() -> RedisStorage
+.. function:: create_session_redis_storage() -> LazyRedisStorage
     create session redis storage
 .. function:: create_log_middleware() -> Callable
     create log middleware
+.. function:: create_cache_control_middleware() -> Callable
+    create cache control middleware
 .. function:: setup_middlewares(app: aiohttp.web.Application) -> None
     setup all middlewares
+
+.. const:: PUBLIC_ROUTE_NAMES
+    Names of the routes of the public pages (the same for all anonymous visitors)
 """
 
 import logging
@@ -18,22 +23,35 @@ from typing import (
 )
 
 import aiohttp.web
-from aiohttp_session.redis_storage import RedisStorage
 import aioredis
 import pymysql
 
-from .settings import REDIS_ADDRESS
+from .settings import (
+    PUBLIC_PAGES_MAX_AGE,
+    PUBLIC_PAGES_STALE_WHILE_REVALIDATE,
+    REDIS_ADDRESS,
+    SESSION_CODEC,
+    SESSION_COMPRESSION_THRESHOLD,
+    SURROGATE_KEYS_HEADER
+)
+from .cache import page_cache
+from .session_codec import create_codec
+from .session_storage import LazyRedisStorage
 from .database import db
 from .views import (
     InvalidFormDataError,
     custom_errors
 )
 from .views.auth import AuthenticationError
+from .views.auth.session import upgrade_session
 
 
 logger = logging.getLogger(__name__)
 
 
+PUBLIC_ROUTE_NAMES = frozenset(('index', 'contacts', 'posts', 'posts-id', 'posts-rubrics', 'thinker-id'))
+
+
 def create_error_middleware(overrides: dict[int, Callable]) -> Callable:
     """
     Create error middleware.
@@ -132,9 +150,74 @@ def create_error_middleware(overrides: dict[int, Callable]) -> Callable:
     return error_middleware
 
 
-async def create_session_redis_storage() -> RedisStorage:
+def create_cache_control_middleware() -> Callable:
+    """
+    Create cache control middleware (it must be the outermost middleware - it sees cookies of the session).
+
+    Responses of the public pages for anonymous visitors (GET without session cookie) are cacheable by shared caches
+    (CDN, reverse proxy) - they never carry cookies, but carry surrogate keys (tags of the page) that writes purge
+    and `Vary: Cookie` (shared caches key pages by cookies, so visitors with session get own pages).
+    Responses for visitors with session are private.
+
+    :return: middleware
+    :rtype: Callable
+    """
+
+    public_cache_control = (
+        f'public, max-age={PUBLIC_PAGES_MAX_AGE}, stale-while-revalidate={PUBLIC_PAGES_STALE_WHILE_REVALIDATE}'
+    )
+
+    @aiohttp.web.middleware
+    async def cache_control_middleware(request: aiohttp.web.Request, handler: Callable) -> Any:
+        """
+        Set `Cache-Control` of the response by route and session cookie of the request.
+
+        :param request: requests
+        :type request: aiohttp.web.Request
+        :param handler: view function
+        :type handler: Callable
+
+        :return: handler result
+        :rtype: Any
+        """
+
+        response = await handler(request)
+
+        if not isinstance(response, aiohttp.web.StreamResponse) or response.prepared:
+            return response
+
+        is_public_page = (
+            request.method in (aiohttp.hdrs.METH_GET, aiohttp.hdrs.METH_HEAD)
+            and request.match_info.route.name in PUBLIC_ROUTE_NAMES
+            and response.status in (200, 304)
+        )
+
+        if is_public_page and page_cache.is_anonymous_request(request):
+            # shared caches must not store (and replay) cookies - session that was started by this request is dropped
+            response.cookies.clear()
+            response.headers.popall(aiohttp.hdrs.SET_COOKIE, None)
+            response.headers[aiohttp.hdrs.CACHE_CONTROL] = public_cache_control
+            # shared caches must not serve the anonymous page to the visitor with session (page shows the user)
+            vary = response.headers.get(aiohttp.hdrs.VARY)
+            if vary is None:
+                response.headers[aiohttp.hdrs.VARY] = 'Cookie'
+            elif 'cookie' not in vary.lower():
+                response.headers[aiohttp.hdrs.VARY] = f'{vary}, Cookie'
+
+            surrogate_keys = page_cache.get_page_tags(request)
+            if surrogate_keys:
+                response.headers[SURROGATE_KEYS_HEADER] = ' '.join(sorted(surrogate_keys))
+        elif not page_cache.is_anonymous_request(request):
+            response.headers[aiohttp.hdrs.CACHE_CONTROL] = 'private, no-cache'
+
+        return response
+
+    return cache_control_middleware
+
+
+async def create_session_redis_storage() -> LazyRedisStorage:
     """
-    Create session redis storage.
+    Create session redis storage (sessions of the requests without cookie are loaded without redis).
 
     For redis pool creation `await` - async function is required.
     Middleware setup moved in async `init_app` function.
@@ -147,7 +230,11 @@ async def create_session_redis_storage() -> RedisStorage:
 
     logger.info('Redis session storage has been set!')
 
-    session_redis_storage = RedisStorage(redis_pool)
+    codec_options = {'compression_threshold': SESSION_COMPRESSION_THRESHOLD} if SESSION_CODEC == 'binary' else {}
+    codec = create_codec(SESSION_CODEC, **codec_options)
+
+    # sessions of the older layouts are upgraded on loading
+    session_redis_storage = LazyRedisStorage(redis_pool, codec=codec, upgrade_session=upgrade_session)
 
     return session_redis_storage
 
@@ -130,6 +130,11 @@ def setup_routes(app: aiohttp.web.Application) -> None:
     app.router.add_get('/admin/unset/moderator/', views.UnsettingModeratorByAdmin, name='admin-unset-moderator')
     # # # POST
     app.router.add_post('/admin/unset/moderator/', views.UnsettingModeratorByAdmin)
+    # # - inspect caches
+    # # # GET
+    app.router.add_get('/admin/caches/', views.CachesInspectionByAdmin, name='admin-caches')
+    # # # POST
+    app.router.add_post('/admin/caches/', views.CachesInspectionByAdmin)
 
     # # moderator
     # # - moderate posts
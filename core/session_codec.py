@@ -0,0 +1,405 @@
+"""
+Contains codecs of the session data in Redis (pluggable into session storage).
+
+Session data is decoded and encoded on every request with session cookie.
+Binary format is the subset of MessagePack (nil, bool, int, float, str, bin, array, map) - it is smaller than JSON
+and does not need text parsing, payload over the threshold is compressed (if compression makes it smaller).
+
+Formats are versioned by the first byte of the payload, so, payloads of all formats are decoded by every codec -
+formats coexist during rollout (and rollback) of the codec:
+    `{`     - JSON document (format of the `aiohttp_session` storages)
+    `0x01`  - binary
+    `0x02`  - binary compressed by zlib
+
+.. class:: JsonCodec
+    Implements JSON codec of the session data
+.. class:: BinaryCodec
+    Implements binary codec of the session data (MessagePack subset, compression of the large payloads)
+
+.. function:: pack(value: Any) -> bytes
+    Return MessagePack representation of the value
+.. function:: unpack(payload: bytes) -> Any
+    Return value by its MessagePack representation
+.. function:: decode(payload: bytes) -> Any
+    Return session data by payload of any format
+.. function:: create_codec(name: str, **kwargs) -> Union[JsonCodec, BinaryCodec]
+    Return codec by name
+
+.. const:: BINARY_FORMAT
+    First byte of the binary payload
+.. const:: BINARY_COMPRESSED_FORMAT
+    First byte of the compressed binary payload
+.. const:: CODECS
+    Codecs classes by name
+"""
+
+import json
+import struct
+from typing import (
+    Any,
+    Union
+)
+import zlib
+
+
+BINARY_FORMAT = 0x01
+BINARY_COMPRESSED_FORMAT = 0x02
+_JSON_FORMAT = ord('{')
+
+
+def _pack(value: Any, chunks: list[bytes]) -> None:
+    """
+    Append MessagePack representation of the value to chunks.
+
+    :param value: value (None, bool, int, float, str, bytes, list, tuple, dict)
+    :type value: Any
+    :param chunks: chunks of the payload
+    :type chunks: list[bytes]
+
+    :return: None
+    :rtype: None
+
+    :raises TypeError: raised if value has not supported type
+    """
+
+    # bool is checked before int - bool is subclass of int
+    if value is None:
+        chunks.append(b'\xc0')
+    elif value is True:
+        chunks.append(b'\xc3')
+    elif value is False:
+        chunks.append(b'\xc2')
+    elif isinstance(value, int):
+        if 0 <= value < 0x80:
+            chunks.append(struct.pack('B', value))
+        elif -0x20 <= value < 0:
+            chunks.append(struct.pack('b', value))
+        elif 0 <= value <= 0xff:
+            chunks.append(struct.pack('>BB', 0xcc, value))
+        elif 0 <= value <= 0xffff:
+            chunks.append(struct.pack('>BH', 0xcd, value))
+        elif 0 <= value <= 0xffffffff:
+            chunks.append(struct.pack('>BI', 0xce, value))
+        elif 0 <= value <= 0xffffffffffffffff:
+            chunks.append(struct.pack('>BQ', 0xcf, value))
+        elif -0x80 <= value < 0:
+            chunks.append(struct.pack('>Bb', 0xd0, value))
+        elif -0x8000 <= value < 0:
+            chunks.append(struct.pack('>Bh', 0xd1, value))
+        elif -0x80000000 <= value < 0:
+            chunks.append(struct.pack('>Bi', 0xd2, value))
+        elif -0x8000000000000000 <= value < 0:
+            chunks.append(struct.pack('>Bq', 0xd3, value))
+        else:
+            raise TypeError(f'integer {value} is out of 64 bits')
+    elif isinstance(value, float):
+        chunks.append(struct.pack('>Bd', 0xcb, value))
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        _pack_header(len(data), chunks, fix_marker=0xa0, fix_limit=0x20, markers=(0xd9, 0xda, 0xdb))
+        chunks.append(data)
+    elif isinstance(value, (bytes, bytearray)):
+        _pack_header(len(value), chunks, fix_marker=None, fix_limit=0, markers=(0xc4, 0xc5, 0xc6))
+        chunks.append(bytes(value))
+    elif isinstance(value, (list, tuple)):
+        _pack_header(len(value), chunks, fix_marker=0x90, fix_limit=0x10, markers=(None, 0xdc, 0xdd))
+        for item in value:
+            _pack(item, chunks)
+    elif isinstance(value, dict):
+        _pack_header(len(value), chunks, fix_marker=0x80, fix_limit=0x10, markers=(None, 0xde, 0xdf))
+        for key, item in value.items():
+            _pack(key, chunks)
+            _pack(item, chunks)
+    else:
+        raise TypeError(f'type {type(value).__name__} is not supported by session codec')
+
+
+def _pack_header(length: int, chunks: list[bytes], *args, fix_marker: Union[int, None], fix_limit: int,
+                 markers: tuple[Union[int, None], int, int]) -> None:
+    """
+    Append header (marker and length) of the sized value to chunks.
+
+    :param length: length of the value
+    :type length: int
+    :param chunks: chunks of the payload
+    :type chunks: list[bytes]
+    :keyword fix_marker: marker of the short value (length is in the marker)
+    :type fix_marker: Union[int, None]
+    :keyword fix_limit: upper limit (exclusive) of the length of the short value
+    :type fix_limit: int
+    :keyword markers: markers of the values with 8, 16 and 32 bits length (None - length is not supported)
+    :type markers: tuple[Union[int, None], int, int]
+
+    :return: None
+    :rtype: None
+    """
+
+    marker_8, marker_16, marker_32 = markers
+
+    if length < fix_limit:
+        chunks.append(struct.pack('B', fix_marker | length))
+    elif marker_8 is not None and length <= 0xff:
+        chunks.append(struct.pack('>BB', marker_8, length))
+    elif length <= 0xffff:
+        chunks.append(struct.pack('>BH', marker_16, length))
+    else:
+        chunks.append(struct.pack('>BI', marker_32, length))
+
+
+def pack(value: Any) -> bytes:
+    """
+    Return MessagePack representation of the value.
+
+    :param value: value (None, bool, int, float, str, bytes, list, tuple, dict)
+    :type value: Any
+
+    :return: payload
+    :rtype: bytes
+
+    :raises TypeError: raised if value has not supported type
+    """
+
+    chunks = []
+    _pack(value, chunks)
+
+    return b''.join(chunks)
+
+
+# marker: (struct format, size) of the fixed size values
+_FIXED_SIZE_VALUES = {
+    0xcc: ('>B', 1), 0xcd: ('>H', 2), 0xce: ('>I', 4), 0xcf: ('>Q', 8),
+    0xd0: ('>b', 1), 0xd1: ('>h', 2), 0xd2: ('>i', 4), 0xd3: ('>q', 8),
+    0xca: ('>f', 4), 0xcb: ('>d', 8)
+}
+# marker: (kind, size of the length) of the sized values
+_SIZED_VALUES = {
+    0xd9: ('str', 1), 0xda: ('str', 2), 0xdb: ('str', 4),
+    0xc4: ('bin', 1), 0xc5: ('bin', 2), 0xc6: ('bin', 4),
+    0xdc: ('array', 2), 0xdd: ('array', 4),
+    0xde: ('map', 2), 0xdf: ('map', 4)
+}
+_LENGTH_FORMATS = {1: '>B', 2: '>H', 4: '>I'}
+
+
+def _unpack(payload: bytes, offset: int) -> tuple[Any, int]:
+    """
+    Return value that starts at the offset of the payload and offset after the value.
+
+    :param payload: payload
+    :type payload: bytes
+    :param offset: offset of the value
+    :type offset: int
+
+    :return: value and offset after the value
+    :rtype: tuple[Any, int]
+
+    :raises ValueError: raised if payload is not MessagePack (or has not supported type)
+    """
+
+    marker = payload[offset]
+    offset += 1
+
+    if marker < 0x80:
+        return marker, offset
+    if marker >= 0xe0:
+        return marker - 0x100, offset
+    if marker == 0xc0:
+        return None, offset
+    if marker in (0xc2, 0xc3):
+        return marker == 0xc3, offset
+
+    if marker in _FIXED_SIZE_VALUES:
+        value_format, size = _FIXED_SIZE_VALUES[marker]
+        return struct.unpack_from(value_format, payload, offset)[0], offset + size
+
+    if 0xa0 <= marker <= 0xbf:
+        kind, length = 'str', marker & 0x1f
+    elif 0x90 <= marker <= 0x9f:
+        kind, length = 'array', marker & 0x0f
+    elif 0x80 <= marker <= 0x8f:
+        kind, length = 'map', marker & 0x0f
+    elif marker in _SIZED_VALUES:
+        kind, length_size = _SIZED_VALUES[marker]
+        length = struct.unpack_from(_LENGTH_FORMATS[length_size], payload, offset)[0]
+        offset += length_size
+    else:
+        raise ValueError(f'marker {marker:#x} is not supported by session codec')
+
+    if kind in ('str', 'bin'):
+        data = payload[offset:offset + length]
+        if len(data) != length:
+            raise ValueError('payload is truncated')
+        return data.decode('utf-8') if kind == 'str' else data, offset + length
+
+    if kind == 'array':
+        items = []
+        for _ in range(length):
+            item, offset = _unpack(payload, offset)
+            items.append(item)
+        return items, offset
+
+    mapping = {}
+    for _ in range(length):
+        key, offset = _unpack(payload, offset)
+        mapping[key], offset = _unpack(payload, offset)
+
+    return mapping, offset
+
+
+def unpack(payload: bytes) -> Any:
+    """
+    Return value by its MessagePack representation.
+
+    :param payload: payload
+    :type payload: bytes
+
+    :return: value
+    :rtype: Any
+
+    :raises ValueError: raised if payload is not MessagePack (or has not supported type)
+    """
+
+    try:
+        value, offset = _unpack(payload, 0)
+    except (IndexError, RecursionError, TypeError, struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f'payload is not decoded: {e}')
+
+    if offset != len(payload):
+        raise ValueError('payload has extra data')
+
+    return value
+
+
+def decode(payload: bytes) -> Any:
+    """
+    Return session data by payload of any format (format is the first byte).
+
+    :param payload: payload
+    :type payload: bytes
+
+    :return: session data
+    :rtype: Any
+
+    :raises ValueError: raised if payload has unknown format (or it is broken)
+    """
+
+    if not payload:
+        raise ValueError('payload is empty')
+
+    payload_format = payload[0]
+
+    if payload_format == _JSON_FORMAT:
+        return json.loads(payload.decode('utf-8'))
+    if payload_format == BINARY_FORMAT:
+        return unpack(payload[1:])
+    if payload_format == BINARY_COMPRESSED_FORMAT:
+        try:
+            return unpack(zlib.decompress(payload[1:]))
+        except zlib.error as e:
+            raise ValueError(f'payload is not decompressed: {e}')
+
+    raise ValueError(f'payload format {payload_format:#x} is unknown')
+
+
+class JsonCodec:
+    """ Implements JSON codec of the session data """
+
+    name = 'json'
+
+    def encode(self, data: Any) -> bytes:
+        """
+        Return JSON payload of the session data.
+
+        :param data: session data
+        :type data: Any
+
+        :return: payload
+        :rtype: bytes
+        """
+
+        return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+    def decode(self, payload: bytes) -> Any:
+        """
+        Return session data by payload of any format.
+
+        :param payload: payload
+        :type payload: bytes
+
+        :return: session data
+        :rtype: Any
+        """
+
+        return decode(payload)
+
+
+class BinaryCodec:
+    """ Implements binary codec of the session data (MessagePack subset, compression of the large payloads) """
+
+    name = 'binary'
+
+    def __init__(self, compression_threshold: int = 512) -> None:
+        self.compression_threshold = compression_threshold
+
+    def encode(self, data: Any) -> bytes:
+        """
+        Return binary payload of the session data (payload over the threshold is compressed).
+
+        :param data: session data
+        :type data: Any
+
+        :return: payload
+        :rtype: bytes
+        """
+
+        packed = pack(data)
+
+        if len(packed) > self.compression_threshold:
+            compressed = zlib.compress(packed)
+            # random data is not compressed well
+            if len(compressed) < len(packed):
+                return bytes((BINARY_COMPRESSED_FORMAT,)) + compressed
+
+        return bytes((BINARY_FORMAT,)) + packed
+
+    def decode(self, payload: bytes) -> Any:
+        """
+        Return session data by payload of any format.
+
+        :param payload: payload
+        :type payload: bytes
+
+        :return: session data
+        :rtype: Any
+        """
+
+        return decode(payload)
+
+
+CODECS = {
+    JsonCodec.name: JsonCodec,
+    BinaryCodec.name: BinaryCodec
+}
+
+
+def create_codec(name: str, **kwargs) -> Union[JsonCodec, BinaryCodec]:
+    """
+    Return codec by name.
+
+    :param name: name of the codec (`json`, `binary`)
+    :type name: str
+    :param kwargs: options of the codec (compression threshold of the binary codec)
+    :type kwargs: Any
+
+    :return: codec
+    :rtype: Union[JsonCodec, BinaryCodec]
+
+    :raises ValueError: raised if codec is unknown
+    """
+
+    try:
+        codec_class = CODECS[name]
+    except KeyError:
+        raise ValueError(f'session codec {name!r} is unknown (known: {", ".join(CODECS)})')
+
+    return codec_class(**kwargs)
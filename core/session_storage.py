@@ -0,0 +1,130 @@
+"""
+Contains Redis session storage that loads sessions lazily.
+
+Most visitors are anonymous readers - they have no session cookie and their sessions are never written.
+So, session of the request without cookie is the empty new session that is created without Redis,
+session is saved in Redis (and gets cookie) only when something is written in it.
+Cookie of the session that is missing in Redis (expired) is dropped - next requests are anonymous,
+emptied session (logout, popped alert message of the visitor) is deleted from Redis together with its cookie.
+Redis commands are sent by the pool (a connection is not reserved for the request).
+Session data is encoded by the pluggable codec (check `session_codec`) - payloads of all formats are decoded.
+Loaded session is passed to the upgrade function - sessions of the older layouts are upgraded (and saved) on loading.
+
+.. class:: LazyRedisStorage
+    Implements Redis session storage with lazy session loading
+"""
+
+import logging
+from typing import (
+    Callable,
+    Optional,
+    Union
+)
+
+import aiohttp.web
+import aiohttp_session
+from aiohttp_session.redis_storage import RedisStorage
+import aioredis
+
+from .session_codec import (
+    BinaryCodec,
+    JsonCodec
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class LazyRedisStorage(RedisStorage):
+    """ Implements Redis session storage with lazy session loading (without Redis for requests without cookie) """
+
+    def __init__(self, redis_pool: aioredis.Redis, *args, codec: Union[JsonCodec, BinaryCodec, None] = None,
+                 upgrade_session: Optional[Callable[[aiohttp_session.Session], None]] = None, **kwargs) -> None:
+        super().__init__(redis_pool, *args, **kwargs)
+        self._codec = codec if codec is not None else JsonCodec()
+        self._upgrade_session = upgrade_session
+
+    def _build_key(self, identity: str) -> str:
+        """
+        Return Redis key of the session.
+
+        :param identity: session identity (cookie value)
+        :type identity: str
+
+        :return: Redis key
+        :rtype: str
+        """
+
+        return self.cookie_name + '_' + identity
+
+    async def load_session(self, request: aiohttp.web.Request) -> aiohttp_session.Session:
+        """
+        Load session of the request (Redis is not used if request has no session cookie).
+
+        :param request: request
+        :type request: aiohttp.web.Request
+
+        :return: session
+        :rtype: aiohttp_session.Session
+        """
+
+        cookie = self.load_cookie(request)
+        if cookie is None:
+            return aiohttp_session.Session(None, data=None, new=True, max_age=self.max_age)
+
+        identity = str(cookie)
+        data = await self._redis.get(self._build_key(identity))
+        if data is None:
+            # cookie of the expired session is dropped - session is saved (cookie is deleted) as emptied session
+            session = aiohttp_session.Session(identity, data=None, new=False, max_age=self.max_age)
+            session.changed()
+            return session
+
+        try:
+            data = self._codec.decode(data)
+        except ValueError:
+            logger.warning(f'Session {identity} is not decoded - it is dropped')
+            # session is saved as emptied session - Redis key and cookie are deleted
+            session = aiohttp_session.Session(identity, data=None, new=False, max_age=self.max_age)
+            session.changed()
+            return session
+
+        session = aiohttp_session.Session(identity, data=data, new=False, max_age=self.max_age)
+        if self._upgrade_session is not None:
+            self._upgrade_session(session)
+
+        return session
+
+    async def save_session(self, request: aiohttp.web.Request, response: aiohttp.web.StreamResponse,
+                           session: aiohttp_session.Session) -> None:
+        """
+        Save changed session (emptied session is deleted from Redis with its cookie).
+
+        :param request: request
+        :type request: aiohttp.web.Request
+        :param response: response
+        :type response: aiohttp.web.StreamResponse
+        :param session: session
+        :type session: aiohttp_session.Session
+
+        :return: None
+        :rtype: None
+        """
+
+        identity = session.identity
+
+        if session.empty:
+            if identity is not None:
+                self.save_cookie(response, '', max_age=session.max_age)
+                await self._redis.delete(self._build_key(str(identity)))
+            # new session without data is not created
+            return
+
+        if identity is None:
+            identity = self._key_factory()
+        identity = str(identity)
+        self.save_cookie(response, identity, max_age=session.max_age)
+
+        data = self._codec.encode(self._get_session_data(session))
+        expire = session.max_age if session.max_age is not None else 0
+        await self._redis.set(self._build_key(identity), data, expire=expire)
@@ -15,6 +15,9 @@ Contains settings data (paths, config).
 .. data:: DB_PASSWORD
 .. data:: DB_HOST
 .. data:: DB_PORT
+.. data:: DB_POOL_MINSIZE
+
+.. data:: NOTES_SHARDS_ADDRESSES
 
 .. data:: REDIS_HOST
 .. data:: REDIS_PORT
@@ -24,7 +27,65 @@ Contains settings data (paths, config).
 
 .. data:: DEFAULT_POSTS_ON_PAGE
 .. data:: DEFAULT_NOTES_ON_PAGE
+.. data:: THINKER_PAGE_POSTS_QUANTITY
 .. data:: DEFAULT_PAGE_NUMBERS_SEPARATOR
+.. data:: DEFAULT_MANY_PAGES_LABEL
+
+.. data:: APPROXIMATE_COUNT_THRESHOLD
+
+.. data:: MAX_POSTS_ON_PAGE
+.. data:: MAX_NOTES_ON_PAGE
+.. data:: MAX_PAGE_OFFSET
+.. data:: MAX_SEARCH_WORD_LENGTH
+.. data:: SEARCH_COST_FACTOR
+.. data:: MAX_REQUEST_COST
+
+.. data:: SESSION_CODEC
+.. data:: SESSION_COMPRESSION_THRESHOLD
+
+.. data:: PUBLIC_PAGES_MAX_AGE
+.. data:: PUBLIC_PAGES_STALE_WHILE_REVALIDATE
+.. data:: SURROGATE_KEYS_HEADER
+.. data:: EDGE_CACHE_PURGE_ENDPOINTS
+.. data:: EDGE_CACHE_PURGE_HEADER
+.. data:: EDGE_CACHE_PURGE_BATCH_DELAY
+.. data:: EDGE_CACHE_PURGE_BATCH_MAXSIZE
+.. data:: EDGE_CACHE_PURGE_RETRIES
+.. data:: EDGE_CACHE_PURGE_TIMEOUT
+
+.. data:: XFETCH_BETA
+.. data:: PAGE_CACHE_TTL
+.. data:: RECORDS_CACHE_TTL
+.. data:: RECORDS_CACHE_MAXSIZE
+.. data:: NOTE_RUBRICS_CACHE_TTL
+.. data:: NOTE_RUBRICS_CACHE_MAXSIZE
+.. data:: SHARD_PLACEMENT_CACHE_TTL
+.. data:: SHARD_PLACEMENT_CACHE_MAXSIZE
+.. data:: MISSING_RECORDS_CACHE_TTL
+.. data:: MISSING_RECORDS_CACHE_MAXSIZE
+.. data:: HOT_PAGES_CACHE_TTL
+.. data:: HOT_PAGES_MAX_STALENESS
+.. data:: COUNTS_CACHE_TTL
+.. data:: COUNTS_CACHE_MAXSIZE
+.. data:: TIERED_CACHE_L1_TTL
+.. data:: TIERED_CACHE_L1_MAXSIZE
+.. data:: TIERED_CACHE_COMPRESSION_THRESHOLD
+.. data:: POST_RUBRIC_CACHE_TTL
+.. data:: MODERATORS_CACHE_TTL
+.. data:: SEARCH_CACHE_TTL
+.. data:: SEARCH_CACHE_MAXSIZE
+.. data:: SEARCH_CACHE_RESULTS_LIMIT
+.. data:: POPULAR_QUERIES_MAXSIZE
+.. data:: POPULAR_QUERIES_REPORT_LIMIT
+
+.. data:: CACHE_INSPECTION_HOTTEST_KEYS
+.. data:: CACHE_INSPECTION_MEMORY_SAMPLE
+
+.. data:: WARM_UP_TIME_BUDGET
+.. data:: WARM_UP_POSTS_PAGES
+.. data:: WARM_UP_SEARCHES
+
+.. data:: INVALIDATION_BUS_SUBSCRIBE_TIMEOUT
 """
 
 import os
@@ -52,6 +113,16 @@ DB_USER = os.getenv('DB_USER')
 DB_PASSWORD = os.getenv('DB_PASSWORD')
 DB_HOST = os.getenv('DB_HOST')
 DB_PORT = int(os.getenv('DB_PORT')) if os.getenv('DB_PORT') else None
+# connections that are opened on startup (before the worker accepts traffic)
+DB_POOL_MINSIZE = int(os.getenv('DB_POOL_MINSIZE', 5))
+
+# MySQL instances that store notes (and note rubrics) - comma separated pairs `host:port`
+# (shards use the same db name and credentials as the main db)
+# if it is not set - notes are stored in the main db
+NOTES_SHARDS_ADDRESSES = [
+    (host, int(port))
+    for host, port in (address.strip().rsplit(':', 1) for address in os.getenv('NOTES_SHARDS').split(','))
+] if os.getenv('NOTES_SHARDS') else []
 
 REDIS_HOST = os.getenv('REDIS_HOST')
 REDIS_PORT = int(os.getenv('REDIS_PORT')) if os.getenv('REDIS_PORT') else None
@@ -65,6 +136,99 @@ WEBSITE_ADMIN_PASSWORD = os.getenv('WEBSITE_ADMIN_PASSWORD')
 # default values for entire project
 DEFAULT_POSTS_ON_PAGE = 10
 DEFAULT_NOTES_ON_PAGE = 25
+# the latest posts of the user on the thinker page
+THINKER_PAGE_POSTS_QUANTITY = 5
 
 DEFAULT_PAGE_NUMBERS_SEPARATOR = '...'
+DEFAULT_MANY_PAGES_LABEL = 'many pages'
+
+# rows are counted exactly up to this threshold (for pagination), over threshold - quantity is approximate
+APPROXIMATE_COUNT_THRESHOLD = 10_000
+
+# request cost guardrails (limits of the list pages url params)
+MAX_POSTS_ON_PAGE = 100
+MAX_NOTES_ON_PAGE = 100
+# rows skipped before the page (page number * quantity)
+MAX_PAGE_OFFSET = 10_000
+MAX_SEARCH_WORD_LENGTH = 100
+# cost is estimated in rows that db reads for the page: (offset + quantity) [* factor for full text search]
+SEARCH_COST_FACTOR = 4
+MAX_REQUEST_COST = 20_000
+
+# codec of the session data in Redis (`json`, `binary`) - sessions of both formats are decoded by every codec,
+# so, codec is switched after all workers are updated; binary payload is compressed over threshold (bytes)
+# (binary payloads are smaller, but pure python codec is slower than json - check `benchmarks.session_codec`)
+SESSION_CODEC = os.getenv('SESSION_CODEC', 'json')
+SESSION_COMPRESSION_THRESHOLD = 512
+
+# HTTP caching of the public pages for anonymous visitors by shared caches (CDN, reverse proxy), in seconds
+PUBLIC_PAGES_MAX_AGE = int(os.getenv('PUBLIC_PAGES_MAX_AGE', 60))
+PUBLIC_PAGES_STALE_WHILE_REVALIDATE = int(os.getenv('PUBLIC_PAGES_STALE_WHILE_REVALIDATE', 300))
+# response header of the surrogate keys of the public pages (tags of the data that page shows)
+SURROGATE_KEYS_HEADER = os.getenv('SURROGATE_KEYS_HEADER', 'Surrogate-Key')
+# purging of the public pages in shared caches by surrogate keys (tags of the pages) on writes:
+# urls that get `PURGE` requests (separated by commas, empty - no shared caches), header of the purged keys,
+# batching (delay in seconds and quantity of the keys of one request), retries, timeout of the request (seconds)
+EDGE_CACHE_PURGE_ENDPOINTS = [
+    url.strip() for url in os.getenv('EDGE_CACHE_PURGE_ENDPOINTS', '').split(',') if url.strip()
+]
+EDGE_CACHE_PURGE_HEADER = os.getenv('EDGE_CACHE_PURGE_HEADER', 'Surrogate-Key')
+EDGE_CACHE_PURGE_BATCH_DELAY = 0.5
+EDGE_CACHE_PURGE_BATCH_MAXSIZE = 100
+EDGE_CACHE_PURGE_RETRIES = 3
+EDGE_CACHE_PURGE_TIMEOUT = 5
+
+# caches (ttl in seconds)
+# factor of the probabilistic early expiration of the cached entries (> 1 - earlier, < 1 - later)
+XFETCH_BETA = 1.0
+# # rendered pages for anonymous visitors
+PAGE_CACHE_TTL = 60
+# # posts and notes in the worker memory (fetched by id), maxsize - quantity of the records
+RECORDS_CACHE_TTL = 30
+RECORDS_CACHE_MAXSIZE = 1_000
+# # note rubrics of the active users in the worker memory, maxsize - quantity of the users
+NOTE_RUBRICS_CACHE_TTL = 600
+NOTE_RUBRICS_CACHE_MAXSIZE = 1_000
+# # shards of the users notes in the worker memory (notes shards directory), maxsize - quantity of the users
+SHARD_PLACEMENT_CACHE_TTL = 300
+SHARD_PLACEMENT_CACHE_MAXSIZE = 10_000
+# # ids of the missing posts and users (404 scans)
+MISSING_RECORDS_CACHE_TTL = 10
+MISSING_RECORDS_CACHE_MAXSIZE = 100_000
+# # first pages of the posts feed (and rubrics) in the worker memory,
+# # expired data is served while it is refreshing (but not longer than max staleness after expiration)
+HOT_PAGES_CACHE_TTL = 5
+HOT_PAGES_MAX_STALENESS = 60
+# # rows quantities (pagination totals) by filters in the worker memory
+COUNTS_CACHE_TTL = 60
+COUNTS_CACHE_MAXSIZE = 10_000
+# # db reads in two tiers: worker memory (L1, maxsize - quantity of the entries of the namespace) and Redis (L2),
+# # L1 ttl is the upper limit of the L1 ttl of the namespace, values are compressed over threshold (bytes)
+TIERED_CACHE_L1_TTL = 10
+TIERED_CACHE_L1_MAXSIZE = 1_000
+TIERED_CACHE_COMPRESSION_THRESHOLD = 1_024
+# # # namespaces (L2 ttl)
+POST_RUBRIC_CACHE_TTL = 600
+MODERATORS_CACHE_TTL = 600
+# # ids of the found posts by normalized search query in the worker memory,
+# # results limit - quantity of the cached ids of the query
+SEARCH_CACHE_TTL = 300
+SEARCH_CACHE_MAXSIZE = 1_000
+SEARCH_CACHE_RESULTS_LIMIT = 200
+# searched keywords counters (quantity of the kept keywords and of the reported popular keywords)
+POPULAR_QUERIES_MAXSIZE = 10_000
+POPULAR_QUERIES_REPORT_LIMIT = 20
+
+# caches inspection (quantity of the reported hottest keys and of the entries that memory is estimated by)
+CACHE_INSPECTION_HOTTEST_KEYS = 10
+CACHE_INSPECTION_MEMORY_SAMPLE = 100
+
+# caches warm-up on startup (time budget in seconds)
+WARM_UP_TIME_BUDGET = int(os.getenv('WARM_UP_TIME_BUDGET', 10))
+WARM_UP_POSTS_PAGES = 3
+# the most popular searches
+WARM_UP_SEARCHES = 10
+
+# invalidation bus (seconds that startup waits for the first subscription)
+INVALIDATION_BUS_SUBSCRIBE_TIMEOUT = int(os.getenv('INVALIDATION_BUS_SUBSCRIBE_TIMEOUT', 10))
 # - - -
@@ -3,4 +3,7 @@ Contains modules that implement all view logic.
 """
 
 # import errors from modules to package scope
-from .errors import InvalidFormDataError
+from .errors import (
+    InvalidFormDataError,
+    RequestCostError
+)
@@ -23,7 +23,10 @@ from .. import (
     utils
 )
 from ... import security
-from ...database import db
+from ...database import (
+    db,
+    sharding
+)
 
 
 class AuthenticationError(UserAccessError):
@@ -105,13 +108,14 @@ async def authenticate_note_rubric_owner(request: aiohttp.web.Request, note_rubr
     :raises aiohttp.web.HTTPBadRequest: if process work with nonexistence db record
     """
 
-    async with request.app['db'].acquire() as connection:
+    session_user_id = await helpers.get_user_id_from_session(request)
+
+    # only the shard of the session user might store the owned note rubric
+    async with sharding.acquire_notes_connection(request.app, session_user_id) as connection:
         note_rubric = await db.fetch_one_note_rubric(connection, note_rubric_id)
 
     note_rubric_owner_id = note_rubric['user_id']
 
-    session_user_id = await helpers.get_user_id_from_session(request)
-
     if note_rubric_owner_id != session_user_id:
         raise AuthenticationError
 
@@ -135,13 +139,14 @@ async def authenticate_note_owner(request: aiohttp.web.Request, note_id: int) ->
     :raises aiohttp.web.HTTPBadRequest: if process work with nonexistence db record
     """
 
-    async with request.app['db'].acquire() as connection:
+    session_user_id = await helpers.get_user_id_from_session(request)
+
+    # only the shard of the session user might store the owned note
+    async with sharding.acquire_notes_connection(request.app, session_user_id) as connection:
         note = await db.fetch_one_note(connection, note_id)
 
     note_owner_id = note['user_id']
 
-    session_user_id = await helpers.get_user_id_from_session(request)
-
     if note_owner_id != session_user_id:
         raise AuthenticationError
 
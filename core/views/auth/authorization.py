@@ -33,6 +33,7 @@ import aiomysql
 
 from . import user_groups
 from .errors import UserAccessError
+from .session import build_session_user
 from ... import security
 from ...database import (
     db,
@@ -170,16 +171,11 @@ async def authorize_user(connection: aiomysql.Connection, request: aiohttp.web.R
             message = 'the wrong password given'
             raise AuthorizationError(message)
 
-    # user data will be saved in the session -> so, the password removed from this data
-    del user_db_data['password']
+    # set user identity and grant in new session (profile data is not kept in the session)
+    user_group_id = _get_user_group_id(user_db_data)
 
-    # set user data in new session
     session = await aiohttp_session.new_session(request)
-    session['user'] = user_db_data
-
-    # set user grant in the session
-    user_group_id = _get_user_group_id(user_db_data)
-    session['user']['group_id'] = user_group_id
+    session['user'] = build_session_user(user_db_data, user_group_id)
 
 
 async def logout_user(request: aiohttp.web.Request) -> None:
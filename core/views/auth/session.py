@@ -4,29 +4,38 @@ Contains functions (and decorators) that control work with user data in session.
 Session structure:
     session = {
         'user': {
-            # db data
+            # identity (profile data is fetched on demand - cached thinker data)
             'id'            : int
             'login'         : str
-            'about_me'      : str
-            'image_path'    : str
-            'is_admin'      : int(0,1)
-            'is_moderator'  : int(0,1)
-            # created on authorization
-            'group'         : Type[user_groups.UserGroup]
+            # created on authorization - id of the user group
+            'group_id'      : int
+            # version of the session user layout
+            'version'       : int
         }
         ...
     }
 
+Sessions of the older layouts (whole db row of the user) are upgraded on loading - users are not logged out.
+
 .. decorator:: def user_group_access_required(handler: Callable = None, *args, user_group: Type[user_groups.UserGroup]
         ) -> Callable
     Verify user group
 
+.. function:: build_session_user(user_data: dict, user_group_id: int) -> dict[str, Union[int, str]]
+    Return user data of the session
+.. function:: upgrade_session(session: aiohttp_session.Session) -> None
+    Upgrade session user data of the older layout
+.. function:: get_session_user_grants(session: aiohttp_session.Session) -> dict[str, bool]
+    Return grants of the session user (for templates)
 .. function:: get_alert_message_from_session(
         request: Optional[aiohttp.web.Request], session: Optional[aiohttp_session.Session] = None ) -> str
     Return session alert message (also delete this message - so, it will not be repeated)
 .. function:: put_alert_message_in_session(
         request: aiohttp.web.Request, alert_message: str, session: aiohttp_session.Session = None) -> None
     Put alert message in the session
+
+.. const:: SESSION_USER_VERSION
+    Version of the session user layout
 """
 
 from functools import wraps
@@ -47,6 +56,73 @@ from .. import (
 )
 
 
+SESSION_USER_VERSION = 2
+
+
+def build_session_user(user_data: dict, user_group_id: int) -> dict[str, Union[int, str]]:
+    """
+    Return user data of the session - identity and group only (session is loaded on every request).
+
+    :param user_data: user data (db data or session data of the older layout)
+    :type user_data: dict
+    :param user_group_id: id of the user group
+    :type user_group_id: int
+
+    :return: user data of the session
+    :rtype: dict[str, Union[int, str]]
+    """
+
+    session_user = {
+        'id': user_data['id'],
+        'login': user_data['login'],
+        'group_id': user_group_id,
+        'version': SESSION_USER_VERSION
+    }
+
+    return session_user
+
+
+def upgrade_session(session: aiohttp_session.Session) -> None:
+    """
+    Upgrade session user data of the older layout (session is saved with the current layout).
+
+    :param session: loaded session
+    :type session: aiohttp_session.Session
+
+    :return: None
+    :rtype: None
+    """
+
+    session_user = session.get('user')
+    if session_user is None or session_user.get('version') == SESSION_USER_VERSION:
+        return
+
+    # group of the older layout was computed on authorization too
+    session['user'] = build_session_user(session_user, session_user['group_id'])
+
+
+def get_session_user_grants(session: aiohttp_session.Session) -> dict[str, bool]:
+    """
+    Return grants of the session user (for templates).
+
+    :param session: session
+    :type session: aiohttp_session.Session
+
+    :return: grants (`moderator`, `admin`)
+    :rtype: dict[str, bool]
+    """
+
+    session_user_group_id = session.get('user', {}).get('group_id')
+    session_user_group = user_groups.user_groups_mapping.get(session_user_group_id, user_groups.Visitor)
+
+    grants = {
+        'moderator': issubclass(session_user_group, user_groups.Moderator),
+        'admin': issubclass(session_user_group, user_groups.Admin)
+    }
+
+    return grants
+
+
 def user_group_access_required(handler: Callable = None, *args, user_group: Type[user_groups.UserGroup]) -> Callable:
     """
     Verify user access by given user group.
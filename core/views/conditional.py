@@ -0,0 +1,251 @@
+"""
+Contains conditional GET support (ETag/Last-Modified validators) for the pages of the particular entity.
+
+Page is the same while data that page shows is not modified and viewer is the same
+(header shows viewer login, page shows controls by viewer group).
+So, validators are computed by the cached record that page shows (no db query on the cache hit) and viewer:
+ETag is the fingerprint of the shown data (edits within the same second change it too),
+if client already has this page version - 304 is returned without rendering.
+
+`If-Modified-Since` is not evaluated - modification dates of the denormalized data (author login, rubric title)
+are not changed on their fan out, so, only ETag identifies the page version (`Last-Modified` is informational).
+
+Db dates are considered as UTC.
+
+.. class:: PageVersion(NamedTuple)
+    Data that identify version of the page
+
+.. decorator:: conditional_get(fetch_page_version: Callable) -> Callable
+    Answer conditional GET requests by page version
+
+.. function:: fetch_post_page_version(request: aiohttp.web.Request, viewer_id: Optional[int]
+        ) -> Optional[PageVersion]
+    Return version of the post page
+.. function:: fetch_note_page_version(request: aiohttp.web.Request, viewer_id: Optional[int]
+        ) -> Optional[PageVersion]
+    Return version of the note page
+.. function:: fetch_thinker_page_version(request: aiohttp.web.Request, viewer_id: Optional[int]
+        ) -> Optional[PageVersion]
+    Return version of the thinker page
+"""
+
+import datetime
+from functools import wraps
+import hashlib
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    NamedTuple,
+    Optional,
+    Union
+)
+
+import aiohttp.web
+import aiohttp_session
+
+from . import (
+    helpers,
+    utils
+)
+from ..cache import page_cache
+from ..database import (
+    db,
+    sharding
+)
+from ..database.single_flight import freeze
+
+
+class PageVersion(NamedTuple):
+    """ Data that identify version of the page (modification date and shown data) """
+    last_modified: datetime.datetime
+    state: Any = ()
+
+
+def _build_etag(page_version: PageVersion, viewer: Optional[tuple]) -> str:
+    """
+    Return ETag (quoted) by page version and viewer.
+
+    :param page_version: version of the page
+    :type page_version: PageVersion
+    :param viewer: viewer data that page shows (None - for anonymous)
+    :type viewer: Optional[tuple]
+
+    :return: ETag
+    :rtype: str
+    """
+
+    fingerprint = repr((freeze(page_version.state), viewer))
+
+    return '"{}"'.format(hashlib.sha1(fingerprint.encode()).hexdigest())
+
+
+def _is_not_modified(request: aiohttp.web.Request, etag: str) -> bool:
+    """
+    Return status of the client page freshness (by `If-None-Match`).
+
+    :param request: request
+    :type request: aiohttp.web.Request
+    :param etag: current ETag of the page
+    :type etag: str
+
+    :return: status (True - client has current page version)
+    :rtype: bool
+    """
+
+    if_none_match = request.headers.get(aiohttp.hdrs.IF_NONE_MATCH)
+    if if_none_match is None:
+        return False
+
+    client_etags = {client_etag.strip().removeprefix('W/') for client_etag in if_none_match.split(',')}
+
+    return '*' in client_etags or etag in client_etags
+
+
+def conditional_get(fetch_page_version: Callable[[aiohttp.web.Request, Optional[int]], Awaitable[
+                        Optional[PageVersion]]]) -> Callable:
+    """
+    Answer conditional GET requests by page version (and set validators in the full response).
+
+    Decorator must envelop handler that return rendered response (above `aiohttp_jinja2.template`
+    and page cache decorators).
+    If page version is not found (None) - handler is invoked as is (e.g. it will check access or return 404).
+
+    :param fetch_page_version: async function that gets request and viewer id, returns page version
+    :type fetch_page_version: Callable[[aiohttp.web.Request, Optional[int]], Awaitable[Optional[PageVersion]]]
+
+    :return: decorator
+    :rtype: Callable
+    """
+
+    def decorator(handler: Callable) -> Callable:
+        @wraps(handler)
+        @utils.view_decorator
+        async def inner(handler_argument: Union[aiohttp.web.View, aiohttp.web.Request], request: aiohttp.web.Request
+                        ) -> aiohttp.web.StreamResponse:
+            """
+            Return 304 if client has current page version, otherwise - rendered page with validators.
+
+            :param handler_argument: argument that will be passed in view handler
+            :type handler_argument: Union[aiohttp.web.View, aiohttp.web.Request]
+            :param request: request
+            :type request: aiohttp.web.Request
+
+            :return: response
+            :rtype: aiohttp.web.StreamResponse
+            """
+
+            if request.method != 'GET':
+                return await handler(handler_argument)
+
+            viewer = None
+            # session of the anonymous visitor is not loaded
+            if not page_cache.is_anonymous_request(request):
+                session = await aiohttp_session.get_session(request)
+                if 'user' in session:
+                    viewer = (session['user']['id'], session['user']['login'], session['user']['group_id'])
+
+            page_version = await fetch_page_version(request, viewer[0] if viewer else None)
+            if page_version is None:
+                return await handler(handler_argument)
+
+            last_modified = page_version.last_modified.replace(tzinfo=datetime.timezone.utc, microsecond=0)
+            etag = _build_etag(page_version, viewer)
+
+            if _is_not_modified(request, etag):
+                response = aiohttp.web.Response(status=304)
+            else:
+                response = await handler(handler_argument)
+                if response.status != 200:
+                    return response
+
+            response.headers[aiohttp.hdrs.ETAG] = etag
+            response.last_modified = last_modified
+            # page depends on the viewer (session cookie)
+            response.headers[aiohttp.hdrs.VARY] = aiohttp.hdrs.COOKIE
+
+            return response
+
+        return inner
+
+    return decorator
+
+
+async def fetch_post_page_version(request: aiohttp.web.Request, viewer_id: Optional[int]) -> Optional[PageVersion]:
+    """
+    Return version of the post page (cached post - with author login and rubric title).
+
+    :param request: request
+    :type request: aiohttp.web.Request
+    :param viewer_id: id of the viewer (None - for anonymous)
+    :type viewer_id: Optional[int]
+
+    :return: version of the page
+    :rtype: Optional[PageVersion]
+
+    :raises db.RecordNotFoundError: raised if post is not found
+    """
+
+    post_id = helpers.get_id_param_from_url(request)
+
+    async with request.app['db'].acquire() as connection:
+        post = await db.fetch_one_post(connection, post_id)
+
+    return PageVersion(post['edited_date'], post)
+
+
+async def fetch_note_page_version(request: aiohttp.web.Request, viewer_id: Optional[int]) -> Optional[PageVersion]:
+    """
+    Return version of the note page (cached note - with rubric title) - only for the note owner.
+
+    :param request: request
+    :type request: aiohttp.web.Request
+    :param viewer_id: id of the viewer (None - for anonymous)
+    :type viewer_id: Optional[int]
+
+    :return: version of the page (None - if viewer is not the note owner)
+    :rtype: Optional[PageVersion]
+    """
+
+    if viewer_id is None:
+        return None
+
+    note_id = helpers.get_id_param_from_url(request)
+
+    try:
+        async with sharding.acquire_notes_connection(request.app, viewer_id) as connection:
+            note = await db.fetch_one_note(connection, note_id)
+    except db.RecordNotFoundError:
+        return None
+
+    if note['user_id'] != viewer_id:
+        return None
+
+    return PageVersion(note['edited_date'], note)
+
+
+async def fetch_thinker_page_version(request: aiohttp.web.Request, viewer_id: Optional[int]) -> Optional[PageVersion]:
+    """
+    Return version of the thinker page (cached data of the thinker page - user and the latest posts of the user).
+
+    :param request: request
+    :type request: aiohttp.web.Request
+    :param viewer_id: id of the viewer (None - for anonymous)
+    :type viewer_id: Optional[int]
+
+    :return: version of the page
+    :rtype: Optional[PageVersion]
+
+    :raises db.RecordNotFoundError: raised if user is not found
+    """
+
+    user_id = helpers.get_id_param_from_url(request)
+
+    async with request.app['db'].acquire() as connection:
+        thinker_page = await db.fetch_thinker_page(connection, user_id)
+
+    last_modified = max(
+        (thinker_page['user']['edited_date'], *(post['edited_date'] for post in thinker_page['posts']))
+    )
+
+    return PageVersion(last_modified, thinker_page)
@@ -0,0 +1,121 @@
+"""
+Contains request cost guardrails (limits of the list pages url params).
+
+One url must not be able to force db to read (and server to render) the huge quantity of rows,
+so, url params of the list pages are validated by the view limits and by the estimated cost of the query.
+
+.. class:: RequestCostLimits(NamedTuple)
+    Limits of the url params for the view
+
+.. function:: estimate_request_cost(url_params: Union[validators.PostUrlParams, validators.NoteUrlParams]) -> int
+    Return estimated cost of the list query (in rows)
+.. function:: get_validated_url_params(request: aiohttp.web.Request,
+        url_params_model: Type[Union[validators.PostUrlParams, validators.NoteUrlParams]],
+        limits: RequestCostLimits) -> Union[validators.PostUrlParams, validators.NoteUrlParams]
+    Return validated url params (that satisfy limits)
+
+.. const:: POSTS_LIMITS
+    Limits for posts list views
+.. const:: NOTES_LIMITS
+    Limits for notes list views
+"""
+
+import logging
+from typing import (
+    NamedTuple,
+    Type,
+    Union
+)
+
+import aiohttp.web
+import pydantic
+
+from . import RequestCostError
+from ..database import validators
+from ..settings import (
+    MAX_NOTES_ON_PAGE,
+    MAX_PAGE_OFFSET,
+    MAX_POSTS_ON_PAGE,
+    MAX_REQUEST_COST,
+    MAX_SEARCH_WORD_LENGTH,
+    SEARCH_COST_FACTOR
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestCostLimits(NamedTuple):
+    """ Limits of the url params for the view """
+    max_quantity: int
+    max_offset: int = MAX_PAGE_OFFSET
+    max_search_word_length: int = MAX_SEARCH_WORD_LENGTH
+    max_cost: int = MAX_REQUEST_COST
+
+
+POSTS_LIMITS = RequestCostLimits(max_quantity=MAX_POSTS_ON_PAGE)
+NOTES_LIMITS = RequestCostLimits(max_quantity=MAX_NOTES_ON_PAGE)
+
+
+def estimate_request_cost(url_params: Union[validators.PostUrlParams, validators.NoteUrlParams]) -> int:
+    """
+    Estimate cost of the list query in rows that db reads for the page.
+
+    Db reads all skipped rows (offset) and rows of the page,
+    full text search is more expensive (relevance computing for all matched rows).
+
+    :param url_params: validated url params
+    :type url_params: Union[validators.PostUrlParams, validators.NoteUrlParams]
+
+    :return: estimated cost
+    :rtype: int
+    """
+
+    offset = (url_params.page - 1) * url_params.quantity
+    cost = offset + url_params.quantity
+
+    if url_params.keyword:
+        cost *= SEARCH_COST_FACTOR
+
+    return cost
+
+
+def get_validated_url_params(request: aiohttp.web.Request,
+                             url_params_model: Type[Union[validators.PostUrlParams, validators.NoteUrlParams]],
+                             limits: RequestCostLimits
+                             ) -> Union[validators.PostUrlParams, validators.NoteUrlParams]:
+    """
+    Validate url params of the request and check them by the limits.
+
+    :param request: request
+    :type request: aiohttp.web.Request
+    :param url_params_model: validation model of the url params
+    :type url_params_model: Type[Union[validators.PostUrlParams, validators.NoteUrlParams]]
+    :param limits: limits of the view
+    :type limits: RequestCostLimits
+
+    :return: validated url params
+    :rtype: Union[validators.PostUrlParams, validators.NoteUrlParams]
+
+    :raises RequestCostError: raised if url params are invalid or the request is too expensive
+    """
+
+    try:
+        url_params = url_params_model(**request.rel_url.query)
+    except pydantic.ValidationError as error:
+        raise RequestCostError(validators.get_formatted_error_message(error)) from error
+
+    if url_params.quantity > limits.max_quantity:
+        message = f'quantity {url_params.quantity} is over the limit {limits.max_quantity}'
+    elif (url_params.page - 1) * url_params.quantity > limits.max_offset:
+        message = f'page {url_params.page} is too deep (offset is over the limit {limits.max_offset})'
+    elif url_params.keyword and len(url_params.keyword) > limits.max_search_word_length:
+        message = f'keyword is longer than the limit {limits.max_search_word_length}'
+    elif estimate_request_cost(url_params) > limits.max_cost:
+        message = f'estimated cost {estimate_request_cost(url_params)} is over the limit {limits.max_cost}'
+    else:
+        return url_params
+
+    logger.warning(f'Request was rejected by cost guard [{request.rel_url}]: {message}')
+
+    raise RequestCostError(message)
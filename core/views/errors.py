@@ -3,6 +3,8 @@ Contains common views errors.
 
 .. exception:: InvalidFormData(Exception)
     Raised when form data is invalid
+.. exception:: RequestCostError(InvalidFormDataError)
+    Raised when request is too expensive to handle (abusive url params)
 """
 
 
@@ -21,3 +23,11 @@ class InvalidFormDataError(Exception):
 
     But, finally, in middlewares it will re-raise exactly `aiohttp.web.HTTPBadRequest` (already in the global context).
     """
+
+
+class RequestCostError(InvalidFormDataError):
+    """
+    Raised when request is too expensive to handle (abusive url params: huge page size, deep offset, long keyword).
+
+    In middlewares it will re-raise `aiohttp.web.HTTPBadRequest` (as `InvalidFormDataError`).
+    """
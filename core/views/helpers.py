@@ -21,6 +21,8 @@ Contains functions that help handle and finalize view result.
     Return id param from form data
 .. function:: get_user_id_from_session(request: aiohttp.web.Request) -> int
     Return uer id param from session
+.. function:: fetch_all_note_rubrics(request: aiohttp.web.Request, user_id: int) -> list[dict[str, Union[int, str]]]
+    Return note rubrics of the user (shard connection is acquired only on cache miss)
 .. function:: save_user_image(filepath: pathlib.Path, image_field: aiohttp.multipart.BodyPartReader) -> None
     Save user image
 .. function:: delete_user_image(filepath: pathlib.Path) -> None
@@ -45,7 +47,12 @@ from . import (
     auth,
     utils
 )
-from ..database import validators
+from ..cache.lru import MISSING
+from ..database import (
+    db,
+    sharding,
+    validators
+)
 
 
 def put_session_data_in_view_result(handler: Callable = None, *args, put_alert_message: bool = False) -> Callable:
@@ -89,6 +96,8 @@ def put_session_data_in_view_result(handler: Callable = None, *args, put_alert_m
             handler_result['message'] = alert_message
 
         handler_result['session'] = session
+        # session keeps only group of the user
+        handler_result['grants'] = auth.session.get_session_user_grants(session)
 
         return handler_result
 
@@ -245,6 +254,28 @@ async def get_user_id_from_session(request: aiohttp.web.Request) -> int:
     return user_id
 
 
+async def fetch_all_note_rubrics(request: aiohttp.web.Request, user_id: int) -> list[dict[str, Union[int, str]]]:
+    """
+    Return note rubrics of the user - cached rubrics are returned without shard connection
+    (acquiring of the shard connection resolves shard of the user by the main db).
+
+    :param request: request
+    :type request: aiohttp.web.Request
+    :param user_id: user id
+    :type user_id: int
+
+    :return: data of the note rubrics
+    :rtype: list[dict[str, Union[int, str]]]
+    """
+
+    note_rubrics = db.fetch_all_note_rubrics.get_cached(user_id)
+    if note_rubrics is not MISSING:
+        return note_rubrics
+
+    async with sharding.acquire_notes_connection(request.app, user_id) as connection:
+        return await db.fetch_all_note_rubrics.load(connection, user_id)
+
+
 async def save_user_image(filepath: pathlib.Path, image_field: aiohttp.multipart.BodyPartReader) -> None:
     """
     Save user image.
@@ -6,30 +6,53 @@ Contains implementing of pagination.
 
 .. const:: DEFAULT_PAGE_NUMBERS_SEPARATOR
     Value that will be displayed on the page between page numbers
+.. const:: DEFAULT_MANY_PAGES_LABEL
+    Value that will be displayed on the page instead of the last page (if pages quantity is approximate)
 """
 
 from typing import Union
 
 
-from ..settings import DEFAULT_PAGE_NUMBERS_SEPARATOR
+from ..settings import (
+    DEFAULT_PAGE_NUMBERS_SEPARATOR,
+    DEFAULT_MANY_PAGES_LABEL
+)
 
 
 class Pagination:
-    """ Implements pagination data """
+    """
+    Implements pagination data.
 
-    def __init__(self, possible_pages_quantity: int, page_number: int = 1) -> None:
+    If pages quantity is approximate (too many rows to count exactly) - the last page is unknown,
+    so, next page is always available and `many pages` label is shown instead of the last page.
+    """
+
+    def __init__(self, possible_pages_quantity: int, page_number: int = 1, is_approximate: bool = False) -> None:
         self.page_number = page_number
         self.possible_pages_quantity = possible_pages_quantity
+        self.is_approximate = is_approximate
 
     @property
-    def pagination_data(self) -> dict[str, Union[int, None]]:
+    def pagination_data(self) -> dict[str, Union[int, str, None]]:
         """
         Return all pagination data needed for a template.
 
         :return: pagination data
-        :rtype: dict[str, Union[int, None]]
+        :rtype: dict[str, Union[int, str, None]]
         """
 
+        if self.is_approximate:
+            pagination_data = {
+                'first_page': 1 if self.page_number > 2 else None,
+                'separator_after_first_page': DEFAULT_PAGE_NUMBERS_SEPARATOR if self.page_number > 3 else None,
+                'previous_page_number': self.page_number - 1 if self.page_number > 1 else None,
+                'page_number': self.page_number,
+                'next_page_number': self.page_number + 1,
+                'many_pages': DEFAULT_MANY_PAGES_LABEL
+            }
+
+            return pagination_data
+
         pagination_data = {
             'first_page': 1 if self.page_number > 2 else None,
             'separator_after_first_page': DEFAULT_PAGE_NUMBERS_SEPARATOR if self.page_number > 3 else None,
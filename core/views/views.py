@@ -83,6 +83,8 @@ Contains views.
     VIEW CLASS
 .. class:: UnsettingModeratorByAdmin(aiohttp.web.View)
     VIEW CLASS
+.. class:: CachesInspectionByAdmin(aiohttp.web.View)
+    VIEW CLASS
 .. class:: PostModerating(aiohttp.web.View)
     VIEW CLASS
 """
@@ -91,17 +93,26 @@ from typing import Union
 
 import aiohttp.web
 import aiohttp_jinja2
+import aiohttp_session
 import pydantic
 
 from . import (
     InvalidFormDataError,
     auth,
+    conditional,
+    cost_guard,
     pagination,
     helpers,
     utils
 )
 from .. import security
-from ..database import db, validators
+from ..cache import (
+    hot_pages,
+    inspection,
+    page_cache,
+    search
+)
+from ..database import db, invalidation, sharding, validators
 from ..settings import USER_IMAGES_DIR
 
 
@@ -142,6 +153,8 @@ class Contacts(aiohttp.web.View):
 class Posts(aiohttp.web.View):
     """ View for '/posts/' url """
 
+    @search.count_searches
+    @page_cache.cache_anonymous_page
     @aiohttp_jinja2.template('posts/posts.html')
     @helpers.put_session_data_in_view_result
     async def get(self) -> dict:
@@ -155,14 +168,23 @@ class Posts(aiohttp.web.View):
             keyword: str    - search word
         """
 
-        url_params = self.request.rel_url.query
-        validated_url_params = validators.PostUrlParams(**url_params)
+        validated_url_params = cost_guard.get_validated_url_params(
+            self.request, validators.PostUrlParams, cost_guard.POSTS_LIMITS
+        )
 
-        async with self.request.app['db'].acquire() as connection:
-            posts_data = await db.fetch_all_posts(connection, validated_url_params)
-            possible_pages_quantity = await db.fetch_posts_possible_pages_quantity(connection, validated_url_params)
+        # hot pages are served stale while they are refreshing
+        if hot_pages.is_hot_posts_page(validated_url_params):
+            posts_data, pages_quantity = await self.request.app['hot_pages_cache'].get(
+                validated_url_params.rubric, lambda: hot_pages.fetch_posts_page(self.request.app, validated_url_params)
+            )
+        else:
+            posts_data, pages_quantity = await hot_pages.fetch_posts_page(self.request.app, validated_url_params)
+
+        pagination_data = pagination.Pagination(
+            pages_quantity.quantity, validated_url_params.page, is_approximate=pages_quantity.is_approximate
+        ).pagination_data
 
-        pagination_data = pagination.Pagination(possible_pages_quantity, validated_url_params.page).pagination_data
+        page_cache.tag_page(self.request, invalidation.tag(invalidation.POSTS))
 
         data = {
             'posts': posts_data,
@@ -175,6 +197,8 @@ class Posts(aiohttp.web.View):
 class Post(aiohttp.web.View):
     """ View for '/posts/<id: int>/ url """
 
+    @conditional.conditional_get(conditional.fetch_post_page_version)
+    @page_cache.cache_anonymous_page
     @aiohttp_jinja2.template('posts/post.html')
     @helpers.put_session_data_in_view_result
     async def get(self) -> dict:
@@ -184,6 +208,13 @@ class Post(aiohttp.web.View):
         async with self.request.app['db'].acquire() as connection:
             post_data = await db.fetch_one_post(connection, post_id)
 
+        # page shows author login and rubric title
+        page_cache.tag_page(self.request, invalidation.tag(invalidation.POST, post_id))
+        if post_data['user_id']:
+            page_cache.tag_page(self.request, invalidation.tag(invalidation.USER, post_data['user_id']))
+        if post_data['rubric_id']:
+            page_cache.tag_page(self.request, invalidation.tag(invalidation.POST_RUBRIC, post_data['rubric_id']))
+
         data = {
             'post': post_data,
         }
@@ -216,8 +247,7 @@ class PostCreation(aiohttp.web.View):
     @auth.session.user_group_access_required(user_group=auth.user_groups.User)
     async def get(self) -> dict:
         """ Return page with post creation form """
-        async with self.request.app['db'].acquire() as connection:
-            post_rubrics = await db.fetch_all_post_rubrics(connection)
+        post_rubrics = await self.request.app['post_rubrics_snapshot'].get()
 
         data = {
             'rubrics': post_rubrics
@@ -257,8 +287,7 @@ class PostEditingForm(aiohttp.web.View):
 
         _, post = await auth.authentication_policy.authenticate_post_owner(self.request, post_id)
 
-        async with self.request.app['db'].acquire() as connection:
-            post_rubrics = await db.fetch_all_post_rubrics(connection)
+        post_rubrics = await self.request.app['post_rubrics_snapshot'].get()
 
         data = {
             'post': post,
@@ -317,12 +346,14 @@ class PostDeleting(aiohttp.web.View):
 class PostRubrics(aiohttp.web.View):
     """ View for '/posts/rubrics/' url """
 
+    @page_cache.cache_anonymous_page
     @aiohttp_jinja2.template('post_rubrics/post_rubrics.html')
     @helpers.put_session_data_in_view_result
     async def get(self) -> dict:
         """ Return page with list of post rubrics """
-        async with self.request.app['db'].acquire() as connection:
-            rubrics = await db.fetch_all_post_rubrics(connection)
+        rubrics = await self.request.app['post_rubrics_snapshot'].get()
+
+        page_cache.tag_page(self.request, invalidation.tag(invalidation.POST_RUBRICS))
 
         data = {
             'rubrics': rubrics
@@ -442,17 +473,20 @@ class Notes(aiohttp.web.View):
             quantity: int   - posts quantity
         """
 
-        url_params = self.request.rel_url.query
-        validated_url_params = validators.NoteUrlParams(**url_params)
+        validated_url_params = cost_guard.get_validated_url_params(
+            self.request, validators.NoteUrlParams, cost_guard.NOTES_LIMITS
+        )
 
         user_id = await helpers.get_user_id_from_session(self.request)
 
-        async with self.request.app['db'].acquire() as connection:
+        async with sharding.acquire_notes_connection(self.request.app, user_id) as connection:
             notes = await db.fetch_all_notes(connection, user_id, validated_url_params)
-            possible_pages_quantity = await db.fetch_notes_possible_pages_quantity(
+            pages_quantity = await db.fetch_notes_possible_pages_quantity(
                 connection, validated_url_params, user_id
             )
-        pagination_data = pagination.Pagination(possible_pages_quantity, validated_url_params.page).pagination_data
+        pagination_data = pagination.Pagination(
+            pages_quantity.quantity, validated_url_params.page, is_approximate=pages_quantity.is_approximate
+        ).pagination_data
 
         data = {
             'notes': notes,
@@ -465,6 +499,7 @@ class Notes(aiohttp.web.View):
 class Note(aiohttp.web.View):
     """ View for '/notes/<id: int>/' url """
 
+    @conditional.conditional_get(conditional.fetch_note_page_version)
     @aiohttp_jinja2.template('notes/note.html')
     @helpers.put_session_data_in_view_result
     @auth.session.user_group_access_required(user_group=auth.user_groups.User)
@@ -491,8 +526,7 @@ class NoteCreation(aiohttp.web.View):
         """ Return page with note creation form """
         user_id = await helpers.get_user_id_from_session(self.request)
 
-        async with self.request.app['db'].acquire() as connection:
-            note_rubrics = await db.fetch_all_note_rubrics(connection, user_id)
+        note_rubrics = await helpers.fetch_all_note_rubrics(self.request, user_id)
 
         data = {
             'rubrics': note_rubrics
@@ -514,7 +548,7 @@ class NoteCreation(aiohttp.web.View):
                 self.request, error, redirect_route_name='notes-create'
             )
         else:
-            async with self.request.app['db'].acquire() as connection:
+            async with sharding.acquire_notes_connection(self.request.app, user_id) as connection:
                 await db.insert_note(connection, note)
 
             return helpers.redirect_by_route_name(self.request, 'notes')
@@ -532,8 +566,7 @@ class NoteEditingForm(aiohttp.web.View):
 
         user_id, note = await auth.authentication_policy.authenticate_note_owner(self.request, note_id)
 
-        async with self.request.app['db'].acquire() as connection:
-            note_rubrics = await db.fetch_all_note_rubrics(connection, user_id)
+        note_rubrics = await helpers.fetch_all_note_rubrics(self.request, user_id)
 
         data = {
             'note': note,
@@ -553,7 +586,7 @@ class NoteEditing(aiohttp.web.View):
 
         note_id = helpers.get_id_param_from_form_data(data)
 
-        await auth.authentication_policy.authenticate_note_owner(self.request, note_id)
+        user_id, _ = await auth.authentication_policy.authenticate_note_owner(self.request, note_id)
 
         try:
             note = validators.NoteEditing(**data)
@@ -562,7 +595,7 @@ class NoteEditing(aiohttp.web.View):
                 self.request, error, redirect_route_name='notes-id-edit', id=note_id
             )
         else:
-            async with self.request.app['db'].acquire() as connection:
+            async with sharding.acquire_notes_connection(self.request.app, user_id) as connection:
                 await db.update_note(connection, note_id, note)
 
             return helpers.redirect_by_route_name(self.request, 'notes-id', id=note_id)
@@ -578,9 +611,9 @@ class NoteDeleting(aiohttp.web.View):
 
         note_id = helpers.get_id_param_from_form_data(data)
 
-        await auth.authentication_policy.authenticate_note_owner(self.request, note_id)
+        user_id, _ = await auth.authentication_policy.authenticate_note_owner(self.request, note_id)
 
-        async with self.request.app['db'].acquire() as connection:
+        async with sharding.acquire_notes_connection(self.request.app, user_id) as connection:
             await db.delete_note(connection, note_id)
 
         return helpers.redirect_by_route_name(self.request, 'notes')
@@ -599,8 +632,7 @@ class NoteRubrics(aiohttp.web.View):
         """ Return page with not rubrics """
         user_id = await helpers.get_user_id_from_session(self.request)
 
-        async with self.request.app['db'].acquire() as connection:
-            rubrics = await db.fetch_all_note_rubrics(connection, user_id)
+        rubrics = await helpers.fetch_all_note_rubrics(self.request, user_id)
 
         data = {
             'rubrics': rubrics
@@ -633,7 +665,7 @@ class NoteRubricCreation(aiohttp.web.View):
                 self.request, error, redirect_route_name='notes-rubrics-create'
             )
         else:
-            async with self.request.app['db'].acquire() as connection:
+            async with sharding.acquire_notes_connection(self.request.app, user_id) as connection:
                 await db.insert_note_rubric(connection, note_rubric)
 
             return helpers.redirect_by_route_name(self.request, 'notes-rubrics')
@@ -668,7 +700,7 @@ class NoteRubricEditing(aiohttp.web.View):
 
         note_rubric_id = helpers.get_id_param_from_form_data(data)
 
-        await auth.authentication_policy.authenticate_note_rubric_owner(self.request, note_rubric_id)
+        user_id, _ = await auth.authentication_policy.authenticate_note_rubric_owner(self.request, note_rubric_id)
 
         try:
             note_rubric = validators.NoteRubricEditing(**data)
@@ -677,7 +709,7 @@ class NoteRubricEditing(aiohttp.web.View):
                 self.request, error, redirect_route_name='notes-rubrics-create'
             )
         else:
-            async with self.request.app['db'].acquire() as connection:
+            async with sharding.acquire_notes_connection(self.request.app, user_id) as connection:
                 await db.update_note_rubric(connection, note_rubric_id, note_rubric)
 
             return helpers.redirect_by_route_name(self.request, 'notes-rubrics')
@@ -693,9 +725,9 @@ class NoteRubricDeleting(aiohttp.web.View):
 
         note_rubric_id = helpers.get_id_param_from_form_data(data)
 
-        await auth.authentication_policy.authenticate_note_rubric_owner(self.request, note_rubric_id)
+        user_id, _ = await auth.authentication_policy.authenticate_note_rubric_owner(self.request, note_rubric_id)
 
-        async with self.request.app['db'].acquire() as connection:
+        async with sharding.acquire_notes_connection(self.request.app, user_id) as connection:
             await db.delete_note_rubric(connection, note_rubric_id)
 
         return helpers.redirect_by_route_name(self.request, 'notes-rubrics')
@@ -862,10 +894,14 @@ class UserSettingsEditingLogin(aiohttp.web.View):
                 async with self.request.app['db'].acquire() as connection:
                     login_availability = await auth.authorization.check_login_for_availability(connection, new_login)
 
+                    if login_availability:
+                        await db.update_user_login(connection, user['id'], new_login)
+
                 if login_availability:
                     user_id = user['id']
 
-                    await db.update_user_login(connection, user_id, new_login)
+                    session = await aiohttp_session.get_session(self.request)
+                    session['user'] = {**session['user'], 'login': new_login}
 
                     return helpers.redirect_by_route_name(self.request, 'thinker-id', id=user_id)
                 else:
@@ -928,7 +964,17 @@ class UserSettingsEditingInfoForm(aiohttp.web.View):
     @auth.session.user_group_access_required(user_group=auth.user_groups.User)
     async def get(self) -> dict:
         """ Return page with links on more narrow editing forms """
-        return {}
+        user_id = await helpers.get_user_id_from_session(self.request)
+
+        # profile data is not kept in the session - it is the cached public data of the thinker
+        async with self.request.app['db'].acquire() as connection:
+            thinker_page = await db.fetch_thinker_page(connection, user_id)
+
+        data = {
+            'user': thinker_page['user']
+        }
+
+        return data
 
 
 class UserSettingsEditingInfo(aiohttp.web.View):
@@ -1060,18 +1106,21 @@ class UserPosts(aiohttp.web.View):
     @auth.session.user_group_access_required(user_group=auth.user_groups.User)
     async def get(self) -> dict:
         """ Return page with user posts """
-        url_params = self.request.rel_url.query
-        validated_url_params = validators.PostUrlParams(**url_params)
+        validated_url_params = cost_guard.get_validated_url_params(
+            self.request, validators.PostUrlParams, cost_guard.POSTS_LIMITS
+        )
 
         user_id = await helpers.get_user_id_from_session(self.request)
 
         async with self.request.app['db'].acquire() as connection:
             posts = await db.fetch_all_posts(connection, validated_url_params, user_id=user_id)
-            possible_pages_quantity = await db.fetch_posts_possible_pages_quantity(
+            pages_quantity = await db.fetch_posts_possible_pages_quantity(
                 connection, validated_url_params, user_id=user_id
             )
 
-        pagination_data = pagination.Pagination(possible_pages_quantity, validated_url_params.page).pagination_data
+        pagination_data = pagination.Pagination(
+            pages_quantity.quantity, validated_url_params.page, is_approximate=pages_quantity.is_approximate
+        ).pagination_data
 
         data = {
             'posts': posts,
@@ -1090,17 +1139,32 @@ class UserPosts(aiohttp.web.View):
 class Thinker(aiohttp.web.View):
     """ View for '/thinker/<id: int>/' url """
 
+    @conditional.conditional_get(conditional.fetch_thinker_page_version)
+    @page_cache.cache_anonymous_page
     @aiohttp_jinja2.template('user/user_page.html')
     @helpers.put_session_data_in_view_result
     async def get(self):
-        """ Return page with thinker info """
+        """ Return page with thinker info and the latest posts of the thinker """
         user_id = helpers.get_id_param_from_url(self.request)
 
         async with self.request.app['db'].acquire() as connection:
-            user = await db.fetch_one_user(connection, user_id=user_id)
+            thinker_page = await db.fetch_thinker_page(connection, user_id)
+
+        # page shows the latest posts (with rubric titles) of the user
+        page_cache.tag_page(
+            self.request,
+            invalidation.tag(invalidation.USER, user_id),
+            invalidation.tag(invalidation.POSTS_OF_USER, user_id),
+            *(invalidation.tag(invalidation.POST, post['id']) for post in thinker_page['posts']),
+            *(
+                invalidation.tag(invalidation.POST_RUBRIC, post['rubric_id'])
+                for post in thinker_page['posts'] if post['rubric_id']
+            )
+        )
 
         data = {
-            'user': user
+            'user': thinker_page['user'],
+            'posts': thinker_page['posts']
         }
 
         return data
@@ -1171,6 +1235,42 @@ class UnsettingModeratorByAdmin(aiohttp.web.View):
         return helpers.redirect_by_route_name(self.request, 'admin-unset-moderator')
 
 
+# # - inspect caches
+
+
+class CachesInspectionByAdmin(aiohttp.web.View):
+    """ View for '/admin/caches/' url """
+
+    @aiohttp_jinja2.template('admin/caches.html')
+    @helpers.put_session_data_in_view_result(put_alert_message=True)
+    @auth.session.user_group_access_required(user_group=auth.user_groups.Admin)
+    async def get(self) -> dict:
+        """ Return page with report of the caches (of the worker that handles request) and purging form """
+        data = {
+            'caches': inspection.build_report(self.request.app)
+        }
+
+        return data
+
+    @auth.session.user_group_access_required(user_group=auth.user_groups.Admin)
+    async def post(self) -> aiohttp.web.HTTPFound:
+        """ Handle purging form (cached data is purged by tags in all workers) """
+        data = await self.request.post()
+
+        try:
+            cache_purging = validators.CachePurging(**data)
+        except pydantic.ValidationError as error:
+            return await helpers.redirect_back_to_the_form_with_alert_message_in_session(
+                self.request, error, redirect_route_name='admin-caches'
+            )
+
+        await invalidation.invalidate(*cache_purging.tags)
+
+        return await helpers.redirect_back_to_the_form_with_alert_message_in_session(
+            self.request, f'Purged tags: {", ".join(cache_purging.tags)}', redirect_route_name='admin-caches'
+        )
+
+
 # # moderator
 
 
@@ -3,6 +3,8 @@ Setups, drops database (database, user, tables).
 
 .. async:: create_tables(connection: aiomysql.Connection) -> None
 .. async:: drop_tables(connection: aiomysql.Connection) -> None
+.. async:: create_shard_tables(connection: aiomysql.Connection) -> None
+.. async:: drop_shard_tables(connection: aiomysql.Connection) -> None
 .. func:: dump_sql_of_tables_creation()
 .. async:: main() -> None
 """
@@ -30,6 +32,7 @@ from core.settings import (
     DB_USER,
     DB_PASSWORD,
     DB_NAME,
+    NOTES_SHARDS_ADDRESSES,
     WEBSITE_ADMIN_LOGIN,
     WEBSITE_ADMIN_PASSWORD
 )
@@ -65,6 +68,26 @@ async def drop_tables(connection: aiomysql.Connection) -> None:
     logger.info('Tables have been dropped!')
 
 
+async def create_shard_tables(connection: aiomysql.Connection) -> None:
+    """ Create all notes shard tables in the shard database """
+    stmt = '\n'.join([table.create_table for table in models.shard_tables])
+
+    async with connection.cursor() as cursor:
+        await cursor.execute(stmt)
+
+    logger.info('Shard tables have been created!')
+
+
+async def drop_shard_tables(connection: aiomysql.Connection) -> None:
+    """ Drop all notes shard tables in the shard database """
+    stmt = '\n'.join(reversed([table.drop_table for table in models.shard_tables]))
+
+    async with connection.cursor() as cursor:
+        await cursor.execute(stmt)
+
+    logger.info('Shard tables have been dropped!')
+
+
 async def create_website_admin(connection: aiomysql.Connection) -> None:
     """ Create admin account """
     stmt = " INSERT INTO `users` (`login`, `password`, `is_admin`) VALUES (%(login)s, %(password)s, %(is_admin)s) "
@@ -143,6 +166,21 @@ async def main() -> None:
 
     connection.close()
 
+    for host, port in NOTES_SHARDS_ADDRESSES:
+        shard_connection = await aiomysql.connect(
+            host=host,
+            port=port,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            db=DB_NAME,
+            autocommit=True
+        )
+
+        await drop_shard_tables(shard_connection)
+        await create_shard_tables(shard_connection)
+
+        shard_connection.close()
+
 
 if __name__ == '__main__':
     asyncio.run(main())
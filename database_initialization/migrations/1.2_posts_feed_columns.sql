@@ -0,0 +1,21 @@
+/*
+	Models version: 1.1 -> 1.2
+	Denormalized author login and rubric title of the posts (posts feed is read without joins).
+*/
+
+ALTER TABLE `posts`
+    ADD COLUMN `author_login` VARCHAR(255) NULL AFTER `rubric_id`,
+    ADD COLUMN `rubric_title` VARCHAR(255) NULL AFTER `author_login`,
+    ADD INDEX (`created_date`),
+    ADD INDEX (`rubric_id`, `created_date`),
+    ADD INDEX (`user_id`, `created_date`);
+
+UPDATE `posts`
+        LEFT JOIN
+    `post_rubrics` ON `posts`.`rubric_id` = `post_rubrics`.`id`
+        LEFT JOIN
+    `users` ON `posts`.`user_id` = `users`.`id`
+SET
+    `posts`.`author_login` = `users`.`login`,
+    `posts`.`rubric_title` = `post_rubrics`.`title`,
+    `posts`.`edited_date` = `posts`.`edited_date`;
@@ -0,0 +1,14 @@
+/*
+	Models version: 1.2 -> 1.3
+	Modification dates of the users and rubrics (validators of the conditional GET requests).
+	Run `1.3_notes_shards_edited_dates.sql` on every notes shard too.
+*/
+
+ALTER TABLE `users`
+    ADD COLUMN `edited_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP AFTER `is_moderator`;
+
+ALTER TABLE `post_rubrics`
+    ADD COLUMN `edited_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP AFTER `title`;
+
+ALTER TABLE `note_rubrics`
+    ADD COLUMN `edited_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP AFTER `title`;
@@ -0,0 +1,7 @@
+/*
+	Models version: 1.2 -> 1.3 [on the notes shard]
+	Modification dates of the note rubrics (validators of the conditional GET requests).
+*/
+
+ALTER TABLE `note_rubrics`
+    ADD COLUMN `edited_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP AFTER `title`;
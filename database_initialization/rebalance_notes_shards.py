@@ -0,0 +1,107 @@
+"""
+Moves notes (and note rubrics) of the one user between notes shards.
+
+Usage:
+    python database_initialization/rebalance_notes_shards.py <user_id> <target_shard_id>
+
+Cached placements of the user in the app workers are invalidated by invalidation bus (Redis).
+
+.. async:: connect(host: str, port: int) -> aiomysql.Connection
+.. async:: main(user_id: int, target_shard_id: int) -> None
+"""
+
+import pathlib
+import sys
+
+
+# add package to global path -------------------------------------------------------------------------------------------
+sys.path.append(pathlib.Path(__file__).parent.parent.__str__())
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+import argparse
+import asyncio
+import logging
+
+import aiomysql
+import aioredis
+
+from core.database import (
+    invalidation,
+    sharding
+)
+from core.database.invalidation_bus import InvalidationBus
+from core.settings import (
+    DB_HOST,
+    DB_PORT,
+    DB_USER,
+    DB_PASSWORD,
+    DB_NAME,
+    NOTES_SHARDS_ADDRESSES,
+    REDIS_ADDRESS
+)
+
+
+logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def connect(host: str, port: int) -> aiomysql.Connection:
+    """ Connect to the database instance (main db or shard) """
+    connection = await aiomysql.connect(
+        host=host,
+        port=port,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        db=DB_NAME,
+        autocommit=True
+    )
+
+    return connection
+
+
+async def main(user_id: int, target_shard_id: int) -> None:
+    """ Move user notes in the target shard """
+    shards_quantity = len(NOTES_SHARDS_ADDRESSES)
+    if not 0 <= target_shard_id < shards_quantity:
+        logger.error(f'Unknown target shard [{target_shard_id}]! Configured shards quantity: {shards_quantity}')
+        return
+
+    main_connection = await connect(DB_HOST, DB_PORT)
+
+    source_shard_id = await sharding.fetch_user_shard_id(main_connection, user_id, shards_quantity)
+    if source_shard_id == target_shard_id:
+        logger.info(f'Notes of the user [{user_id}] are already stored in the shard [{target_shard_id}]!')
+        main_connection.close()
+        return
+
+    source_connection = await connect(*NOTES_SHARDS_ADDRESSES[source_shard_id])
+    target_connection = await connect(*NOTES_SHARDS_ADDRESSES[target_shard_id])
+
+    # workers of the app get invalidated placement of the user
+    redis = await aioredis.create_redis_pool(REDIS_ADDRESS)
+    invalidation_bus = InvalidationBus(redis)
+    invalidation.set_publisher(invalidation_bus.publish)
+    invalidation.set_generation_counter(invalidation_bus.increment_generation)
+
+    try:
+        await sharding.move_user_notes(
+            main_connection, source_connection, target_connection, user_id, target_shard_id
+        )
+    finally:
+        invalidation.set_publisher(None)
+        invalidation.set_generation_counter(None)
+        redis.close()
+        await redis.wait_closed()
+
+        for connection in (main_connection, source_connection, target_connection):
+            connection.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Move notes of the user between notes shards.')
+    parser.add_argument('user_id', type=int, help='id of the user whose notes will be moved')
+    parser.add_argument('target_shard_id', type=int, help='index of the shard (in `NOTES_SHARDS`) to move notes in')
+    arguments = parser.parse_args()
+
+    asyncio.run(main(arguments.user_id, arguments.target_shard_id))
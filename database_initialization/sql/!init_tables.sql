@@ -1,6 +1,6 @@
 /*
-	Models version: 1.0
-	Generation time: 2021-04-30T11:38:35.437853
+	Models version: 1.3
+	Generation time: 2026-10-19T11:00:00
 */
 
 CREATE TABLE IF NOT EXISTS `users` (
@@ -11,6 +11,7 @@ CREATE TABLE IF NOT EXISTS `users` (
     `image_path` VARCHAR(255) DEFAULT NULL,
     `is_admin` TINYINT(1) NOT NULL DEFAULT '0',
     `is_moderator` TINYINT(1) NOT NULL DEFAULT '0',
+    `edited_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     PRIMARY KEY (`id`)
 )  ENGINE=INNODB;
     
@@ -22,6 +23,7 @@ CREATE VIEW `moderators` AS
 CREATE TABLE IF NOT EXISTS `post_rubrics` (
     `id` INT NOT NULL AUTO_INCREMENT,
     `title` VARCHAR(255) NOT NULL,
+    `edited_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     `user_id` INT NULL,
     PRIMARY KEY (`id`),
     FOREIGN KEY (`user_id`)
@@ -38,7 +40,12 @@ CREATE TABLE IF NOT EXISTS `posts` (
     `edited_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     `user_id` INT NULL,
     `rubric_id` INT NULL,
+    `author_login` VARCHAR(255) NULL,
+    `rubric_title` VARCHAR(255) NULL,
     PRIMARY KEY (`id`),
+    INDEX (`created_date`),
+    INDEX (`rubric_id`, `created_date`),
+    INDEX (`user_id`, `created_date`),
     FULLTEXT ( `title` , `content` ),
     FOREIGN KEY (`user_id`)
         REFERENCES `users` (`id`)
@@ -52,6 +59,7 @@ CREATE TABLE IF NOT EXISTS `posts` (
 CREATE TABLE IF NOT EXISTS `note_rubrics` (
     `id` INT NOT NULL AUTO_INCREMENT,
     `title` VARCHAR(255) NOT NULL,
+    `edited_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     `user_id` INT NOT NULL,
     PRIMARY KEY (`id`),
     FOREIGN KEY (`user_id`)
@@ -76,4 +84,14 @@ CREATE TABLE IF NOT EXISTS `notes` (
         REFERENCES `users` (`id`)
         ON DELETE CASCADE ON UPDATE NO ACTION
 )  ENGINE=INNODB;
+    
+
+CREATE TABLE IF NOT EXISTS `notes_shards_directory` (
+    `user_id` INT NOT NULL,
+    `shard_id` INT NOT NULL,
+    PRIMARY KEY (`user_id`),
+    FOREIGN KEY (`user_id`)
+        REFERENCES `users` (`id`)
+        ON DELETE CASCADE ON UPDATE NO ACTION
+)  ENGINE=INNODB;
     
\ No newline at end of file
@@ -0,0 +1,186 @@
+"""
+Tests of the purging of the shared caches: batches and retries of the purge requests (by the test HTTP server
+that accepts `PURGE`) and surrogate keys of the public pages (rendered and served from the page cache).
+"""
+
+import asyncio
+from typing import Optional
+import unittest
+
+import aiohttp.test_utils
+import aiohttp.web
+import aiohttp_session
+
+from core.cache import (
+    edge_purge,
+    page_cache
+)
+from core.database import invalidation
+from core.middlewares import create_cache_control_middleware
+from core.settings import SURROGATE_KEYS_HEADER
+
+
+class PurgeServer:
+    """ Shared cache that accepts purge requests (the first `failures` requests fail) """
+
+    def __init__(self, failures: int = 0, failure_status: int = 503) -> None:
+        self.failures = failures
+        self.failure_status = failure_status
+        self.purged_batches: list[list[str]] = []
+        self.requests = 0
+
+        self.app = aiohttp.web.Application()
+        self.app.router.add_route(edge_purge.PURGE_METHOD, '/purge', self.purge)
+
+    async def purge(self, request: aiohttp.web.Request) -> aiohttp.web.Response:
+        self.requests += 1
+        if self.requests <= self.failures:
+            return aiohttp.web.Response(status=self.failure_status)
+
+        self.purged_batches.append(request.headers['Surrogate-Key'].split())
+
+        return aiohttp.web.Response(status=200)
+
+
+class EdgePurgerTestCase(unittest.IsolatedAsyncioTestCase):
+    """ Batches and retries of the purge requests """
+
+    async def _start(self, failures: int = 0, failure_status: int = 503, batch_maxsize: int = 100,
+                     retries: int = 3) -> None:
+        self.server = PurgeServer(failures, failure_status)
+        self.test_server = aiohttp.test_utils.TestServer(self.server.app)
+        await self.test_server.start_server()
+
+        self.purger = edge_purge.EdgePurger(
+            [str(self.test_server.make_url('/purge'))], header='Surrogate-Key',
+            batch_delay=0.01, batch_maxsize=batch_maxsize, retries=retries, timeout=1
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self.purger.close()
+        await self.test_server.close()
+
+    async def test_batches(self) -> None:
+        await self._start(batch_maxsize=2)
+
+        await self.purger.purge({'post:1', 'posts', 'note:4'})
+        await self.purger.purge({'post:2', 'user:3', 'post:1'})
+        # purge requests are sent after the batch delay
+        self.assertEqual(self.server.requests, 0)
+
+        await asyncio.sleep(0.2)
+
+        # tags of the notes are not purged (notes are private), keys are deduplicated
+        self.assertEqual(self.server.purged_batches, [['post:1', 'post:2'], ['posts', 'user:3']])
+        self.assertEqual(self.purger.stats['purged_keys'], 4)
+        self.assertEqual(self.purger.stats['requests'], 2)
+        self.assertEqual(self.purger.stats['pending_keys'], 0)
+
+    async def test_private_tags_are_not_sent(self) -> None:
+        await self._start()
+
+        await self.purger.purge({'note:4', 'notes_of_user:3', invalidation.ALL})
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(self.server.requests, 0)
+
+    async def test_retries(self) -> None:
+        await self._start(failures=2)
+
+        await self.purger.purge({'post:1'})
+        # backoff: batch delay, then doubled
+        await asyncio.sleep(0.3)
+
+        self.assertEqual(self.server.purged_batches, [['post:1']])
+        self.assertEqual(self.purger.stats['requests'], 3)
+        self.assertEqual(self.purger.stats['retried_requests'], 2)
+        self.assertEqual(self.purger.stats['failed_requests'], 0)
+
+    async def test_failed_purge(self) -> None:
+        await self._start(failures=10, failure_status=500, retries=2)
+
+        await self.purger.purge({'post:1'})
+        await asyncio.sleep(0.3)
+
+        self.assertEqual(self.server.purged_batches, [])
+        self.assertEqual(self.purger.stats['requests'], 3)
+        self.assertEqual(self.purger.stats['failed_requests'], 1)
+
+    async def test_rejected_purge_is_not_retried(self) -> None:
+        await self._start(failures=1, failure_status=403)
+
+        await self.purger.purge({'post:1'})
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(self.purger.stats['requests'], 1)
+        self.assertEqual(self.purger.stats['retried_requests'], 0)
+        self.assertEqual(self.purger.stats['purged_keys'], 0)
+
+    async def test_pending_purges_are_sent_on_close(self) -> None:
+        await self._start()
+        self.purger.batch_delay = 10
+
+        await self.purger.purge({'post:1'})
+        await self.purger.close()
+
+        self.assertEqual(self.server.purged_batches, [['post:1']])
+
+
+class MemoryPageCache(page_cache.PageCache):
+    """ Page cache in memory (pages are saved without generation check) """
+
+    def __init__(self) -> None:
+        super().__init__(redis=None)
+        self.pages: dict[str, tuple[bytes, set[str]]] = {}
+
+    async def get(self, page_key: str) -> tuple[Optional[bytes], set[str]]:
+        return self.pages.get(page_key, (None, set()))
+
+    async def save(self, page_key: str, body: bytes, tags: set[str], generation: int) -> bool:
+        self.pages[page_key] = (body, set(tags))
+        return True
+
+
+class SurrogateKeysTestCase(unittest.IsolatedAsyncioTestCase):
+    """ Surrogate keys of the public pages (rendered and served from the page cache) """
+
+    async def asyncSetUp(self) -> None:
+        self.renders = 0
+
+        @page_cache.cache_anonymous_page
+        async def post(request: aiohttp.web.Request) -> aiohttp.web.Response:
+            self.renders += 1
+            page_cache.tag_page(request, 'post:1', 'user:3')
+            return aiohttp.web.Response(text='post', content_type='text/html')
+
+        app = aiohttp.web.Application(middlewares=[create_cache_control_middleware()])
+        aiohttp_session.setup(app, aiohttp_session.SimpleCookieStorage())
+        app['page_cache'] = self.page_cache = MemoryPageCache()
+        app.router.add_get('/posts/1/', post, name='posts-id')
+
+        self.client = aiohttp.test_utils.TestClient(aiohttp.test_utils.TestServer(app))
+        await self.client.start_server()
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+
+    async def test_surrogate_keys_of_cached_page(self) -> None:
+        for _ in range(2):
+            response = await self.client.get('/posts/1/')
+
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.headers[SURROGATE_KEYS_HEADER], 'post:1 user:3')
+            self.assertIn('public', response.headers['Cache-Control'])
+            self.assertEqual(response.headers['Vary'], 'Cookie')
+
+        # the second page is served from the page cache
+        self.assertEqual(self.renders, 1)
+        self.assertEqual(self.page_cache.pages['posts-id||'][1], {'post:1', 'user:3'})
+
+    async def test_page_of_the_visitor_with_session(self) -> None:
+        response = await self.client.get('/posts/1/', cookies={'AIOHTTP_SESSION': '{"session": {}}'})
+
+        self.assertEqual(response.status, 200)
+        self.assertNotIn(SURROGATE_KEYS_HEADER, response.headers)
+        self.assertEqual(response.headers['Cache-Control'], 'private, no-cache')
+        self.assertEqual(self.page_cache.pages, {})
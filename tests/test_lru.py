@@ -0,0 +1,87 @@
+"""
+Tests of the in-process LRU cache: probabilistic early expiration and version guard of the writes.
+"""
+
+import random
+import unittest
+
+from core.cache import lru
+
+
+class EarlyExpirationTestCase(unittest.TestCase):
+    """ Probabilistic early expiration (XFetch) """
+
+    def setUp(self) -> None:
+        random.seed(1)
+
+    @staticmethod
+    def _expiration_rate(seconds_left: float, compute_time: float = 1.0, checks: int = 2_000) -> float:
+        return sum(lru.is_expired_early(100.0, compute_time, 100.0 - seconds_left) for _ in range(checks)) / checks
+
+    def test_expired_entry(self) -> None:
+        self.assertTrue(all(lru.is_expired_early(100.0, 1.0, now) for now in (100.0, 150.0)))
+        # entry without computation time expires exactly at expiration time
+        self.assertFalse(lru.is_expired_early(100.0, 0.0, 99.999))
+        self.assertTrue(lru.is_expired_early(100.0, 0.0, 100.0))
+
+    def test_probability_grows_near_expiration(self) -> None:
+        rates = [self._expiration_rate(seconds_left) for seconds_left in (20.0, 3.0, 1.0, 0.1)]
+
+        self.assertEqual(rates, sorted(rates))
+        self.assertLess(rates[0], 0.001)
+        self.assertGreater(rates[-1], 0.8)
+
+    def test_probability_grows_with_compute_time(self) -> None:
+        self.assertLess(self._expiration_rate(2.0, 0.1), self._expiration_rate(2.0, 1.0))
+        self.assertLess(self._expiration_rate(2.0, 1.0), self._expiration_rate(2.0, 10.0))
+
+
+class LRUCacheTestCase(unittest.IsolatedAsyncioTestCase):
+    """ Eviction and version guard of the writes """
+
+    def setUp(self) -> None:
+        self.cache = lru.LRUCache('test', maxsize=2)
+
+    def test_eviction(self) -> None:
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+
+        self.assertIs(self.cache.get('b'), lru.MISSING)
+        self.assertEqual((self.cache.get('a'), self.cache.get('c')), (1, 3))
+        self.assertEqual(self.cache.evictions, 1)
+
+    def test_version_guard(self) -> None:
+        for invalidate in (
+            lambda: self.cache.pop('other'),
+            lambda: self.cache.pop_where(lambda key, value: False),
+            self.cache.clear
+        ):
+            version = self.cache.version
+            # value was read before invalidation - it is not saved
+            invalidate()
+            self.cache.set('key', 'stale', version=version)
+            self.assertIs(self.cache.get('key'), lru.MISSING)
+
+        # value was read after invalidation
+        self.cache.set('key', 'fresh', version=self.cache.version)
+        self.assertEqual(self.cache.get('key'), 'fresh')
+
+    async def test_loaded_value_is_not_saved_after_invalidation(self) -> None:
+        loaded = []
+
+        @lru.cache_db_function(self.cache)
+        async def fetch(connection: None, id_: int) -> dict:
+            # invalidation is handled while query is executing
+            self.cache.pop((id_, ))
+            loaded.append(id_)
+            return {'id': id_}
+
+        self.assertIs(fetch.get_cached(1), lru.MISSING)
+        for _ in range(2):
+            self.assertEqual(await fetch(None, 1), {'id': 1})
+
+        self.assertEqual(loaded, [1, 1])
+        self.assertIs(fetch.get_cached(1), lru.MISSING)
+
@@ -0,0 +1,123 @@
+"""
+Tests of the session codecs: round-trip of the session data and dispatch of the payloads by format byte.
+"""
+
+import random
+import string
+from typing import Any
+import unittest
+
+from core import session_codec
+
+
+def _random_value(generator: random.Random, depth: int = 0) -> Any:
+    """ Return random value of the types that are supported by the codecs (lists and dicts are nested) """
+
+    kinds = ['none', 'bool', 'int', 'float', 'str', 'bytes'] + (['list', 'dict'] if depth < 3 else [])
+    kind = generator.choice(kinds)
+
+    if kind == 'none':
+        return None
+    if kind == 'bool':
+        return generator.random() < 0.5
+    if kind == 'int':
+        bits = generator.choice((5, 7, 8, 16, 32, 63))
+        return generator.randint(-2 ** bits, 2 ** bits - 1)
+    if kind == 'float':
+        return generator.uniform(-1e9, 1e9)
+    if kind == 'str':
+        length = generator.choice((0, 5, 31, 32, 300))
+        return ''.join(generator.choices(string.printable + 'приветäö€', k=length))
+    if kind == 'bytes':
+        return generator.randbytes(generator.choice((0, 10, 300)))
+    if kind == 'list':
+        return [_random_value(generator, depth + 1) for _ in range(generator.choice((0, 3, 15, 16, 20)))]
+
+    return {
+        generator.choice((f'key {index}', index)): _random_value(generator, depth + 1)
+        for index in range(generator.choice((0, 3, 15, 16, 20)))
+    }
+
+
+class SessionCodecTestCase(unittest.TestCase):
+    """ Round-trip of the session data and dispatch of the payloads """
+
+    data = {
+        'session': {'user_id': 42, 'login': 'admin', 'is_moderator': False},
+        'created': 1_600_000_000,
+        'messages': ['saved', 'привет'],
+        'score': -1.5,
+        'nothing': None
+    }
+
+    def setUp(self) -> None:
+        self.json = session_codec.create_codec('json')
+        self.binary = session_codec.create_codec('binary', compression_threshold=512)
+
+    def test_round_trip(self) -> None:
+        for codec in (self.json, self.binary):
+            with self.subTest(codec=codec.name):
+                self.assertEqual(codec.decode(codec.encode(self.data)), self.data)
+
+    def test_random_round_trip(self) -> None:
+        generator = random.Random(3_000)
+
+        for _ in range(3_000):
+            value = _random_value(generator)
+            self.assertEqual(session_codec.unpack(session_codec.pack(value)), value)
+            self.assertEqual(self.binary.decode(self.binary.encode({'value': value})), {'value': value})
+
+    def test_integer_limits(self) -> None:
+        values = [
+            0, 0x7f, 0x80, 0xff, 0x100, 0xffff, 0x10000, 0xffffffff, 0x100000000, 0xffffffffffffffff,
+            -1, -0x20, -0x21, -0x80, -0x81, -0x8000, -0x8001, -0x80000000, -0x80000001, -0x8000000000000000
+        ]
+
+        self.assertEqual(session_codec.unpack(session_codec.pack(values)), values)
+
+        for value in (0x10000000000000000, -0x8000000000000001):
+            with self.assertRaises(TypeError):
+                session_codec.pack(value)
+
+    def test_format_dispatch(self) -> None:
+        json_payload = self.json.encode(self.data)
+        binary_payload = self.binary.encode(self.data)
+        compressed_payload = self.binary.encode({**self.data, 'history': ['/posts/'] * 200})
+
+        self.assertEqual(json_payload[:1], b'{')
+        self.assertEqual(binary_payload[0], session_codec.BINARY_FORMAT)
+        self.assertEqual(compressed_payload[0], session_codec.BINARY_COMPRESSED_FORMAT)
+
+        # payloads of all formats are decoded by every codec (rollout and rollback of the codec)
+        for codec in (self.json, self.binary):
+            with self.subTest(codec=codec.name):
+                self.assertEqual(codec.decode(json_payload), self.data)
+                self.assertEqual(codec.decode(binary_payload), self.data)
+                self.assertEqual(codec.decode(compressed_payload)['history'], ['/posts/'] * 200)
+
+    def test_random_data_is_not_compressed(self) -> None:
+        payload = self.binary.encode({'token': random.Random(1).randbytes(2_000)})
+
+        self.assertEqual(payload[0], session_codec.BINARY_FORMAT)
+
+    def test_broken_payloads(self) -> None:
+        binary_payload = self.binary.encode(self.data)
+
+        for payload in (
+            b'',
+            b'\x07' + binary_payload[1:],
+            binary_payload[:-3],
+            binary_payload + b'\x00',
+            bytes((session_codec.BINARY_COMPRESSED_FORMAT, )) + b'not zlib',
+            bytes((session_codec.BINARY_FORMAT, 0xc1))
+        ):
+            with self.subTest(payload=payload[:8]):
+                with self.assertRaises(ValueError):
+                    session_codec.decode(payload)
+
+    def test_unknown_codec(self) -> None:
+        with self.assertRaises(ValueError):
+            session_codec.create_codec('pickle')
+
+        with self.assertRaises(TypeError):
+            self.binary.encode({'ids': {1, 2}})
@@ -0,0 +1,253 @@
+"""
+Tests of the notes sharding: routing of the users by shards and moving of the user notes between shards.
+
+Moving is tested with MySQL - tests are skipped if MySQL is not set by environment variables:
+`TEST_DB_HOST`, `TEST_DB_PORT`, `TEST_DB_USER`, `TEST_DB_PASSWORD` (user must be allowed to create databases).
+"""
+
+import contextlib
+import os
+from typing import Optional
+import unittest
+import unittest.mock
+
+import aiomysql
+
+from core.cache import records
+from core.database import (
+    invalidation,
+    sharding
+)
+
+
+TEST_DB_HOST = os.getenv('TEST_DB_HOST')
+TEST_DB_PORT = int(os.getenv('TEST_DB_PORT', 3306))
+TEST_DB_USER = os.getenv('TEST_DB_USER', 'root')
+TEST_DB_PASSWORD = os.getenv('TEST_DB_PASSWORD', '')
+
+# databases of the test: the main db and two notes shards
+MAIN_DB_NAME = 'sharding_test_main'
+SHARDS_DB_NAMES = ('sharding_test_shard_0', 'sharding_test_shard_1')
+
+TABLES_QUERIES = {
+    'note_rubrics': """
+        CREATE TABLE `note_rubrics` (
+            `id` INT NOT NULL AUTO_INCREMENT,
+            `title` VARCHAR(255) NOT NULL,
+            `edited_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            `user_id` INT NOT NULL,
+            PRIMARY KEY (`id`)
+        )  ENGINE=INNODB;
+    """,
+    'notes': """
+        CREATE TABLE `notes` (
+            `id` INT NOT NULL AUTO_INCREMENT,
+            `content` TEXT NOT NULL,
+            `created_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            `edited_date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            `rubric_id` INT NULL,
+            `user_id` INT NOT NULL,
+            PRIMARY KEY (`id`),
+            FOREIGN KEY (`rubric_id`)
+                REFERENCES `note_rubrics` (`id`)
+                ON DELETE CASCADE ON UPDATE NO ACTION
+        )  ENGINE=INNODB;
+    """,
+    'notes_shards_directory': """
+        CREATE TABLE `notes_shards_directory` (
+            `user_id` INT NOT NULL,
+            `shard_id` INT NOT NULL,
+            PRIMARY KEY (`user_id`)
+        )  ENGINE=INNODB;
+    """
+}
+
+
+class FakeCursor:
+    """ Cursor of the main db that reads the shards directory from dict """
+
+    def __init__(self, directory: dict[int, int]) -> None:
+        self.directory = directory
+        self.result = None
+
+    async def execute(self, query: str, params: dict) -> None:
+        shard_id = self.directory.get(params['user_id'])
+        self.result = None if shard_id is None else (shard_id, )
+
+    async def fetchone(self) -> Optional[tuple[int]]:
+        return self.result
+
+
+class FakeConnection:
+    """ Connection of the fake pool """
+
+    def __init__(self, pool: 'FakePool') -> None:
+        self.pool = pool
+
+    @contextlib.asynccontextmanager
+    async def cursor(self) -> FakeCursor:
+        yield FakeCursor(self.pool.directory)
+
+
+class FakePool:
+    """ Pool that counts acquired connections (main db pool keeps the shards directory) """
+
+    def __init__(self, directory: Optional[dict[int, int]] = None) -> None:
+        self.directory = directory if directory is not None else {}
+        self.acquisitions = 0
+
+    @contextlib.asynccontextmanager
+    async def acquire(self) -> FakeConnection:
+        self.acquisitions += 1
+        yield FakeConnection(self)
+
+
+class RoutingTestCase(unittest.IsolatedAsyncioTestCase):
+    """ Routing of the users by shards """
+
+    def setUp(self) -> None:
+        self.main_pool = FakePool()
+        self.shards = tuple(FakePool() for _ in range(3))
+        self.app = {'db': self.main_pool, 'notes_shards': self.shards}
+        records.shard_placement_cache.clear()
+
+    async def _get_shard(self, user_id: int) -> FakePool:
+        async with sharding.acquire_notes_connection(self.app, user_id) as connection:
+            return connection.pool
+
+    def test_default_shard_id(self) -> None:
+        self.assertEqual([sharding.get_default_shard_id(user_id, 3) for user_id in range(7)], [0, 1, 2, 0, 1, 2, 0])
+        self.assertEqual(sharding.get_default_shard_id(42, 1), 0)
+
+    async def test_fallback_routing(self) -> None:
+        for user_id in (3, 7, 11):
+            self.assertIs(await self._get_shard(user_id), self.shards[user_id % 3])
+
+    async def test_directory_routing(self) -> None:
+        self.main_pool.directory[7] = 0
+
+        self.assertIs(await self._get_shard(7), self.shards[0])
+        self.assertIs(await self._get_shard(8), self.shards[2])
+
+    async def test_cached_placement(self) -> None:
+        self.main_pool.directory[7] = 0
+
+        self.assertIs(await self._get_shard(7), self.shards[0])
+        self.assertIs(await self._get_shard(7), self.shards[0])
+        # directory is read once
+        self.assertEqual(self.main_pool.acquisitions, 1)
+
+        # moving of the notes invalidates placement
+        self.main_pool.directory[7] = 2
+        await records.purge_records({invalidation.tag(invalidation.NOTES_SHARD, 7)})
+
+        self.assertIs(await self._get_shard(7), self.shards[2])
+        self.assertEqual(self.main_pool.acquisitions, 2)
+
+    async def test_single_shard(self) -> None:
+        self.app['notes_shards'] = (self.main_pool, )
+
+        self.assertIs(await self._get_shard(7), self.main_pool)
+        # directory is not read if there is the only shard
+        self.assertEqual(self.main_pool.acquisitions, 1)
+
+
+@unittest.skipUnless(TEST_DB_HOST, 'MySQL of the tests is not set (TEST_DB_HOST)')
+class MoveUserNotesTestCase(unittest.IsolatedAsyncioTestCase):
+    """ Moving of the user notes between shards (with MySQL) """
+
+    user_id = 5
+
+    async def asyncSetUp(self) -> None:
+        records.shard_placement_cache.clear()
+        self.connections = {}
+        for shard_id, db_name in enumerate((MAIN_DB_NAME, *SHARDS_DB_NAMES), start=-1):
+            connection = await aiomysql.connect(
+                host=TEST_DB_HOST, port=TEST_DB_PORT, user=TEST_DB_USER, password=TEST_DB_PASSWORD, autocommit=True
+            )
+            async with connection.cursor() as cursor:
+                await cursor.execute(f'DROP DATABASE IF EXISTS `{db_name}`;')
+                await cursor.execute(f'CREATE DATABASE `{db_name}`;')
+                await cursor.execute(f'USE `{db_name}`;')
+                # interleaved ids of the shards (as in `sharding.create_notes_shard_pool`)
+                if shard_id >= 0:
+                    await cursor.execute(
+                        f'SET SESSION auto_increment_increment = {len(SHARDS_DB_NAMES)}, '
+                        f'auto_increment_offset = {shard_id + 1};'
+                    )
+                for query in TABLES_QUERIES.values():
+                    await cursor.execute(query)
+            self.connections[db_name] = connection
+
+        self.main = self.connections[MAIN_DB_NAME]
+        self.source, self.target = (self.connections[db_name] for db_name in SHARDS_DB_NAMES)
+
+    async def asyncTearDown(self) -> None:
+        for db_name, connection in self.connections.items():
+            async with connection.cursor() as cursor:
+                await cursor.execute(f'DROP DATABASE IF EXISTS `{db_name}`;')
+            connection.close()
+
+    @staticmethod
+    async def _insert_note(connection: aiomysql.Connection, user_id: int, content: str,
+                           rubric_id: Optional[int] = None) -> int:
+        async with connection.cursor() as cursor:
+            await cursor.execute(
+                'INSERT INTO `notes` (`content`, `rubric_id`, `user_id`) VALUES (%s, %s, %s);',
+                (content, rubric_id, user_id)
+            )
+            return cursor.lastrowid
+
+    @staticmethod
+    async def _fetch_ids(connection: aiomysql.Connection, table_name: str, user_id: int) -> list[int]:
+        async with connection.cursor() as cursor:
+            await cursor.execute(f'SELECT `id` FROM `{table_name}` WHERE `user_id` = %s ORDER BY `id`;', (user_id, ))
+            return [row[0] for row in await cursor.fetchall()]
+
+    async def _move_with_late_note(self, late_copy_index: int) -> None:
+        """ Move notes of the user - late note is created in the source shard after the copy with the index """
+        async with self.source.cursor() as cursor:
+            await cursor.execute(
+                'INSERT INTO `note_rubrics` (`title`, `user_id`) VALUES (%s, %s);', ('ideas', self.user_id)
+            )
+            rubric_id = cursor.lastrowid
+        note_ids = [
+            await self._insert_note(self.source, self.user_id, 'first', rubric_id),
+            await self._insert_note(self.source, self.user_id, 'second')
+        ]
+        other_note_id = await self._insert_note(self.source, self.user_id + 1, 'other user')
+
+        copy_user_rows = sharding._copy_user_rows
+        copies = []
+
+        async def copy_user_rows_with_late_note(*args) -> None:
+            await copy_user_rows(*args)
+            if len(copies) == late_copy_index:
+                note_ids.append(await self._insert_note(self.source, self.user_id, 'late', rubric_id))
+            copies.append(args)
+
+        with unittest.mock.patch.object(sharding, '_copy_user_rows', copy_user_rows_with_late_note):
+            await sharding.move_user_notes(self.main, self.source, self.target, self.user_id, 1)
+
+        self.assertEqual(len(copies), 3)
+
+        # ids are kept, late note is copied by the next copy
+        self.assertEqual(await self._fetch_ids(self.target, 'notes', self.user_id), sorted(note_ids))
+        self.assertEqual(await self._fetch_ids(self.target, 'note_rubrics', self.user_id), [rubric_id])
+
+        # rows of the user are deleted from the source shard, rows of other users are kept
+        self.assertEqual(await self._fetch_ids(self.source, 'notes', self.user_id), [])
+        self.assertEqual(await self._fetch_ids(self.source, 'note_rubrics', self.user_id), [])
+        self.assertEqual(await self._fetch_ids(self.source, 'notes', self.user_id + 1), [other_note_id])
+
+        # directory is switched - user is routed to the target shard
+        self.assertEqual(await sharding.fetch_user_shard_id(self.main, self.user_id, len(SHARDS_DB_NAMES)), 1)
+        self.assertEqual(await sharding.fetch_user_shard_id(self.main, self.user_id + 1, len(SHARDS_DB_NAMES)), 0)
+
+    async def test_move_user_notes(self) -> None:
+        # note is created while the first copy is executing (before the directory switch)
+        await self._move_with_late_note(0)
+
+    async def test_note_created_before_deleting_is_kept(self) -> None:
+        # note is created by request that resolved the old placement - after the second copy, before deleting
+        await self._move_with_late_note(1)
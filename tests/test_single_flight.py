@@ -0,0 +1,113 @@
+"""
+Tests of the single-flight coalescing: shared calls, leader cancellation and binding of the cache versions.
+"""
+
+import asyncio
+import unittest
+
+import pydantic
+
+from core.database import single_flight
+
+
+class SingleFlightTestCase(unittest.IsolatedAsyncioTestCase):
+    """ Coalescing of the concurrent calls by key """
+
+    def setUp(self) -> None:
+        self.single_flight = single_flight.SingleFlight('test')
+        self.calls: list[str] = []
+        self.release = asyncio.Event()
+
+    def _call(self, name: str) -> callable:
+        async def call() -> str:
+            self.calls.append(name)
+            await self.release.wait()
+            return name
+
+        return call
+
+    async def test_concurrent_calls_are_coalesced(self) -> None:
+        tasks = [asyncio.create_task(self.single_flight.do('key', self._call(str(index)))) for index in range(3)]
+        await asyncio.sleep(0)
+        self.release.set()
+
+        self.assertEqual(await asyncio.gather(*tasks), ['0', '0', '0'])
+        self.assertEqual(self.calls, ['0'])
+        self.assertEqual(self.single_flight.stats, {'calls': 1, 'coalesced': 2, 'in_flight': 0})
+
+    async def test_exception_is_shared(self) -> None:
+        async def failed_call() -> None:
+            await self.release.wait()
+            raise LookupError('not found')
+
+        tasks = [asyncio.create_task(self.single_flight.do('key', failed_call)) for _ in range(2)]
+        await asyncio.sleep(0)
+        self.release.set()
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, LookupError) for result in results))
+
+    async def test_leader_cancellation(self) -> None:
+        leader = asyncio.create_task(self.single_flight.do('key', self._call('leader')))
+        await asyncio.sleep(0)
+        followers = [
+            asyncio.create_task(self.single_flight.do('key', self._call(f'follower {index}'))) for index in range(3)
+        ]
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        # call is released when the resumed follower has started it again
+        while len(self.calls) < 2:
+            await asyncio.sleep(0)
+        self.release.set()
+
+        # the first resumed follower executes call, other followers coalesce with it again
+        results = await asyncio.gather(*followers)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(self.calls, ['leader', results[0]])
+        self.assertTrue(leader.cancelled())
+
+    async def test_follower_cancellation_does_not_cancel_call(self) -> None:
+        leader = asyncio.create_task(self.single_flight.do('key', self._call('leader')))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(self.single_flight.do('key', self._call('follower')))
+        await asyncio.sleep(0)
+
+        follower.cancel()
+        await asyncio.sleep(0)
+        self.release.set()
+
+        self.assertEqual(await leader, 'leader')
+        self.assertTrue(follower.cancelled())
+
+    async def test_versions_binding(self) -> None:
+        async def do(name: str, version: int) -> str:
+            with single_flight.bind_versions(('cache', version)):
+                return await self.single_flight.do('key', self._call(name))
+
+        tasks = [
+            asyncio.create_task(do('A', 1)),
+            asyncio.create_task(do('B', 2)),
+            asyncio.create_task(do('C', 1))
+        ]
+        await asyncio.sleep(0)
+        self.release.set()
+
+        # call that started after invalidation (other version) is not joined with the older call
+        self.assertEqual(await asyncio.gather(*tasks), ['A', 'B', 'A'])
+        self.assertEqual(self.calls, ['A', 'B'])
+
+
+class FreezeTestCase(unittest.TestCase):
+    """ Hashable representation of the arguments """
+
+    def test_freeze(self) -> None:
+        class Params(pydantic.BaseModel):
+            page: int
+            rubric: int = None
+
+        self.assertEqual(single_flight.freeze(Params(page=1)), single_flight.freeze(Params(page=1, rubric=None)))
+        self.assertNotEqual(single_flight.freeze(Params(page=1)), single_flight.freeze(Params(page=2)))
+        self.assertEqual(single_flight.freeze({'b': [1, 2], 'a': {3}}), (('a', (3, )), ('b', (1, 2))))
+        hash(single_flight.freeze({'tags': {'post:1', 'posts'}}))
@@ -0,0 +1,123 @@
+"""
+Tests of the two-tier cache: reads by tiers and rejected L2 writes of the values that raced invalidation.
+"""
+
+import asyncio
+from typing import Any
+import unittest
+
+from core.cache import (
+    lru,
+    tiered
+)
+from core.database import invalidation
+
+
+class MemoryTieredCache(tiered.TieredCache):
+    """ Tiered cache with L2 in memory (generation is compared with the shared generation as in Redis) """
+
+    def __init__(self) -> None:
+        super().__init__('test', ttl=60)
+        self.l2: dict[str, tuple[frozenset[str], Any, float, float]] = {}
+        self.shared_generation = 0
+
+    async def _get_l2(self, key: str) -> Any:
+        return self.l2.get(key, lru.MISSING)
+
+    async def _set_l2(self, key: str, entry: tuple[frozenset[str], Any, float, float], generation: int) -> None:
+        if generation != self.shared_generation:
+            self.l2_rejected_writes += 1
+            return
+
+        self.l2[key] = entry
+
+
+class TieredCacheTestCase(unittest.IsolatedAsyncioTestCase):
+    """ Reads by tiers and invalidation races of the loads """
+
+    def setUp(self) -> None:
+        self.cache = MemoryTieredCache()
+        self.loads = 0
+        self.generation = invalidation.get_generation()
+        self.cache.shared_generation = self.generation
+
+    def tearDown(self) -> None:
+        invalidation._generation = self.generation
+
+    async def _load(self) -> str:
+        self.loads += 1
+        await asyncio.sleep(0)
+        return f'value {self.loads}'
+
+    async def _get(self, key: str = 'key') -> str:
+        return await self.cache.get_or_load(key, self._load, lambda _: {'post:1'})
+
+    async def test_tiers(self) -> None:
+        self.assertEqual(await self._get(), 'value 1')
+        self.assertEqual(await self._get(), 'value 1')
+        self.assertEqual(self.cache.l2['key'][:2], (frozenset({'post:1'}), 'value 1'))
+
+        # L1 of other worker is empty - value is read from L2
+        self.cache.l1.clear()
+        self.assertEqual(await self._get(), 'value 1')
+
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(
+            (self.cache.l1_hits, self.cache.l2_hits, self.cache.misses, self.cache.l2_rejected_writes), (1, 1, 1, 0)
+        )
+
+    async def test_l1_purged_while_loading(self) -> None:
+        task = asyncio.create_task(self._get())
+        await asyncio.sleep(0)
+        # invalidation is handled by the worker while value is loading
+        self.cache.purge_l1({'post:1'})
+
+        self.assertEqual(await task, 'value 1')
+        # value is returned to the reader, but it is not cached in both tiers
+        self.assertEqual(self.cache.l2, {})
+        self.assertEqual(len(self.cache.l1), 0)
+        self.assertEqual(self.cache.l2_rejected_writes, 1)
+
+        self.assertEqual(await self._get(), 'value 2')
+        self.assertIn('key', self.cache.l2)
+
+    async def test_shared_generation_changed_while_loading(self) -> None:
+        task = asyncio.create_task(self._get())
+        await asyncio.sleep(0)
+        # other worker invalidated tags - bus message is not handled by this worker yet
+        self.cache.shared_generation += 1
+
+        self.assertEqual(await task, 'value 1')
+        self.assertEqual(self.cache.l2, {})
+        self.assertEqual(self.cache.l2_rejected_writes, 1)
+
+        # worker applied generation - the next load is shared
+        invalidation.apply_generation(self.cache.shared_generation)
+        self.cache.purge_l1({'post:1'})
+
+        self.assertEqual(await self._get(), 'value 2')
+        self.assertEqual(self.cache.l2['key'][1], 'value 2')
+        self.assertEqual(self.cache.l2_rejected_writes, 1)
+
+    async def test_stale_l2_write_is_rejected_after_invalidation(self) -> None:
+        task = asyncio.create_task(self._get())
+        await asyncio.sleep(0)
+        # worker invalidated tags: shared generation is incremented and applied, L1 is purged
+        self.cache.shared_generation += 1
+        invalidation.apply_generation(self.cache.shared_generation)
+        self.cache.purge_l1({'post:1'})
+
+        self.assertEqual(await task, 'value 1')
+        self.assertEqual(self.cache.l2, {})
+        self.assertEqual(self.cache.stats['l2_rejected_writes'], 1)
+
+
+class SerializationTestCase(unittest.TestCase):
+    """ Serialization of the values (big values are compressed) """
+
+    def test_dumps(self) -> None:
+        for value in ({'id': 1, 'title': 'post'}, ['x' * 1000] * 100, None):
+            self.assertEqual(tiered.loads(tiered.dumps(value)), value)
+
+        self.assertEqual(tiered.dumps('small')[:1], b'p')
+        self.assertEqual(tiered.dumps('x' * 100_000)[:1], b'z')